@@ -0,0 +1,119 @@
+"""ann_index.py
+FAISS index construction helpers for RetrieverAgent.
+
+Supported index types:
+
+- ``flat``     : exact IndexFlatL2 (what ``FAISS.from_documents`` builds)
+- ``ivf_flat`` : inverted file over raw vectors, searched with ``nprobe``
+- ``ivf_pq``   : inverted file with product-quantized codes, for very large corpora
+- ``hnsw``     : graph index (IndexHNSWFlat), searched with ``efSearch``
+- ``auto``     : pick one of the above from the corpus size (see ``DEFAULT_ANN_THRESHOLDS``)
+
+All indexes use the L2 metric so scores stay comparable with the flat baseline.
+"""
+from __future__ import annotations
+
+import math
+from typing import Dict, Optional
+
+import numpy as np
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+# Corpus size (number of vectors) at which "auto" moves up to the next index type
+DEFAULT_ANN_THRESHOLDS = {
+    "ivf_flat": 50_000,
+    "ivf_pq": 2_000_000,
+}
+
+DEFAULT_NPROBE = 16
+DEFAULT_EF_SEARCH = 64
+DEFAULT_HNSW_M = 32
+DEFAULT_HNSW_EF_CONSTRUCTION = 200
+
+
+def choose_index_type(n_vectors: int, thresholds: Optional[Dict[str, int]] = None) -> str:
+    """Resolve the ``auto`` index type for a corpus of ``n_vectors``."""
+    thresholds = {**DEFAULT_ANN_THRESHOLDS, **(thresholds or {})}
+    if n_vectors >= thresholds["ivf_pq"]:
+        return "ivf_pq"
+    if n_vectors >= thresholds["ivf_flat"]:
+        return "ivf_flat"
+    return "flat"
+
+
+def index_type_of(index) -> str:
+    """Map a live faiss index back to one of INDEX_TYPES."""
+    import faiss
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf_flat"
+    return "flat"
+
+
+def _nlist_for(n_vectors: int) -> int:
+    # ~4*sqrt(n) lists, but keep at least ~39 training points per centroid
+    return max(1, min(int(4 * math.sqrt(n_vectors)), n_vectors // 39))
+
+
+def _pq_subquantizers(dim: int) -> int:
+    # Largest divisor of dim giving sub-vectors of at least 8 dimensions
+    for m in range(max(1, dim // 8), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def build_index(index_type: str, vectors: np.ndarray,
+                nprobe: int = DEFAULT_NPROBE, ef_search: int = DEFAULT_EF_SEARCH):
+    """Create, train (if needed) and populate an index of ``index_type`` from ``vectors`` in order."""
+    import faiss
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n, dim = vectors.shape
+    if index_type == "flat" or (index_type in ("ivf_flat", "ivf_pq") and n < 2 * 39):
+        index = faiss.IndexFlatL2(dim)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, DEFAULT_HNSW_M)
+        index.hnsw.efConstruction = DEFAULT_HNSW_EF_CONSTRUCTION
+        index.hnsw.efSearch = ef_search
+    elif index_type == "ivf_flat":
+        quantizer = faiss.IndexFlatL2(dim)
+        index = faiss.IndexIVFFlat(quantizer, dim, _nlist_for(n), faiss.METRIC_L2)
+    elif index_type == "ivf_pq":
+        quantizer = faiss.IndexFlatL2(dim)
+        nbits = 8 if n >= 256 * 39 else max(4, int(math.log2(max(16, n // 39))))
+        index = faiss.IndexIVFPQ(quantizer, dim, _nlist_for(n), _pq_subquantizers(dim), nbits)
+    else:
+        raise ValueError(f"Unknown index type '{index_type}'. Choose from {INDEX_TYPES} or 'auto'.")
+
+    if not index.is_trained:
+        index.train(vectors)
+    if isinstance(index, faiss.IndexIVF):
+        index.nprobe = min(nprobe, index.nlist)
+        index.make_direct_map()  # keeps reconstruct() available for the next retrain
+    if n:
+        index.add(vectors)
+    return index
+
+
+def extract_vectors(index) -> np.ndarray:
+    """Return all stored vectors in insertion order (approximate for PQ indexes)."""
+    import faiss
+    if index.ntotal == 0:
+        return np.zeros((0, index.d), dtype=np.float32)
+    if isinstance(index, faiss.IndexIVF):
+        index.make_direct_map()
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def search_parameters(index, nprobe: Optional[int] = None, ef_search: Optional[int] = None):
+    """Per-query faiss SearchParameters for this index, or None to use the index defaults."""
+    import faiss
+    if nprobe is not None and isinstance(index, faiss.IndexIVF):
+        return faiss.SearchParametersIVF(nprobe=min(int(nprobe), index.nlist))
+    if ef_search is not None and isinstance(index, faiss.IndexHNSW):
+        return faiss.SearchParametersHNSW(efSearch=int(ef_search))
+    return None
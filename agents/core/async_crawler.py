@@ -0,0 +1,218 @@
+"""async_crawler.py
+Concurrent page fetching for ``ScrapingAgent.crawl_async`` and ``/scrape/batch``.
+
+One pooled ``httpx.AsyncClient`` per event loop (HTTP keep-alive, so repeated hosts
+reuse their connections) is shared by every crawl. Two limits apply at once: a global
+cap on requests in flight and a smaller per-host cap so a sweep over one site does not
+open dozens of sockets to it. ``crawl`` yields each result as soon as it completes,
+not in input order.
+
+Pages go through the agent's ``HttpPageCache`` when one is given (its SQLite and zlib work
+runs in the I/O pool): fresh pages are not fetched at all and stale ones are revalidated
+with a conditional request. Every network
+request first waits for its host's token from the shared ``PolitenessScheduler`` (batch
+priority by default), before taking a global slot so waiting hosts do not hold slots.
+
+Without httpx the crawler falls back to the agent's blocking fetch in the I/O pool, with
+the same limits.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import threading
+import time
+import weakref
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Optional
+
+from .executors import run_cpu_bound, run_io_bound
+from .http_cache import HttpPageCache
+from .politeness import PRIORITY_BATCH, PolitenessScheduler, host_of, retry_after_seconds
+
+try:
+    import httpx
+except ImportError:
+    httpx = None  # type: ignore
+
+DEFAULT_CRAWL_CONCURRENCY = int(os.getenv("SCRAPER_MAX_CONCURRENCY", "64"))
+DEFAULT_PER_HOST_CONCURRENCY = int(os.getenv("SCRAPER_PER_HOST_CONCURRENCY", "6"))
+DEFAULT_CRAWL_TIMEOUT = float(os.getenv("SCRAPER_TIMEOUT_SECONDS", "15"))
+
+
+class AsyncCrawler:
+    """Bounded-concurrency async fetcher with per-host limits and a keep-alive pool."""
+
+    def __init__(self, headers: Optional[Dict[str, str]] = None,
+                 max_concurrency: int = DEFAULT_CRAWL_CONCURRENCY,
+                 per_host_concurrency: int = DEFAULT_PER_HOST_CONCURRENCY,
+                 timeout: float = DEFAULT_CRAWL_TIMEOUT,
+                 sync_fetch: Optional[Callable[[str, int], Optional[str]]] = None,
+                 http_cache: Optional[HttpPageCache] = None,
+                 scheduler: Optional[PolitenessScheduler] = None):
+        self.headers = dict(headers or {})
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_host_concurrency = max(1, min(per_host_concurrency, self.max_concurrency))
+        self.timeout = timeout
+        self.sync_fetch = sync_fetch
+        self.http_cache = http_cache
+        self.scheduler = scheduler
+        # loop -> (client or None, global semaphore, {host: semaphore})
+        self._loop_state: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._failures = 0
+        self._bytes = 0
+        self._in_flight = 0
+        self._max_in_flight = 0
+        self._total_elapsed = 0.0
+        self._total_politeness_wait = 0.0
+
+    def _state(self):
+        loop = asyncio.get_running_loop()
+        state = self._loop_state.get(loop)
+        if state is None:
+            client = None
+            if httpx is not None:
+                client = httpx.AsyncClient(
+                    headers=self.headers,
+                    timeout=self.timeout,
+                    follow_redirects=True,
+                    limits=httpx.Limits(max_connections=self.max_concurrency,
+                                        max_keepalive_connections=self.max_concurrency),
+                )
+            state = (client, asyncio.Semaphore(self.max_concurrency), {})
+            self._loop_state[loop] = state
+        return state
+
+    def _host_semaphore(self, host: str) -> asyncio.Semaphore:
+        host_limits = self._state()[2]
+        if host not in host_limits:
+            host_limits[host] = asyncio.Semaphore(self.per_host_concurrency)
+        return host_limits[host]
+
+    def _record_in_flight(self, delta: int):
+        with self._lock:
+            self._in_flight += delta
+            self._max_in_flight = max(self._max_in_flight, self._in_flight)
+
+    def _record(self, elapsed: float, size: int, failed: bool, politeness_wait: float):
+        with self._lock:
+            self._requests += 1
+            self._total_elapsed += elapsed
+            self._total_politeness_wait += politeness_wait
+            self._bytes += size
+            self._failures += int(failed)
+
+    async def _request(self, client, url: str, headers: Dict[str, str]):
+        _, global_limit, _ = self._state()
+        async with global_limit:
+            self._record_in_flight(+1)
+            try:
+                return await client.get(url, headers=headers)
+            finally:
+                self._record_in_flight(-1)
+
+    async def _get(self, client, url: str, priority: int, result: Dict[str, Any]) -> Dict[str, Any]:
+        if client is None:
+            if self.sync_fetch is None:
+                raise RuntimeError("httpx is not installed and no blocking fetch was provided")
+            # The blocking fetch applies the HTTP cache and politeness itself
+            html = await run_io_bound(self.sync_fetch, url, priority)
+            if html is None:
+                raise RuntimeError("fetch failed")
+            return {"status_code": 200, "final_url": url, "html": html}
+        # SQLite reads/writes and (de)compressing whole bodies stay off the event loop
+        cached = await run_io_bound(self.http_cache.lookup, url) if self.http_cache else None
+        if cached is not None and cached.is_fresh():
+            return {"status_code": 200, "final_url": url, "html": cached.body, "cache": "fresh"}
+        conditional = cached.conditional_headers() if cached is not None else {}
+        response = await self._polite_request(client, url, priority, conditional, result)
+        if response.status_code == 304 and cached is not None:
+            page = await run_io_bound(self.http_cache.revalidated, url, response.headers)
+            if page is not None:
+                return {"status_code": 304, "final_url": url, "html": page.body, "cache": "revalidated"}
+            # The entry was cleared or evicted after the lookup; fetch the full body
+            response = await self._polite_request(client, url, priority, {}, result)
+        response.raise_for_status()
+        if self.http_cache:
+            await run_io_bound(self.http_cache.store, url, response.headers, response.text)
+        return {"status_code": response.status_code, "final_url": str(response.url), "html": response.text}
+
+    async def _polite_request(self, client, url: str, priority: int, headers: Dict[str, str],
+                              result: Dict[str, Any]):
+        """One GET after the host's politeness token; a 429 pushes the host's next slot back."""
+        if self.scheduler is not None:
+            waited = await self.scheduler.acquire_async(url, priority)
+            result["politeness_wait"] = round(result["politeness_wait"] + waited, 4)
+        response = await self._request(client, url, headers)
+        if response.status_code == 429 and self.scheduler is not None:
+            self.scheduler.backoff(url, retry_after_seconds(response.headers))
+        return response
+
+    async def fetch(self, url: str, priority: int = PRIORITY_BATCH) -> Dict[str, Any]:
+        """Fetch one URL within the politeness, per-host and global limits; errors are returned, not raised."""
+        client = self._state()[0]
+        result: Dict[str, Any] = {"url": url, "status_code": None, "html": None, "error": None, "politeness_wait": 0.0}
+        async with self._host_semaphore(host_of(url)):
+            start = time.perf_counter()
+            try:
+                result.update(await self._get(client, url, priority, result))
+            except Exception as e:
+                result["status_code"] = getattr(getattr(e, "response", None), "status_code", None)
+                result["error"] = f"{type(e).__name__}: {e}"
+            finally:
+                elapsed = time.perf_counter() - start
+                self._record(elapsed, len(result["html"] or ""), result["html"] is None, result["politeness_wait"])
+        result["elapsed"] = round(elapsed, 4)
+        return result
+
+    async def _fetch_and_process(self, url: str, process: Optional[Callable[[str], Dict[str, Any]]],
+                                 priority: int) -> Dict[str, Any]:
+        result = await self.fetch(url, priority)
+        if process is not None and result["html"] is not None:
+            html = result.pop("html")
+            try:
+                # Parsing is CPU work; keep it off the event loop
+                result.update(await run_cpu_bound(process, html))
+            except Exception as e:
+                result["error"] = f"{type(e).__name__}: {e}"
+        return result
+
+    async def crawl(self, urls: Iterable[str], process: Optional[Callable[[str], Dict[str, Any]]] = None,
+                    priority: int = PRIORITY_BATCH) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Fetch every URL (duplicates once) and yield result dicts in completion order.
+
+        ``process(html)`` runs in the CPU pool on each successful body and its dict is
+        merged into the result in place of ``html``. Closing the iterator early cancels
+        the fetches still pending.
+        """
+        tasks = [asyncio.ensure_future(self._fetch_and_process(url, process, priority)) for url in dict.fromkeys(urls)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def aclose(self):
+        """Close the connection pool of the running loop."""
+        state = self._loop_state.pop(asyncio.get_running_loop(), None)
+        if state is not None and state[0] is not None:
+            await state[0].aclose()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "backend": "httpx" if httpx is not None else "requests (I/O pool)",
+                "max_concurrency": self.max_concurrency,
+                "per_host_concurrency": self.per_host_concurrency,
+                "timeout": self.timeout,
+                "requests": self._requests,
+                "failures": self._failures,
+                "bytes": self._bytes,
+                "in_flight": self._in_flight,
+                "max_in_flight": self._max_in_flight,
+                "avg_request_seconds": round(self._total_elapsed / self._requests, 4) if self._requests else 0.0,
+                "avg_politeness_wait_seconds": round(self._total_politeness_wait / self._requests, 4) if self._requests else 0.0,
+            }
@@ -0,0 +1,153 @@
+"""embedding_cache.py
+Persistent content-hash cache in front of RetrieverAgent's embedding model.
+
+Vectors are stored in SQLite keyed by ``(model, kind, sha256(text))`` where ``kind``
+is ``"doc"`` or ``"query"`` (some models embed queries differently from passages).
+Re-ingesting a chunk that was embedded before costs one indexed lookup instead of a
+model forward pass. Queries additionally go through a small in-process LRU so
+repeated searches skip SQLite as well.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+DEFAULT_EMBEDDING_CACHE_FILENAME = "embedding_cache.sqlite"
+DEFAULT_QUERY_LRU_SIZE = 1024
+_SQLITE_MAX_PARAMS = 500  # stay well below SQLITE_MAX_VARIABLE_NUMBER on old builds
+
+
+def text_hash(text: str) -> bytes:
+    return hashlib.sha256(text.encode("utf-8")).digest()
+
+
+class EmbeddingCacheStore:
+    """SQLite table of float32 vectors keyed by model, kind and text hash."""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " model TEXT NOT NULL, kind TEXT NOT NULL, text_hash BLOB NOT NULL,"
+            " dim INTEGER NOT NULL, vector BLOB NOT NULL,"
+            " PRIMARY KEY (model, kind, text_hash))"
+        )
+        self._conn.commit()
+
+    def get_many(self, model: str, kind: str, hashes: List[bytes]) -> Dict[bytes, np.ndarray]:
+        found: Dict[bytes, np.ndarray] = {}
+        unique = list(dict.fromkeys(hashes))
+        with self._lock:
+            for start in range(0, len(unique), _SQLITE_MAX_PARAMS):
+                batch = unique[start:start + _SQLITE_MAX_PARAMS]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND kind = ? AND text_hash IN ({placeholders})",
+                    [model, kind, *batch],
+                ).fetchall()
+                for key, blob in rows:
+                    found[bytes(key)] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, model: str, kind: str, items: Dict[bytes, np.ndarray]):
+        if not items:
+            return
+        rows = [(model, kind, key, int(vec.shape[0]), np.asarray(vec, dtype=np.float32).tobytes()) for key, vec in items.items()]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, kind, text_hash, dim, vector) VALUES (?, ?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def count(self, model: Optional[str] = None) -> int:
+        with self._lock:
+            if model is None:
+                return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings WHERE model = ?", (model,)).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """Wraps a langchain ``Embeddings`` so repeated texts are served from the cache."""
+
+    def __init__(self, base: Embeddings, store: EmbeddingCacheStore, query_lru_size: int = DEFAULT_QUERY_LRU_SIZE):
+        self.base = base
+        self.store = store
+        self.model_name = getattr(base, "model_name", type(base).__name__)
+        self.query_lru_size = query_lru_size
+        self._query_lru: "OrderedDict[bytes, List[float]]" = OrderedDict()
+        self._lru_lock = threading.Lock()
+        self._stats = {"doc_hits": 0, "doc_misses": 0, "query_lru_hits": 0, "query_store_hits": 0, "query_misses": 0}
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [text_hash(t) for t in texts]
+        cached = self.store.get_many(self.model_name, "doc", hashes)
+
+        # Embed each distinct missing text once, even if it repeats within the batch
+        missing: Dict[bytes, str] = {}
+        for key, text in zip(hashes, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+        if missing:
+            vectors = self.base.embed_documents(list(missing.values()))
+            fresh = {key: np.asarray(vec, dtype=np.float32) for key, vec in zip(missing.keys(), vectors)}
+            self.store.put_many(self.model_name, "doc", fresh)
+            cached.update(fresh)
+
+        self._stats["doc_hits"] += len(texts) - len(missing)
+        self._stats["doc_misses"] += len(missing)
+        return [cached[key].tolist() for key in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = text_hash(text)
+        with self._lru_lock:
+            if key in self._query_lru:
+                self._query_lru.move_to_end(key)
+                self._stats["query_lru_hits"] += 1
+                return self._query_lru[key]
+
+        stored = self.store.get_many(self.model_name, "query", [key])
+        if key in stored:
+            vector = stored[key].tolist()
+            self._stats["query_store_hits"] += 1
+        else:
+            vector = list(self.base.embed_query(text))
+            self.store.put_many(self.model_name, "query", {key: np.asarray(vector, dtype=np.float32)})
+            self._stats["query_misses"] += 1
+
+        with self._lru_lock:
+            self._query_lru[key] = vector
+            self._query_lru.move_to_end(key)
+            while len(self._query_lru) > self.query_lru_size:
+                self._query_lru.popitem(last=False)
+        return vector
+
+    def stats(self) -> Dict[str, Any]:
+        docs_seen = self._stats["doc_hits"] + self._stats["doc_misses"]
+        queries_seen = self._stats["query_lru_hits"] + self._stats["query_store_hits"] + self._stats["query_misses"]
+        return {
+            "model": self.model_name,
+            "path": self.store.path,
+            "stored_vectors": self.store.count(self.model_name),
+            "query_lru_entries": len(self._query_lru),
+            **self._stats,
+            "doc_hit_rate": round(self._stats["doc_hits"] / docs_seen, 3) if docs_seen else 0.0,
+            "query_hit_rate": round((queries_seen - self._stats["query_misses"]) / queries_seen, 3) if queries_seen else 0.0,
+        }
@@ -0,0 +1,105 @@
+"""executors.py
+Shared thread pools for running blocking agent calls from async code.
+
+FastAPI routes and orchestrator executors are ``async def`` but most agent methods
+block (yfinance, requests, Whisper, sentence-transformers, DistilBART). Calling them
+directly stalls the event loop, so they are offloaded to one of two pools:
+
+- ``io``  : network-bound work (market data, scraping, Mistral API calls)
+- ``cpu`` : model inference (embeddings, Whisper transcription, local summariser)
+
+Pool sizes can be tuned with ``AGENT_IO_POOL_SIZE`` and ``AGENT_CPU_POOL_SIZE``.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+DEFAULT_IO_POOL_SIZE = int(os.getenv("AGENT_IO_POOL_SIZE", "32"))
+DEFAULT_CPU_POOL_SIZE = int(os.getenv("AGENT_CPU_POOL_SIZE", str(max(1, (os.cpu_count() or 2) - 1))))
+
+
+class AgentExecutorPool:
+    """A named ThreadPoolExecutor that keeps saturation counters."""
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"agent-{name}")
+        self._lock = threading.Lock()
+        self._active = 0
+        self._queued = 0
+        self._completed = 0
+        self._failed = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _wrap(self, func: Callable[..., Any], submitted_at: float) -> Callable[[], Any]:
+        def runner():
+            waited = time.perf_counter() - submitted_at
+            with self._lock:
+                self._queued -= 1
+                self._active += 1
+                self._total_wait += waited
+                self._max_wait = max(self._max_wait, waited)
+            try:
+                result = func()
+            except Exception:
+                with self._lock:
+                    self._failed += 1
+                raise
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+            return result
+        return runner
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run ``func(*args, **kwargs)`` in this pool and await the result."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._queued += 1
+        call = functools.partial(func, *args, **kwargs)
+        return await loop.run_in_executor(self._executor, self._wrap(call, time.perf_counter()))
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "active": self._active,
+                "queued": self._queued,
+                "completed": self._completed,
+                "failed": self._failed,
+                "utilization": round(self._active / self.max_workers, 3) if self.max_workers else 0.0,
+                "saturated": self._active >= self.max_workers and self._queued > 0,
+                "avg_queue_wait_ms": round(1000 * self._total_wait / self._completed, 3) if self._completed else 0.0,
+                "max_queue_wait_ms": round(1000 * self._max_wait, 3),
+            }
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+
+io_pool = AgentExecutorPool("io", DEFAULT_IO_POOL_SIZE)
+cpu_pool = AgentExecutorPool("cpu", DEFAULT_CPU_POOL_SIZE)
+
+
+async def run_io_bound(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Offload a network-bound blocking call (yfinance, requests, Mistral) to the I/O pool."""
+    return await io_pool.run(func, *args, **kwargs)
+
+
+async def run_cpu_bound(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Offload a model-inference call (embeddings, Whisper, DistilBART) to the CPU pool."""
+    return await cpu_pool.run(func, *args, **kwargs)
+
+
+def get_executor_metrics() -> Dict[str, Dict[str, Any]]:
+    """Return saturation metrics for both pools."""
+    return {"io": io_pool.metrics(), "cpu": cpu_pool.metrics()}
@@ -0,0 +1,180 @@
+"""faiss_wal.py
+Append-only persistence for RetrieverAgent's FAISS store.
+
+Layout under the retriever's ``index_path``::
+
+    CURRENT                      name of the live snapshot (replaced atomically)
+    snapshots/snap-000012/       index.faiss, index.pkl, documents.pkl (+ sidecars such as fingerprints.pkl)
+    wal/seg-000013.log           batches added after snapshot 12
+    wal/seg-000014.log
+
+Every ``add_texts`` batch is appended to the open WAL segment as one
+length-prefixed pickle frame (ids, texts, metadatas, float32 embeddings), so the
+cost of a save no longer depends on corpus size. Compaction rotates the segment,
+writes a fresh snapshot directory, flips ``CURRENT`` and deletes folded segments.
+A torn trailing frame left by a crash is ignored on replay.
+"""
+from __future__ import annotations
+
+import os
+import pickle
+import re
+import shutil
+import struct
+import tempfile
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+
+_FRAME_HEADER = struct.Struct("<Q")
+_SEGMENT_RE = re.compile(r"^seg-(\d+)\.log$")
+_SNAPSHOT_RE = re.compile(r"^snap-(\d+)$")
+
+
+def atomic_write_bytes(path: str, data: bytes):
+    """Write ``data`` to ``path`` via a temp file in the same directory plus rename."""
+    directory = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class FaissWriteAheadLog:
+    """Segmented write-ahead log plus snapshot bookkeeping for one index directory."""
+
+    def __init__(self, index_path: str):
+        self.index_path = index_path
+        self.wal_dir = os.path.join(index_path, "wal")
+        self.snapshots_dir = os.path.join(index_path, "snapshots")
+        self.current_file = os.path.join(index_path, "CURRENT")
+        os.makedirs(self.wal_dir, exist_ok=True)
+        os.makedirs(self.snapshots_dir, exist_ok=True)
+        self._segment_file = None
+        self.segment_seq = max([self.snapshot_seq()] + self._segment_seqs()) + 1
+        self.bytes_since_snapshot = sum(os.path.getsize(self._segment_path(seq)) for seq in self.pending_segments())
+
+    # ------------------------------------------------------------------
+    # Snapshots
+    # ------------------------------------------------------------------
+    def current_snapshot_dir(self) -> Optional[str]:
+        if not os.path.exists(self.current_file):
+            return None
+        with open(self.current_file, "r") as f:
+            name = f.read().strip()
+        path = os.path.join(self.snapshots_dir, name)
+        return path if name and os.path.isdir(path) else None
+
+    def snapshot_seq(self) -> int:
+        snapshot_dir = self.current_snapshot_dir()
+        if not snapshot_dir:
+            return 0
+        return int(_SNAPSHOT_RE.match(os.path.basename(snapshot_dir)).group(1))
+
+    def write_snapshot(self, seq: int, index_bytes: bytes, docstore_bytes: bytes, documents_bytes: bytes,
+                       extra_files: Optional[Dict[str, bytes]] = None) -> str:
+        """Write a complete snapshot directory for WAL position ``seq`` and make it current.
+
+        ``extra_files`` (filename -> bytes) are written into the same directory before the flip.
+        """
+        name = f"snap-{seq:06d}"
+        tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=self.snapshots_dir)
+        files = {"index.faiss": index_bytes, "index.pkl": docstore_bytes, "documents.pkl": documents_bytes}
+        files.update(extra_files or {})
+        try:
+            for filename, payload in files.items():
+                with open(os.path.join(tmp_dir, filename), "wb") as f:
+                    f.write(payload)
+                    f.flush()
+                    os.fsync(f.fileno())
+            final_dir = os.path.join(self.snapshots_dir, name)
+            if os.path.exists(final_dir):
+                shutil.rmtree(final_dir)
+            os.replace(tmp_dir, final_dir)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        atomic_write_bytes(self.current_file, name.encode())
+        self._prune(seq)
+        return final_dir
+
+    def _prune(self, snapshot_seq: int):
+        """Drop segments folded into the snapshot and any older snapshots."""
+        for seq in self._segment_seqs():
+            if seq <= snapshot_seq:
+                os.remove(self._segment_path(seq))
+        for name in os.listdir(self.snapshots_dir):
+            match = _SNAPSHOT_RE.match(name)
+            if (match and int(match.group(1)) < snapshot_seq) or name.startswith(".tmp-"):
+                shutil.rmtree(os.path.join(self.snapshots_dir, name), ignore_errors=True)
+        self.bytes_since_snapshot = sum(os.path.getsize(self._segment_path(seq)) for seq in self.pending_segments())
+
+    # ------------------------------------------------------------------
+    # Segments
+    # ------------------------------------------------------------------
+    def _segment_path(self, seq: int) -> str:
+        return os.path.join(self.wal_dir, f"seg-{seq:06d}.log")
+
+    def _segment_seqs(self) -> List[int]:
+        seqs = []
+        for name in os.listdir(self.wal_dir):
+            match = _SEGMENT_RE.match(name)
+            if match:
+                seqs.append(int(match.group(1)))
+        return sorted(seqs)
+
+    def pending_segments(self) -> List[int]:
+        """Segments written after the current snapshot, in replay order."""
+        snapshot_seq = self.snapshot_seq()
+        return [seq for seq in self._segment_seqs() if seq > snapshot_seq]
+
+    def append(self, ids: List[str], texts: List[str], metadatas: List[Dict[str, Any]], embeddings: np.ndarray):
+        """Durably append one batch to the open segment."""
+        if self._segment_file is None:
+            self._segment_file = open(self._segment_path(self.segment_seq), "ab")
+        payload = pickle.dumps({
+            "ids": ids,
+            "texts": texts,
+            "metadatas": metadatas,
+            "embeddings": np.asarray(embeddings, dtype=np.float32),
+        }, protocol=pickle.HIGHEST_PROTOCOL)
+        self._segment_file.write(_FRAME_HEADER.pack(len(payload)) + payload)
+        self._segment_file.flush()
+        os.fsync(self._segment_file.fileno())
+        self.bytes_since_snapshot += _FRAME_HEADER.size + len(payload)
+
+    def rotate(self) -> int:
+        """Close the open segment and start a new one; returns the sequence that was closed."""
+        if self._segment_file is not None:
+            self._segment_file.close()
+            self._segment_file = None
+        closed_seq = self.segment_seq
+        self.segment_seq += 1
+        return closed_seq
+
+    def replay(self) -> Iterator[Dict[str, Any]]:
+        """Yield every intact batch written after the current snapshot."""
+        for seq in self.pending_segments():
+            with open(self._segment_path(seq), "rb") as f:
+                while True:
+                    header = f.read(_FRAME_HEADER.size)
+                    if len(header) < _FRAME_HEADER.size:
+                        break
+                    (length,) = _FRAME_HEADER.unpack(header)
+                    payload = f.read(length)
+                    if len(payload) < length:
+                        print(f"[RetrieverAgent] Ignoring torn WAL frame at end of {self._segment_path(seq)}")
+                        break
+                    yield pickle.loads(payload)
+
+    def close(self):
+        if self._segment_file is not None:
+            self._segment_file.close()
+            self._segment_file = None
@@ -0,0 +1,179 @@
+"""history_store.py
+On-disk columnar OHLCV store used by MarketDataAgent.
+
+Each symbol gets its own directory holding one ``.npy`` array per column plus a
+``timestamps.npy`` (UTC nanoseconds) and a small ``meta.json``. Arrays are opened
+with ``mmap_mode="r"`` so reads touch only the pages they need, and writes go to a
+temporary directory that is swapped in with ``os.replace`` so a symbol is never
+read half-written. The swap takes two renames, so readers hold the symbol's lock
+while they load ``meta.json`` and map the columns; the mapped arrays stay valid after
+a later swap removes the files they came from.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import shutil
+import tempfile
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_HISTORY_STORE_PATH = os.getenv("MARKET_HISTORY_STORE", "market_history_store")
+
+# yfinance periods ordered by how much history they cover
+PERIOD_ORDER = ["1d", "5d", "1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "ytd", "max"]
+
+# Characters yfinance symbols use (BRK-B, ^GSPC, EURUSD=X, RDS.A); "/" is stored as "_"
+_SYMBOL_RE = re.compile(r"^[A-Z0-9.^=_-]+$")
+
+
+def period_covers(stored: Optional[str], requested: str) -> bool:
+    """True when history fetched for ``stored`` also contains everything ``requested`` needs."""
+    if stored is None:
+        return False
+    if stored == "max":
+        return True
+    if requested == "ytd":
+        return stored in ("1y", "2y", "5y", "10y")
+    if stored == "ytd" or requested not in PERIOD_ORDER or stored not in PERIOD_ORDER:
+        return stored == requested
+    return PERIOD_ORDER.index(stored) >= PERIOD_ORDER.index(requested)
+
+
+def slice_period(hist: pd.DataFrame, period: str) -> pd.DataFrame:
+    """Trim a history frame to the window yfinance would return for ``period``."""
+    if hist.empty or period == "max":
+        return hist
+    if period.endswith("d") and period[:-1].isdigit():
+        return hist.iloc[-int(period[:-1]):]  # "Nd" means the last N trading sessions
+    last = hist.index[-1]
+    if period == "ytd":
+        start = last.replace(month=1, day=1, hour=0, minute=0, second=0, microsecond=0, nanosecond=0)
+    elif period.endswith("mo") and period[:-2].isdigit():
+        start = last - pd.DateOffset(months=int(period[:-2]))
+    elif period.endswith("y") and period[:-1].isdigit():
+        start = last - pd.DateOffset(years=int(period[:-1]))
+    else:
+        return hist
+    return hist[hist.index > start]
+
+
+class OHLCVHistoryStore:
+    """Memory-mapped per-symbol OHLCV history with append-only incremental updates."""
+
+    def __init__(self, root: str = DEFAULT_HISTORY_STORE_PATH):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+        # Reentrant: append() reads and writes under one hold
+        self._locks: Dict[str, threading.RLock] = {}
+        self._locks_guard = threading.Lock()
+
+    def _symbol_dir(self, symbol: str) -> str:
+        """Directory for ``symbol``; raises ValueError for names that could leave ``root``."""
+        name = symbol.strip().upper().replace("/", "_")
+        if not _SYMBOL_RE.match(name) or set(name) == {"."}:
+            raise ValueError(f"Invalid ticker symbol: {symbol!r}")
+        return os.path.join(self.root, name)
+
+    def _lock_for(self, symbol: str) -> threading.RLock:
+        with self._locks_guard:
+            return self._locks.setdefault(symbol.upper(), threading.RLock())
+
+    def symbols(self) -> List[str]:
+        return sorted(name for name in os.listdir(self.root)
+                      if not name.startswith(".") and os.path.exists(os.path.join(self.root, name, "meta.json")))
+
+    def get_meta(self, symbol: str) -> Optional[Dict]:
+        meta_path = os.path.join(self._symbol_dir(symbol), "meta.json")
+        with self._lock_for(symbol):
+            if not os.path.exists(meta_path):
+                return None
+            with open(meta_path, "r") as f:
+                return json.load(f)
+
+    def last_timestamp(self, symbol: str) -> Optional[pd.Timestamp]:
+        meta = self.get_meta(symbol)
+        if not meta or meta.get("last_timestamp") is None:
+            return None
+        return pd.Timestamp(meta["last_timestamp"], unit="ns", tz="UTC").tz_convert(meta.get("tz") or "UTC")
+
+    def read(self, symbol: str, period: Optional[str] = None) -> pd.DataFrame:
+        """Load stored bars for a symbol (optionally trimmed to a yfinance-style period)."""
+        symbol_dir = self._symbol_dir(symbol)
+        # Meta and columns must come from the same write; the lock keeps a swap out in between
+        with self._lock_for(symbol):
+            meta = self.get_meta(symbol)
+            if not meta:
+                return pd.DataFrame()
+            timestamps = np.load(os.path.join(symbol_dir, "timestamps.npy"), mmap_mode="r")
+            columns = {column: np.load(os.path.join(symbol_dir, f"{column}.npy"), mmap_mode="r")
+                       for column in meta["columns"]}
+        index = pd.DatetimeIndex(pd.to_datetime(np.asarray(timestamps), unit="ns", utc=True), name="Date")
+        if meta.get("tz"):
+            index = index.tz_convert(meta["tz"])
+        hist = pd.DataFrame(columns, index=index)
+        return slice_period(hist, period) if period else hist
+
+    def write(self, symbol: str, hist: pd.DataFrame, covered_period: Optional[str] = None):
+        """Atomically replace the stored history for a symbol."""
+        with self._lock_for(symbol):
+            self._write_locked(symbol, hist, covered_period)
+
+    def append(self, symbol: str, new_bars: pd.DataFrame) -> pd.DataFrame:
+        """Merge bars newer than (or equal to) the last stored timestamp and persist the result."""
+        with self._lock_for(symbol):
+            meta = self.get_meta(symbol)
+            existing = self.read(symbol)
+            if existing.empty:
+                merged = new_bars
+            elif new_bars is None or new_bars.empty:
+                return existing
+            else:
+                new_bars = new_bars.copy()
+                new_bars.index = new_bars.index.tz_convert(existing.index.tz) if new_bars.index.tz is not None else new_bars.index
+                # Re-fetched bars (e.g. today's still-forming bar) replace the stored copy
+                merged = pd.concat([existing[~existing.index.isin(new_bars.index)], new_bars]).sort_index()
+            self._write_locked(symbol, merged, meta.get("covered_period") if meta else None)
+            return merged
+
+    def _write_locked(self, symbol: str, hist: pd.DataFrame, covered_period: Optional[str]):
+        hist = hist[~hist.index.duplicated(keep="last")].sort_index()
+        numeric_columns = [c for c in hist.columns if pd.api.types.is_numeric_dtype(hist[c])]
+        index = pd.DatetimeIndex(hist.index)
+        tz = str(index.tz) if index.tz is not None else None
+        utc_index = (index.tz_convert("UTC") if tz else index).as_unit("ns")
+
+        symbol_dir = self._symbol_dir(symbol)
+        tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=self.root)
+        try:
+            np.save(os.path.join(tmp_dir, "timestamps.npy"), utc_index.asi8)
+            for column in numeric_columns:
+                np.save(os.path.join(tmp_dir, f"{column}.npy"), hist[column].to_numpy(dtype=np.float64))
+            meta = {
+                "symbol": symbol.upper(),
+                "columns": numeric_columns,
+                "tz": tz,
+                "rows": len(hist),
+                "first_timestamp": int(utc_index.asi8[0]) if len(hist) else None,
+                "last_timestamp": int(utc_index.asi8[-1]) if len(hist) else None,
+                "covered_period": covered_period,
+            }
+            with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+                json.dump(meta, f)
+
+            # Swap the fully written directory into place
+            old_dir = None
+            if os.path.exists(symbol_dir):
+                old_dir = tempfile.mkdtemp(prefix=".old-", dir=self.root)
+                os.rmdir(old_dir)
+                os.replace(symbol_dir, old_dir)
+            os.replace(tmp_dir, symbol_dir)
+            if old_dir:
+                shutil.rmtree(old_dir, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
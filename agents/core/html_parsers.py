@@ -0,0 +1,224 @@
+"""html_parsers.py
+Interchangeable HTML parser backends for ScrapingAgent's extraction methods.
+
+Every backend parses a page once and answers CSS selectors against it, so headline,
+paragraph and custom selector extraction share one code path:
+
+- ``selectolax``: lexbor (or modest) C parser with native CSS selectors, fastest
+- ``lxml``: libxml2 parser, selectors compiled to XPath by ``cssselect`` and cached
+- ``bs4``: BeautifulSoup with ``html.parser`` and soupsieve, pure Python, always available
+
+``get_parser_backend()`` picks ``SCRAPER_HTML_PARSER`` if set, otherwise the fastest
+installed one. Text is extracted the way ``Tag.get_text(strip=True)`` does it (each
+text node stripped, then concatenated), so switching backends does not change results
+beyond parser differences on malformed markup.
+
+A selector may end in ``@attr`` to return that attribute instead of the text, e.g.
+``"a.headline@href"``.
+"""
+from __future__ import annotations
+
+import os
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_HTML_PARSER = os.getenv("SCRAPER_HTML_PARSER", "auto")
+# Fastest first; "auto" takes the first one that imports
+PARSER_PREFERENCE = ("selectolax", "lxml", "bs4")
+
+_TAG_RE = re.compile(r"^[A-Za-z][A-Za-z0-9-]*$")
+
+
+def split_selector(selector: str) -> Tuple[str, Optional[str]]:
+    """``"a.title@href"`` -> ``("a.title", "href")``; plain selectors return ``(selector, None)``."""
+    css, sep, attr = selector.rpartition("@")
+    if sep and css and attr and all(c.isalnum() or c in "-_:" for c in attr):
+        return css.strip(), attr
+    return selector.strip(), None
+
+
+def headline_selector(tag: str, css_class: Optional[str] = None) -> str:
+    """
+    CSS equivalent of ``find_all(tag, class_=css_class)``: ``"h3", "a b"`` ->
+    ``'h3[class~="a"][class~="b"]'``.
+
+    Classes go into quoted attribute selectors, so names that are not valid CSS
+    identifiers (``Fz(14px)``, ``md:text-lg``) still match. Raises ValueError when
+    ``tag`` is not a plain element name.
+    """
+    if not _TAG_RE.match(tag or ""):
+        raise ValueError(f"Invalid HTML tag name: {tag!r}")
+    quoted = (name.replace("\\", "\\\\").replace('"', '\\"') for name in (css_class or "").split())
+    return tag + "".join(f'[class~="{name}"]' for name in quoted)
+
+
+class HtmlParserBackend:
+    """Parse once, then run CSS selectors; subclasses implement ``parse``, ``_select`` and ``_text``."""
+
+    name = "base"
+
+    def parse(self, html: str) -> Any:
+        raise NotImplementedError
+
+    def _select(self, document: Any, css: str) -> List[Any]:
+        raise NotImplementedError
+
+    def _text(self, node: Any) -> str:
+        raise NotImplementedError
+
+    def _attr(self, node: Any, attr: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def select(self, document: Any, selector: str, keep_empty: bool = False) -> List[str]:
+        """
+        Stripped texts (or attribute values) of every node matching ``selector``.
+
+        Empty values are dropped unless ``keep_empty``, which keeps one ``""`` per
+        matched node, as ``[n.get_text(strip=True) for n in soup.find_all(...)]`` did.
+        """
+        if document is None:
+            return []
+        css, attr = split_selector(selector)
+        nodes = self._select(document, css)
+        values = [self._attr(node, attr) for node in nodes] if attr else [self._text(node) for node in nodes]
+        values = [(value or "").strip() for value in values]
+        return values if keep_empty else [value for value in values if value]
+
+    def select_all(self, html: str, selectors: Dict[str, str]) -> Dict[str, List[str]]:
+        """Parse ``html`` once and run every named selector against it."""
+        document = self.parse(html)
+        return {name: self.select(document, selector) for name, selector in selectors.items()}
+
+    def select_text(self, html: str, selector: str, keep_empty: bool = False) -> List[str]:
+        return self.select(self.parse(html), selector, keep_empty)
+
+
+class BeautifulSoupBackend(HtmlParserBackend):
+    name = "bs4"
+
+    def __init__(self, features: str = "html.parser"):
+        from bs4 import BeautifulSoup
+        self._soup = BeautifulSoup
+        self.features = features
+
+    def parse(self, html: str) -> Any:
+        return self._soup(html, self.features)
+
+    def _select(self, document: Any, css: str) -> List[Any]:
+        return document.select(css)
+
+    def _text(self, node: Any) -> str:
+        return node.get_text(strip=True)
+
+    def _attr(self, node: Any, attr: str) -> Optional[str]:
+        value = node.get(attr)
+        return " ".join(value) if isinstance(value, list) else value
+
+
+class LxmlBackend(HtmlParserBackend):
+    name = "lxml"
+
+    def __init__(self):
+        import lxml.html
+        from lxml.cssselect import CSSSelector
+        self._fromstring = lxml.html.fromstring
+        self._selector_class = CSSSelector
+        self._compiled: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def parse(self, html: str) -> Any:
+        if not html.strip():
+            return None  # lxml raises on an empty document
+        # lxml rejects str input that carries an XML encoding declaration
+        return self._fromstring(html.encode("utf-8") if html.lstrip().startswith("<?xml") else html)
+
+    def _compile(self, css: str):
+        compiled = self._compiled.get(css)
+        if compiled is None:
+            compiled = self._selector_class(css, translator="html")
+            with self._lock:
+                self._compiled[css] = compiled
+        return compiled
+
+    def _select(self, document: Any, css: str) -> List[Any]:
+        return self._compile(css)(document)
+
+    def _text(self, node: Any) -> str:
+        return "".join(part.strip() for part in node.itertext())
+
+    def _attr(self, node: Any, attr: str) -> Optional[str]:
+        return node.get(attr)
+
+
+class SelectolaxBackend(HtmlParserBackend):
+    name = "selectolax"
+
+    def __init__(self):
+        try:
+            from selectolax.lexbor import LexborHTMLParser as parser_class
+            self.engine = "lexbor"
+        except ImportError:
+            from selectolax.parser import HTMLParser as parser_class
+            self.engine = "modest"
+        self._parser_class = parser_class
+
+    def parse(self, html: str) -> Any:
+        return self._parser_class(html)
+
+    def _select(self, document: Any, css: str) -> List[Any]:
+        return document.css(css)
+
+    def _text(self, node: Any) -> str:
+        return node.text(deep=True, separator="", strip=True)
+
+    def _attr(self, node: Any, attr: str) -> Optional[str]:
+        return node.attributes.get(attr)
+
+
+PARSER_BACKENDS = {
+    "selectolax": SelectolaxBackend,
+    "lxml": LxmlBackend,
+    "bs4": BeautifulSoupBackend,
+}
+
+_backends: Dict[str, HtmlParserBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def available_parser_backends() -> List[str]:
+    """Names of the backends whose libraries import in this environment."""
+    names = []
+    for name in PARSER_PREFERENCE:
+        try:
+            get_parser_backend(name)
+            names.append(name)
+        except ImportError:
+            continue
+    return names
+
+
+def get_parser_backend(name: Optional[str] = None) -> HtmlParserBackend:
+    """
+    Shared backend instance by name (``"selectolax"``, ``"lxml"``, ``"bs4"`` or ``"auto"``).
+
+    Raises ImportError when a named backend's library is missing, ValueError for an
+    unknown name.
+    """
+    name = (name or DEFAULT_HTML_PARSER).lower()
+    if name == "auto":
+        for candidate in PARSER_PREFERENCE:
+            try:
+                return get_parser_backend(candidate)
+            except ImportError:
+                continue
+        raise ImportError("No HTML parser available; install beautifulsoup4, lxml or selectolax")
+    if name not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown HTML parser '{name}'; expected one of {', '.join(PARSER_BACKENDS)} or 'auto'")
+    backend = _backends.get(name)
+    if backend is None:
+        with _backends_lock:
+            backend = _backends.get(name)
+            if backend is None:
+                backend = _backends[name] = PARSER_BACKENDS[name]()
+    return backend
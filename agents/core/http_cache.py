@@ -0,0 +1,212 @@
+"""http_cache.py
+Persistent HTTP cache for pages fetched by ScrapingAgent.
+
+Bodies are stored zlib-compressed in SQLite keyed by URL, together with the response's
+``ETag`` / ``Last-Modified`` validators and a freshness deadline taken from
+``Cache-Control: max-age`` (or ``Expires``). A lookup then ends in one of three ways:
+
+- fresh entry: the body is served from disk without touching the network
+- stale entry with validators: the fetch is sent with ``If-None-Match`` /
+  ``If-Modified-Since`` and a ``304 Not Modified`` reuses the stored body
+- no entry: a normal fetch, stored afterwards unless the response says ``no-store``
+"""
+from __future__ import annotations
+
+import email.utils
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Mapping, Optional
+
+DEFAULT_HTTP_CACHE_PATH = os.getenv("SCRAPER_HTTP_CACHE_PATH", os.path.join("scraper_cache", "http_cache.sqlite"))
+DEFAULT_HTTP_CACHE_ENABLED = os.getenv("SCRAPER_HTTP_CACHE_ENABLED", "true").lower() == "true"
+DEFAULT_HTTP_CACHE_MAX_ENTRIES = int(os.getenv("SCRAPER_HTTP_CACHE_MAX_ENTRIES", "20000"))
+COMPRESSION_LEVEL = 6
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[str]]:
+    """``"public, max-age=60"`` -> ``{"public": None, "max-age": "60"}``."""
+    directives: Dict[str, Optional[str]] = {}
+    for part in (value or "").split(","):
+        name, _, arg = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = arg.strip().strip('"') or None
+    return directives
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return email.utils.parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def freshness_lifetime(headers: Mapping[str, str]) -> float:
+    """Seconds a response may be served without revalidation (0 when it must always revalidate)."""
+    directives = parse_cache_control(headers.get("Cache-Control"))
+    if "no-cache" in directives:
+        return 0.0
+    for name in ("s-maxage", "max-age"):
+        try:
+            return max(0.0, float(directives[name]))
+        except (KeyError, TypeError, ValueError):
+            continue
+    expires = _http_date(headers.get("Expires"))
+    if expires is not None:
+        return max(0.0, expires - (_http_date(headers.get("Date")) or time.time()))
+    return 0.0
+
+
+class CachedPage:
+    """One stored response: decoded body plus what is needed to revalidate it."""
+
+    __slots__ = ("url", "body", "etag", "last_modified", "stored_at", "expires_at")
+
+    def __init__(self, url: str, body: str, etag: Optional[str], last_modified: Optional[str],
+                 stored_at: float, expires_at: float):
+        self.url = url
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.stored_at = stored_at
+        self.expires_at = expires_at
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        return (now or time.time()) < self.expires_at
+
+    def conditional_headers(self) -> Dict[str, str]:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class HttpPageCache:
+    """SQLite table of compressed page bodies with HTTP validators and freshness deadlines."""
+
+    def __init__(self, path: str = DEFAULT_HTTP_CACHE_PATH, max_entries: int = DEFAULT_HTTP_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " url TEXT PRIMARY KEY, body BLOB NOT NULL, raw_size INTEGER NOT NULL,"
+            " etag TEXT, last_modified TEXT, stored_at REAL NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS pages_stored_at ON pages (stored_at)")
+        self._conn.commit()
+        self._stats = {"fresh_hits": 0, "revalidated": 0, "misses": 0, "stored": 0, "not_stored": 0, "evictions": 0}
+
+    def _count(self, name: str, n: int = 1):
+        with self._lock:
+            self._stats[name] += n
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """The stored page for ``url`` (fresh or stale), or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, stored_at, expires_at FROM pages WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None:
+            return None
+        body, etag, last_modified, stored_at, expires_at = row
+        return CachedPage(url, zlib.decompress(body).decode("utf-8"), etag, last_modified, stored_at, expires_at)
+
+    def lookup(self, url: str) -> Optional[CachedPage]:
+        """``get`` plus hit/miss accounting: a fresh page counts as a hit, anything else as a miss."""
+        page = self.get(url)
+        self._count("fresh_hits" if page is not None and page.is_fresh() else "misses")
+        return page
+
+    def store(self, url: str, headers: Mapping[str, str], body: str) -> bool:
+        """Store a 200 response unless it forbids storing or could never be reused."""
+        directives = parse_cache_control(headers.get("Cache-Control"))
+        etag, last_modified = headers.get("ETag"), headers.get("Last-Modified")
+        lifetime = freshness_lifetime(headers)
+        if "no-store" in directives or (lifetime <= 0 and not etag and not last_modified):
+            self._count("not_stored")
+            return False
+        now = time.time()
+        raw = body.encode("utf-8")
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, body, raw_size, etag, last_modified, stored_at, expires_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (url, zlib.compress(raw, COMPRESSION_LEVEL), len(raw), etag, last_modified, now, now + lifetime),
+            )
+            self._stats["stored"] += 1
+            if self._stats["stored"] % 100 == 0:
+                self._evict_locked()
+            self._conn.commit()
+        return True
+
+    def revalidated(self, url: str, headers: Mapping[str, str]) -> Optional[CachedPage]:
+        """Record a ``304 Not Modified`` for ``url``: extend freshness and return the stored page."""
+        page = self.get(url)
+        if page is None:
+            return None
+        now = time.time()
+        page.etag = headers.get("ETag") or page.etag
+        page.last_modified = headers.get("Last-Modified") or page.last_modified
+        page.expires_at = now + freshness_lifetime(headers)
+        with self._lock:
+            self._conn.execute(
+                "UPDATE pages SET etag = ?, last_modified = ?, stored_at = ?, expires_at = ? WHERE url = ?",
+                (page.etag, page.last_modified, now, page.expires_at, url),
+            )
+            self._conn.commit()
+            self._stats["revalidated"] += 1
+        return page
+
+    def _evict_locked(self):
+        """Drop the least recently stored or revalidated pages beyond ``max_entries``."""
+        excess = self._conn.execute("SELECT COUNT(*) FROM pages").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                "DELETE FROM pages WHERE url IN (SELECT url FROM pages ORDER BY stored_at LIMIT ?)", (excess,)
+            )
+            self._stats["evictions"] += excess
+
+    def delete(self, url: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM pages")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, raw_bytes, stored_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(raw_size), 0), COALESCE(SUM(LENGTH(body)), 0) FROM pages"
+            ).fetchone()
+            stats = dict(self._stats)
+        lookups = stats["fresh_hits"] + stats["misses"]
+        return {
+            "path": self.path,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "raw_bytes": raw_bytes,
+            "stored_bytes": stored_bytes,
+            "compression_ratio": round(raw_bytes / stored_bytes, 2) if stored_bytes else 0.0,
+            **stats,
+            "fresh_hit_rate": round(stats["fresh_hits"] / lookups, 4) if lookups else 0.0,
+        }
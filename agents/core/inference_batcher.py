@@ -0,0 +1,125 @@
+"""inference_batcher.py
+Micro-batching queue in front of a local model.
+
+Concurrent callers each submit one input and get a ``Future``. A single worker thread
+takes the first pending request, keeps collecting for up to ``max_wait_ms`` or until
+``max_batch_size`` requests are waiting, then runs one batched forward pass and hands
+each caller its own output. On CPU a batch of N costs far less than N batch-size-1 calls,
+so throughput under concurrent load goes up while an idle caller waits at most
+``max_wait_ms`` extra.
+
+Requests are only batched with others that use the same generation kwargs
+(``max_length``, ``min_length``, ...), since one pipeline call takes one set of them.
+"""
+from __future__ import annotations
+
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Tuple
+
+DEFAULT_MAX_BATCH_SIZE = 8
+DEFAULT_MAX_WAIT_MS = 10.0
+
+
+class LocalInferenceBatcher:
+    """Collects single-item requests into batched ``run_batch(inputs, kwargs)`` calls."""
+
+    def __init__(self, run_batch: Callable[[List[Any], Dict[str, Any]], List[Any]],
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE, max_wait_ms: float = DEFAULT_MAX_WAIT_MS,
+                 name: str = "local-inference"):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.name = name
+        self._queue: "queue.Queue[Tuple[Any, Dict[str, Any], Future, float]]" = queue.Queue()
+        self._worker: threading.Thread = None  # type: ignore[assignment]
+        self._worker_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._batches = 0
+        self._items = 0
+        self._failed_batches = 0
+        self._max_batch = 0
+        self._total_wait = 0.0
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive():
+            with self._worker_lock:
+                if self._worker is None or not self._worker.is_alive():
+                    self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+                    self._worker.start()
+
+    def submit(self, item: Any, **kwargs) -> Future:
+        """Queue one input; the returned Future resolves to its output."""
+        future: Future = Future()
+        self._queue.put((item, kwargs, future, time.perf_counter()))
+        self._ensure_worker()
+        return future
+
+    def __call__(self, item: Any, **kwargs) -> Any:
+        """Blocking submit for threads."""
+        return self.submit(item, **kwargs).result()
+
+    async def submit_async(self, item: Any, **kwargs) -> Any:
+        """Awaitable submit for coroutines; the event loop is not blocked while waiting."""
+        return await asyncio.wrap_future(self.submit(item, **kwargs))
+
+    def _collect(self) -> List[Tuple[Any, Dict[str, Any], Future, float]]:
+        pending = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(pending) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                pending.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return pending
+
+    def _run(self):
+        while True:
+            pending = self._collect()
+            groups: Dict[tuple, list] = {}
+            for request in pending:
+                key = tuple(sorted(request[1].items()))
+                groups.setdefault(key, []).append(request)
+            for requests in groups.values():
+                self._run_group(requests)
+
+    def _run_group(self, requests: List[Tuple[Any, Dict[str, Any], Future, float]]):
+        requests = [r for r in requests if r[2].set_running_or_notify_cancel()]
+        if not requests:
+            return
+        started = time.perf_counter()
+        with self._stats_lock:
+            self._batches += 1
+            self._items += len(requests)
+            self._max_batch = max(self._max_batch, len(requests))
+            self._total_wait += sum(started - submitted for _, _, _, submitted in requests)
+        try:
+            outputs = self.run_batch([item for item, _, _, _ in requests], requests[0][1])
+            if len(outputs) != len(requests):
+                raise RuntimeError(f"Batch returned {len(outputs)} outputs for {len(requests)} inputs")
+        except BaseException as e:
+            with self._stats_lock:
+                self._failed_batches += 1
+            for _, _, future, _ in requests:
+                future.set_exception(e)
+            return
+        for (_, _, future, _), output in zip(requests, outputs):
+            future.set_result(output)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._stats_lock:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+                "queued": self._queue.qsize(),
+                "batches": self._batches,
+                "items": self._items,
+                "failed_batches": self._failed_batches,
+                "avg_batch_size": round(self._items / self._batches, 3) if self._batches else 0.0,
+                "max_observed_batch": self._max_batch,
+                "avg_queue_wait_ms": round(1000 * self._total_wait / self._items, 3) if self._items else 0.0,
+            }
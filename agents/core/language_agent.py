@@ -2,62 +2,195 @@
 Provides LanguageAgent capable of summarizing and explaining text.
 Primary path uses Mistral AI Nemo model. If no API key or internet, falls back to 
 a lightweight local transformers pipeline (DistilBART).
+
+The local pipeline is loaded on first use (or by ``warm_up()``), so processes that
+only ever talk to Mistral never pay for loading it.
+
+The ``*_async`` methods talk to Mistral through its async interface over one pooled
+``httpx.AsyncClient`` per event loop, with a concurrency cap, a per-call timeout and
+exponential backoff on HTTP 429, so the orchestrator can await them without tying up
+threads or the event loop.
+
+Single-text calls to the local model go through a ``LocalInferenceBatcher``: requests
+arriving within a few milliseconds of each other share one batched forward pass instead
+of running one after another with batch size 1.
 """
 from __future__ import annotations
 
+import asyncio
 import os
-from typing import Optional, List, Dict
+import random
+import threading
+import time
+import weakref
+from typing import AsyncIterator, Optional, List, Dict
+
+from .executors import run_cpu_bound
+from .inference_batcher import LocalInferenceBatcher
 
 # Prevent transformers from attempting to import TensorFlow / Keras (avoids Keras 3 incompat error)
 os.environ.setdefault("TRANSFORMERS_NO_TF", "1")
 os.environ.setdefault("TRANSFORMERS_NO_JAX", "1")
 
-from transformers import pipeline, Pipeline
-
 # Try importing Mistral AI client
 try:
     from mistralai import Mistral
 except ImportError:
     Mistral = None  # type: ignore
 
+try:
+    import httpx
+except ImportError:
+    httpx = None  # type: ignore
+
+
+# Local summarisation models, tried in order on first fallback
+DEFAULT_LOCAL_MODELS = ("sshleifer/distilbart-cnn-12-6", "t5-small")
+
+# Start loading the local model in a background thread at construction
+DEFAULT_WARM_UP_LOCAL_MODEL = os.getenv("LANGUAGE_AGENT_WARM_UP", "false").lower() == "true"
+# After a failed load (network while downloading weights, out of memory) try again this much later
+DEFAULT_LOCAL_MODEL_RETRY_SECONDS = float(os.getenv("LANGUAGE_AGENT_LOCAL_RETRY_SECONDS", "300"))
+
+# Async Mistral calls: in-flight cap (also the connection pool size), per-call timeout, 429 retries
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("LANGUAGE_AGENT_MAX_CONCURRENCY", "8"))
+DEFAULT_REQUEST_TIMEOUT = float(os.getenv("LANGUAGE_AGENT_TIMEOUT_SECONDS", "30"))
+DEFAULT_MAX_RETRIES = int(os.getenv("LANGUAGE_AGENT_MAX_RETRIES", "3"))
+DEFAULT_BACKOFF_BASE = 1.0
+DEFAULT_BACKOFF_MAX = 20.0
+
+# Map-reduce summarisation of long documents: chunk size per backend (characters; DistilBART
+# truncates at ~1024 tokens, Mistral Nemo takes far more), words per chunk summary, local batch size
+DEFAULT_MAP_CHUNK_CHARS = {"mistral": 12000, "local": 3000}
+DEFAULT_MAP_CHUNK_OVERLAP = 200
+DEFAULT_MAP_SUMMARY_WORDS = 80
+DEFAULT_LOCAL_BATCH_SIZE = int(os.getenv("LANGUAGE_AGENT_LOCAL_BATCH_SIZE", "8"))
+MAX_REDUCE_ROUNDS = 8  # safety net; each round must also shrink the text or reduction stops
+
+# Micro-batching of concurrent single-text local-model calls: how long to wait for company
+DEFAULT_LOCAL_BATCH_WAIT_MS = float(os.getenv("LANGUAGE_AGENT_LOCAL_BATCH_WAIT_MS", "10"))
+DEFAULT_LOCAL_BATCHING = os.getenv("LANGUAGE_AGENT_LOCAL_BATCHING", "true").lower() == "true"
+
 
 def _has_mistral_key() -> bool:
     return bool(os.getenv("MISTRAL_API_KEY"))
 
 
+def _status_code(error: BaseException) -> Optional[int]:
+    """HTTP status of a Mistral SDK / httpx error, if it carries one."""
+    code = getattr(error, "status_code", None)
+    if code is None:
+        response = getattr(error, "raw_response", None) or getattr(error, "response", None)
+        code = getattr(response, "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    response = getattr(error, "raw_response", None) or getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
 class LanguageAgent:
     """Agent to summarise and explain text blocks using Mistral AI or local model."""
 
-    def __init__(self, model_name: str = "open-mistral-nemo", api_key: str = None):
+    def __init__(self, model_name: str = "open-mistral-nemo", api_key: str = None,
+                 local_models: tuple = DEFAULT_LOCAL_MODELS, warm_up_local_model: bool = DEFAULT_WARM_UP_LOCAL_MODEL,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY, request_timeout: float = DEFAULT_REQUEST_TIMEOUT,
+                 max_retries: int = DEFAULT_MAX_RETRIES, local_batching: bool = DEFAULT_LOCAL_BATCHING,
+                 local_batch_size: int = DEFAULT_LOCAL_BATCH_SIZE, local_batch_wait_ms: float = DEFAULT_LOCAL_BATCH_WAIT_MS):
         self.model_name = model_name
         # Set the API key from parameter or environment variable
         self.api_key = api_key or os.getenv("MISTRAL_API_KEY") or "NxdIH9V8xm8eldEGZrKvC1M1ziS1jHal"
         # "NxdIH9V8xm8eldEGZrKvC1M1ziS1jHal"
+
+        # Local fallback model, loaded on first use (see local_model / warm_up)
+        self.local_models = tuple(local_models)
+        self._local_model = None
+        self._local_model_name: Optional[str] = None
+        self._local_model_lock = threading.Lock()
+        self._warm_up_thread: Optional[threading.Thread] = None
+        self.local_model_status = "not_loaded"  # not_loaded | loading | loaded | failed
+        self.local_model_error: Optional[str] = None
+        self._local_model_failed_at = 0.0
+        self._local_batcher = LocalInferenceBatcher(
+            self._run_local_batch, max_batch_size=local_batch_size, max_wait_ms=local_batch_wait_ms,
+            name="language-agent-local-batcher"
+        ) if local_batching else None
+
+        # Async Mistral access: one client (and connection pool) + semaphore per event loop
+        self.max_concurrency = max(1, max_concurrency)
+        self.request_timeout = request_timeout
+        self.max_retries = max(0, max_retries)
+        self._async_clients: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+        self._async_stats = {"calls": 0, "failures": 0, "timeouts": 0, "rate_limited": 0, "retries": 0}
+
         self.client, self.backend = self._init_client()
-        
-        # Initialize local fallback model
-        self.local_model = None
+        if warm_up_local_model:
+            self.warm_up()
 
     # ------------------------------------------------------------------
     # Initialisation helpers
     # ------------------------------------------------------------------
-    def _init_client(self):
-        """Attempt to initialise Mistral AI client; fall back to local pipeline."""
-        # Always initialize local model for fallback
-        print("[LanguageAgent] Initializing local fallback model...")
-        try:
-            self.local_model = pipeline("summarization", model="sshleifer/distilbart-cnn-12-6", framework="pt")
-            print("[LanguageAgent] Local DistilBART model loaded successfully.")
-        except Exception as e:
-            # Attempt small t5 model if distilbart fails
-            print(f"[LanguageAgent] DistilBART load failed ({e}). Trying t5-small summarizer.")
+    @property
+    def local_model(self):
+        """The local summarisation pipeline, loaded on first access (None if unavailable)."""
+        if self._local_model is None and not self._local_model_failed():
+            self._load_local_model()
+        return self._local_model
+
+    def _local_model_failed(self) -> bool:
+        """True while a failed load is within its retry backoff."""
+        return (self.local_model_status == "failed"
+                and time.monotonic() - self._local_model_failed_at < DEFAULT_LOCAL_MODEL_RETRY_SECONDS)
+
+    def _mark_local_model_failed(self, error: str):
+        self.local_model_status, self.local_model_error = "failed", error
+        self._local_model_failed_at = time.monotonic()
+
+    def _load_local_model(self, retry_failed: bool = False):
+        with self._local_model_lock:
+            if self._local_model is not None or (self._local_model_failed() and not retry_failed):
+                return self._local_model
+            self.local_model_status = "loading"
+            print("[LanguageAgent] Loading local fallback model...")
             try:
-                self.local_model = pipeline("summarization", model="t5-small", framework="pt")
-                print("[LanguageAgent] Local T5-small model loaded successfully.")
-            except Exception as e2:
-                print(f"[LanguageAgent] T5-small also failed ({e2}). No local fallback available.")
-                self.local_model = None
-        
+                from transformers import pipeline
+            except Exception as e:
+                print(f"[LanguageAgent] transformers unavailable ({e}). No local fallback available.")
+                self._mark_local_model_failed(str(e))
+                return None
+            errors = []
+            for candidate in self.local_models:
+                try:
+                    self._local_model = pipeline("summarization", model=candidate, framework="pt")
+                    self._local_model_name = candidate
+                    self.local_model_status, self.local_model_error = "loaded", None
+                    print(f"[LanguageAgent] Local model '{candidate}' loaded successfully.")
+                    return self._local_model
+                except Exception as e:
+                    print(f"[LanguageAgent] Local model '{candidate}' failed to load ({e}).")
+                    errors.append(f"{candidate}: {e}")
+            print("[LanguageAgent] No local fallback available.")
+            self._mark_local_model_failed("; ".join(errors))
+            return None
+
+    def warm_up(self, background: bool = True) -> Optional[threading.Thread]:
+        """Load the local model ahead of the first fallback, by default in a daemon thread; retries a failed load."""
+        if not background:
+            self._load_local_model(retry_failed=True)
+            return None
+        if self._warm_up_thread is None or not self._warm_up_thread.is_alive():
+            self._warm_up_thread = threading.Thread(target=self._load_local_model, kwargs={"retry_failed": True},
+                                                    name="language-agent-warm-up", daemon=True)
+            self._warm_up_thread.start()
+        return self._warm_up_thread
+
+    def _init_client(self):
+        """Attempt to initialise Mistral AI client; otherwise use the local pipeline (loaded lazily)."""
         if Mistral and self.api_key:
             try:
                 client = Mistral(api_key=self.api_key)
@@ -67,17 +200,62 @@ class LanguageAgent:
             except Exception as e:
                 print(f"[LanguageAgent] Failed to initialise Mistral AI client: {e}. Falling back to local summariser.")
 
-        # Local fallback – transformers summarisation pipeline
+        # Local fallback – transformers summarisation pipeline, loaded on first request
         print("[LanguageAgent] Using local transformers summarisation pipeline as fallback.")
-        if self.local_model is None:
-            # If we couldn't initialize any local model above, try one more time
+        return None, "local"
+
+    def _async_state(self):
+        """(Mistral client, semaphore) for the running loop; httpx async pools cannot cross loops."""
+        loop = asyncio.get_running_loop()
+        state = self._async_clients.get(loop)
+        if state is None:
+            kwargs = {"api_key": self.api_key}
+            if httpx is not None:
+                limits = httpx.Limits(max_connections=self.max_concurrency, max_keepalive_connections=self.max_concurrency)
+                kwargs["async_client"] = httpx.AsyncClient(limits=limits, timeout=self.request_timeout)
+            state = (Mistral(**kwargs), asyncio.Semaphore(self.max_concurrency))
+            self._async_clients[loop] = state
+        return state
+
+    def _backoff(self, attempt: int, error: BaseException) -> float:
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, DEFAULT_BACKOFF_MAX)
+        return min(DEFAULT_BACKOFF_BASE * (2 ** attempt), DEFAULT_BACKOFF_MAX) * (0.5 + random.random() / 2)
+
+    async def _call_mistral_async(self, prompt: str, max_tokens: int = 512) -> str:
+        """Async Mistral completion: bounded concurrency, per-call timeout, backoff on 429."""
+        client, semaphore = self._async_state()
+        self._async_stats["calls"] += 1
+        for attempt in range(self.max_retries + 1):
             try:
-                self.local_model = pipeline("summarization", model="t5-small", framework="pt")
+                async with semaphore:
+                    response = await asyncio.wait_for(
+                        client.chat.complete_async(
+                            model=self.model_name,
+                            messages=[{"role": "user", "content": prompt}],
+                            max_tokens=max_tokens,
+                            temperature=0.3
+                        ),
+                        timeout=self.request_timeout
+                    )
+                return response.choices[0].message.content.strip()
+            except asyncio.TimeoutError:
+                self._async_stats["timeouts"] += 1
+                self._async_stats["failures"] += 1
+                raise TimeoutError(f"Mistral call timed out after {self.request_timeout}s")
             except Exception as e:
-                print(f"[LanguageAgent] Final attempt to load local model failed: {e}")
-                self.local_model = None
-        
-        return self.local_model, "local"
+                if _status_code(e) == 429 and attempt < self.max_retries:
+                    # Sleep outside the semaphore so other calls keep their slots
+                    self._async_stats["rate_limited"] += 1
+                    self._async_stats["retries"] += 1
+                    await asyncio.sleep(self._backoff(attempt, e))
+                    continue
+                if _status_code(e) == 429:
+                    self._async_stats["rate_limited"] += 1
+                self._async_stats["failures"] += 1
+                print(f"[LanguageAgent] Async Mistral API call failed: {e}")
+                raise
 
     def _call_mistral(self, prompt: str, max_tokens: int = 512) -> str:
         """Make a call to Mistral AI API."""
@@ -99,6 +277,165 @@ class LanguageAgent:
             print(f"[LanguageAgent] Mistral API call failed: {e}")
             raise
 
+    # ------------------------------------------------------------------
+    # Local model access (micro-batched)
+    # ------------------------------------------------------------------
+    def _run_local_batch(self, texts: List[str], kwargs: Dict) -> List[str]:
+        """One forward pass over every text the batcher collected."""
+        if not self.local_model:
+            raise RuntimeError("No local model available.")
+        summaries = self.local_model(texts, batch_size=len(texts), do_sample=False, truncation=True, **kwargs)
+        return [summary["summary_text"].strip() for summary in summaries]
+
+    def _local_summary(self, text: str, **kwargs) -> str:
+        """Summarise one text with the local model, sharing a batch with concurrent callers."""
+        if self._local_batcher is not None:
+            return self._local_batcher(text, **kwargs)
+        return self._run_local_batch([text], kwargs)[0]
+
+    async def _local_summary_async(self, text: str, **kwargs) -> str:
+        """Async ``_local_summary``; waits on the batcher without holding a CPU-pool thread."""
+        if self._local_batcher is not None:
+            return await self._local_batcher.submit_async(text, **kwargs)
+        return await run_cpu_bound(self._local_summary, text, **kwargs)
+
+    async def _local_model_async(self):
+        """``local_model`` without loading it on the event loop."""
+        if self._local_model is not None or self._local_model_failed():
+            return self._local_model
+        return await run_cpu_bound(self._load_local_model)
+
+    def _generate_local(self, prompt: str, max_tokens: int = 512) -> str:
+        """Whole-response generation with the local summariser (it cannot follow instructions, only condense)."""
+        if not self.local_model:
+            raise RuntimeError("No Mistral client and no local model available.")
+        return self._local_summary(prompt, max_length=max_tokens, min_length=20)
+
+    async def _generate_local_async(self, prompt: str, max_tokens: int = 512) -> str:
+        if not await self._local_model_async():
+            raise RuntimeError("No Mistral client and no local model available.")
+        return await self._local_summary_async(prompt, max_length=max_tokens, min_length=20)
+
+    def generate_response(self, prompt: str, max_tokens: int = 512) -> str:
+        """Complete a free-form prompt with Mistral, or the local model when Mistral is unavailable."""
+        if self.backend == "mistral":
+            try:
+                return self._call_mistral(prompt, max_tokens=max_tokens)
+            except Exception as e:
+                print(f"[LanguageAgent] Mistral generation failed: {e}. Falling back to local model.")
+        return self._generate_local(prompt, max_tokens)
+
+    async def generate_response_async(self, prompt: str, max_tokens: int = 512) -> str:
+        """Async ``generate_response``: awaits Mistral directly, queues for a local-model batch otherwise."""
+        if self.backend == "mistral":
+            try:
+                return await self._call_mistral_async(prompt, max_tokens=max_tokens)
+            except Exception as e:
+                print(f"[LanguageAgent] Mistral generation failed: {e}. Falling back to local model.")
+        return await self._generate_local_async(prompt, max_tokens)
+
+    async def stream_response_async(self, prompt: str, max_tokens: int = 512) -> AsyncIterator[str]:
+        """
+        Yield the completion of ``prompt`` as text deltas as they arrive from the Mistral
+        streaming API. The local backend cannot stream, so it yields the whole response as
+        one chunk; so does a Mistral stream that fails before its first token. A stream
+        that fails after tokens were yielded raises, as the text is already incomplete.
+        """
+        if self.backend == "mistral":
+            started = False
+            try:
+                client, semaphore = self._async_state()
+                async with semaphore:
+                    stream = await asyncio.wait_for(
+                        client.chat.stream_async(
+                            model=self.model_name,
+                            messages=[{"role": "user", "content": prompt}],
+                            max_tokens=max_tokens,
+                            temperature=0.3
+                        ),
+                        timeout=self.request_timeout
+                    )
+                    async for event in stream:
+                        choices = event.data.choices
+                        delta = choices[0].delta.content if choices else None
+                        if isinstance(delta, str) and delta:
+                            started = True
+                            yield delta
+                return
+            except Exception as e:
+                if started:
+                    raise
+                print(f"[LanguageAgent] Mistral streaming failed: {e}. Falling back to local model.")
+        yield await self._generate_local_async(prompt, max_tokens)
+
+    # ------------------------------------------------------------------
+    # Prompts and local fallbacks shared by the sync and async methods
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _summary_prompt(text: str, max_words: int) -> str:
+        return f"""Summarize the following text in a concise paragraph (maximum {max_words} words):
+
+{text}
+
+CONCISE SUMMARY:"""
+
+    @staticmethod
+    def _explain_prompt(text: str, target_audience: str) -> str:
+        return f"""Explain the following text to a {target_audience} in simple, clear language (maximum 200 words):
+
+{text}
+
+EXPLANATION:"""
+
+    @staticmethod
+    def _summary_unavailable(after_api_failure: bool) -> str:
+        if after_api_failure:
+            return "Unable to summarize due to API limitations and missing local model."
+        return "Unable to summarize: no Mistral client and no local model available."
+
+    @staticmethod
+    def _explain_unavailable(target_audience: str, after_api_failure: bool) -> str:
+        if after_api_failure:
+            return f"Explanation for {target_audience}: Unable to process due to API limitations and missing local model."
+        return f"Explanation for {target_audience}: Unable to process without Mistral client or local model."
+
+    @staticmethod
+    def _explain_failed(target_audience: str, after_api_failure: bool, error: Exception) -> str:
+        if not after_api_failure:
+            raise error
+        print(f"[LanguageAgent] Local model fallback also failed: {error}")
+        return f"Explanation for {target_audience}: Error occurred during both API and local processing."
+
+    def _summarize_local(self, text: str, max_words: int, after_api_failure: bool = False) -> str:
+        if not self.local_model:
+            return self._summary_unavailable(after_api_failure)
+        # transformers pipeline expects max_length tokens, approximate tokens ~ words*1.3
+        return self._local_summary(text, max_length=int(max_words * 1.3), min_length=20)
+
+    async def _summarize_local_async(self, text: str, max_words: int, after_api_failure: bool = False) -> str:
+        if not await self._local_model_async():
+            return self._summary_unavailable(after_api_failure)
+        return await self._local_summary_async(text, max_length=int(max_words * 1.3), min_length=20)
+
+    def _explain_local(self, text: str, target_audience: str, after_api_failure: bool = False) -> str:
+        if not self.local_model:
+            return self._explain_unavailable(target_audience, after_api_failure)
+        # crude fallback: summarizer followed by simple prefix
+        try:
+            summary = self._local_summary(text, max_length=200, min_length=30)
+        except Exception as fallback_error:
+            return self._explain_failed(target_audience, after_api_failure, fallback_error)
+        return f"Explanation for {target_audience}: {summary}"
+
+    async def _explain_local_async(self, text: str, target_audience: str, after_api_failure: bool = False) -> str:
+        if not await self._local_model_async():
+            return self._explain_unavailable(target_audience, after_api_failure)
+        try:
+            summary = await self._local_summary_async(text, max_length=200, min_length=30)
+        except Exception as fallback_error:
+            return self._explain_failed(target_audience, after_api_failure, fallback_error)
+        return f"Explanation for {target_audience}: {summary}"
+
     # ------------------------------------------------------------------
     # Core public methods
     # ------------------------------------------------------------------
@@ -108,28 +445,12 @@ class LanguageAgent:
             return ""
             
         if self.backend == "mistral":
-            prompt = f"""Summarize the following text in a concise paragraph (maximum {max_words} words):
-
-{text}
-
-CONCISE SUMMARY:"""
             try:
-                result = self._call_mistral(prompt, max_tokens=200)
-                return result
+                return self._call_mistral(self._summary_prompt(text, max_words), max_tokens=200)
             except Exception as e:
                 print(f"[LanguageAgent] Mistral summarization failed: {e}. Falling back to local model.")
-                # Fall back to local model
-                if self.local_model:
-                    max_length = int(max_words * 1.3)
-                    summary = self.local_model(text, max_length=max_length, min_length=20, do_sample=False)
-                    return summary[0]["summary_text"].strip()
-                else:
-                    return "Unable to summarize due to API limitations and missing local model."
-        else:
-            # transformers pipeline expects max_length tokens, approximate tokens ~ words*1.3
-            max_length = int(max_words * 1.3)
-            summary = self.client(text, max_length=max_length, min_length=20, do_sample=False)
-            return summary[0]["summary_text"].strip()
+                return self._summarize_local(text, max_words, after_api_failure=True)
+        return self._summarize_local(text, max_words)
 
     def explain(self, text: str, target_audience: str = "non-expert") -> str:
         text = text.strip()
@@ -137,42 +458,138 @@ CONCISE SUMMARY:"""
             return ""
             
         if self.backend == "mistral":
-            prompt = f"""Explain the following text to a {target_audience} in simple, clear language (maximum 200 words):
+            try:
+                return self._call_mistral(self._explain_prompt(text, target_audience), max_tokens=300)
+            except Exception as e:
+                print(f"[LanguageAgent] Mistral explanation failed: {e}. Falling back to local model.")
+                return self._explain_local(text, target_audience, after_api_failure=True)
+        return self._explain_local(text, target_audience)
+
+    def _summarize_local_batch(self, texts: List[str], max_words: int, batch_size: int = DEFAULT_LOCAL_BATCH_SIZE) -> List[str]:
+        """One batched local-model call over several chunks."""
+        if not self.local_model:
+            raise RuntimeError("No local model available.")
+        max_length = int(max_words * 1.3)
+        summaries = self.local_model(texts, max_length=max_length, min_length=min(20, max_length // 2),
+                                     do_sample=False, truncation=True, batch_size=batch_size)
+        return [summary["summary_text"].strip() for summary in summaries]
+
+    def _map_splitter(self, chunk_size: Optional[int], chunk_overlap: int):
+        from langchain.text_splitter import RecursiveCharacterTextSplitter
+        return RecursiveCharacterTextSplitter(
+            chunk_size=chunk_size or DEFAULT_MAP_CHUNK_CHARS.get(self.backend, DEFAULT_MAP_CHUNK_CHARS["local"]),
+            chunk_overlap=chunk_overlap,
+            length_function=len
+        )
+
+    async def _map_summaries(self, chunks: List[str], max_words: int, batch_size: int) -> List[str]:
+        """Summarise every chunk: parallel Mistral calls, one batched local pass for the rest."""
+        summaries: List[Optional[str]] = [None] * len(chunks)
+        if self.backend == "mistral":
+            results = await asyncio.gather(
+                *(self._call_mistral_async(self._summary_prompt(chunk, max_words), max_tokens=int(max_words * 2))
+                  for chunk in chunks),
+                return_exceptions=True
+            )
+            for i, result in enumerate(results):
+                if not isinstance(result, BaseException):
+                    summaries[i] = result
+        pending = [i for i, summary in enumerate(summaries) if summary is None]
+        if pending:
+            if self.backend == "mistral":
+                print(f"[LanguageAgent] {len(pending)} chunk summaries failed on Mistral. Falling back to local model.")
+            try:
+                local = await run_cpu_bound(self._summarize_local_batch, [chunks[i] for i in pending], max_words, batch_size)
+                for i, summary in zip(pending, local):
+                    summaries[i] = summary
+            except Exception as e:
+                print(f"[LanguageAgent] Local chunk summarisation failed: {e}. Dropping {len(pending)} chunks.")
+        return [summary for summary in summaries if summary]
 
-{text}
+    async def summarize_long_async(self, text: str, max_words: int = 150, chunk_size: Optional[int] = None,
+                                   chunk_overlap: int = DEFAULT_MAP_CHUNK_OVERLAP, splitter=None,
+                                   chunk_summary_words: int = DEFAULT_MAP_SUMMARY_WORDS,
+                                   batch_size: int = DEFAULT_LOCAL_BATCH_SIZE) -> str:
+        """
+        Hierarchical (map-reduce) summary of a document too long for one prompt.
 
-EXPLANATION:"""
+        The text is split with ``splitter`` (e.g. ``RetrieverAgent.text_splitter``) or a
+        ``RecursiveCharacterTextSplitter`` sized for the backend. Chunks are summarised
+        concurrently, then the joined chunk summaries are split and summarised again
+        until they fit in one chunk, which gets the final ``max_words`` summary. Text
+        that already fits in one chunk is summarised directly. If a round stops
+        shrinking the text (or MAX_REDUCE_ROUNDS is reached), only the first chunk goes
+        into the final summary, with a warning, so the prompt never exceeds one chunk.
+        """
+        text = text.strip()
+        if not text:
+            return ""
+        splitter = splitter or self._map_splitter(chunk_size, chunk_overlap)
+        chunks = splitter.split_text(text)
+        rounds = 0
+        while len(chunks) > 1:
+            length = sum(len(chunk) for chunk in chunks)
+            if rounds == MAX_REDUCE_ROUNDS:
+                print(f"[LanguageAgent] Still {len(chunks)} chunks after {rounds} reduce rounds; summarising only the first.")
+                chunks = chunks[:1]
+                break
+            summaries = await self._map_summaries(chunks, chunk_summary_words, batch_size)
+            if not summaries:
+                return "Unable to summarize: every chunk failed on both Mistral and the local model."
+            chunks = splitter.split_text("\n\n".join(summaries))
+            rounds += 1
+            if len(chunks) > 1 and sum(len(chunk) for chunk in chunks) >= length:
+                print(f"[LanguageAgent] Reduce round {rounds} did not shrink the text ({length} chars); summarising only the first chunk.")
+                chunks = chunks[:1]
+        return await self.summarize_async(chunks[0] if chunks else "", max_words=max_words)
+
+    async def summarize_async(self, text: str, max_words: int = 150) -> str:
+        """Async ``summarize``; local-model calls are micro-batched with concurrent requests."""
+        text = text.strip()
+        if not text:
+            return ""
+        if self.backend == "mistral":
             try:
-                result = self._call_mistral(prompt, max_tokens=300)
-                return result
+                return await self._call_mistral_async(self._summary_prompt(text, max_words), max_tokens=200)
+            except Exception as e:
+                print(f"[LanguageAgent] Mistral summarization failed: {e}. Falling back to local model.")
+                return await self._summarize_local_async(text, max_words, after_api_failure=True)
+        return await self._summarize_local_async(text, max_words)
+
+    async def explain_async(self, text: str, target_audience: str = "non-expert") -> str:
+        """Async ``explain``; local-model calls are micro-batched with concurrent requests."""
+        text = text.strip()
+        if not text:
+            return ""
+        if self.backend == "mistral":
+            try:
+                return await self._call_mistral_async(self._explain_prompt(text, target_audience), max_tokens=300)
             except Exception as e:
                 print(f"[LanguageAgent] Mistral explanation failed: {e}. Falling back to local model.")
-                # Fall back to local model
-                if self.local_model:
-                    try:
-                        summary = self.local_model(text, max_length=200, min_length=30, do_sample=False)
-                        return f"Explanation for {target_audience}: {summary[0]['summary_text'].strip()}"
-                    except Exception as fallback_error:
-                        print(f"[LanguageAgent] Local model fallback also failed: {fallback_error}")
-                        return f"Explanation for {target_audience}: Error occurred during both API and local processing."
-                else:
-                    return f"Explanation for {target_audience}: Unable to process due to API limitations and missing local model."
-        else:
-            # crude fallback: summarizer followed by simple prefix
-            summary = self.client(text, max_length=200, min_length=30, do_sample=False)
-            return f"Explanation for {target_audience}: {summary[0]['summary_text'].strip()}"
+                return await self._explain_local_async(text, target_audience, after_api_failure=True)
+        return await self._explain_local_async(text, target_audience)
 
     def get_status(self) -> Dict[str, str]:
         """Return the current status of the LanguageAgent."""
+        # Reads the private attribute so asking for status never triggers a model load
         status = {
             "backend": self.backend,
             "model_name": self.model_name if self.backend == "mistral" else "N/A (local)",
-            "local_model_initialized": "Yes" if self.local_model else "No"
+            "local_model_initialized": "Yes" if self._local_model else "No",
+            "local_model_status": self.local_model_status,
+        }
+        if self._local_model_name:
+            status["local_model_name"] = self._local_model_name
+        if self.local_model_error:
+            status["local_model_error"] = self.local_model_error
+        status["async"] = {
+            "max_concurrency": self.max_concurrency,
+            "request_timeout": self.request_timeout,
+            "max_retries": self.max_retries,
+            **self._async_stats,
         }
-        if self.backend == "local" and self.local_model and hasattr(self.local_model, 'model') and hasattr(self.local_model.model, 'name_or_path'):
-            status["local_model_name"] = self.local_model.model.name_or_path
-        elif self.backend == "local" and self.local_model:
-             status["local_model_name"] = "Unknown (pipeline active)"
+        if self._local_batcher is not None:
+            status["local_batching"] = self._local_batcher.metrics()
         return status
 
 
@@ -5,8 +5,17 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Union
 import json
 import time # Import time for potential simple delays
+import functools
+import inspect
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type, RetryError
 
+from .history_store import OHLCVHistoryStore, DEFAULT_HISTORY_STORE_PATH, period_covers
+from .ticker_entities import get_ticker_extractor
+from .symbol_search import get_symbol_search_index, DEFAULT_SEARCH_LIMIT
+
 # Define a custom exception for yfinance specific HTTP errors if needed, or use requests.HTTPError
 class YFinanceRateLimitError(requests.exceptions.HTTPError):
     """Custom exception for yfinance rate limit errors."""
@@ -16,21 +25,216 @@ def _is_rate_limit_error(exception):
     """Check if the exception is a rate limit error (429)."""
     return isinstance(exception, requests.exceptions.HTTPError) and hasattr(exception, 'response') and exception.response is not None and exception.response.status_code == 429
 
+# Default time-to-live (seconds) per class of market data
+DEFAULT_CACHE_TTLS = {
+    "quote": 15,               # prices move constantly
+    "company_info": 6 * 3600,  # fundamentals change a few times a day at most
+    "earnings": 24 * 3600,     # earnings tables change quarterly
+    "search": 6 * 3600,
+}
+DEFAULT_CACHE_MAX_ENTRIES = 2048
+
+# History fetched the first time a symbol is seen; later refreshes only fetch newer bars
+DEFAULT_HISTORY_BOOTSTRAP_PERIOD = "1y"
+DEFAULT_HISTORY_REFRESH_INTERVAL = 60  # seconds between incremental refreshes of one symbol
+
+class _InFlight:
+    """A pending upstream fetch that concurrent callers for the same key wait on."""
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+class MarketDataCache:
+    """
+    Thread-safe TTL + LRU cache with single-flight request coalescing.
+
+    Each entry is stored with the TTL of its data class. When the cache is full the
+    least recently used entry is evicted. Concurrent misses for the same key share
+    one loader call: the first caller fetches, the rest wait for its result.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, max_entries: int = DEFAULT_CACHE_MAX_ENTRIES):
+        self.ttls = {**DEFAULT_CACHE_TTLS, **(ttls or {})}
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()  # key -> (expires_at, value)
+        self._in_flight: Dict[tuple, _InFlight] = {}
+        self._lock = threading.Lock()
+        self._stats = {data_class: {"hits": 0, "misses": 0, "coalesced": 0} for data_class in self.ttls}
+        self._evictions = 0
+
+    def _class_stats(self, data_class: str) -> Dict[str, int]:
+        return self._stats.setdefault(data_class, {"hits": 0, "misses": 0, "coalesced": 0})
+
+    def get_or_load(self, data_class: str, key: tuple, loader, cacheable=lambda value: True):
+        """Return the cached value for key, or call loader() once and cache its result."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._class_stats(data_class)["hits"] += 1
+                    return value
+                del self._entries[key]
+            pending = self._in_flight.get(key)
+            if pending is None:
+                pending = self._in_flight[key] = _InFlight()
+                is_leader = True
+                self._class_stats(data_class)["misses"] += 1
+            else:
+                is_leader = False
+                self._class_stats(data_class)["coalesced"] += 1
+
+        if not is_leader:
+            pending.event.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.value
+
+        try:
+            pending.value = loader()
+        except BaseException as e:
+            pending.error = e
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(key, None)
+                if pending.error is None and cacheable(pending.value):
+                    self._store(data_class, key, pending.value)
+            pending.event.set()
+        return pending.value
+
+    def get(self, data_class: str, key: tuple):
+        """The fresh cached value for key, or None (no loading)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self._class_stats(data_class)["hits"] += 1
+                return entry[1]
+            self._class_stats(data_class)["misses"] += 1
+            return None
+
+    def put(self, data_class: str, key: tuple, value):
+        """Store a value fetched outside get_or_load (e.g. by a batched download)."""
+        with self._lock:
+            self._store(data_class, key, value)
+
+    def _store(self, data_class: str, key: tuple, value):
+        # Caller holds self._lock
+        self._entries[key] = (time.monotonic() + self.ttls.get(data_class, 0), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            total_hits = sum(s["hits"] for s in self._stats.values())
+            total_misses = sum(s["misses"] for s in self._stats.values())
+            lookups = total_hits + total_misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": total_hits,
+                "misses": total_misses,
+                "hit_rate": round(total_hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "ttls": dict(self.ttls),
+                "by_class": {data_class: dict(counts) for data_class, counts in self._stats.items()},
+            }
+
+def _is_cacheable_result(value) -> bool:
+    """Error and degraded fallback payloads are never cached so the next call retries upstream."""
+    if not isinstance(value, dict):
+        return True
+    if "error" in value or value.get("fallback"):  # get_company_info marks its degraded payloads
+        return False
+    if value.get("sector") in ("Rate Limited", "Error", "Unknown"):
+        return False
+    if str(value.get("message", "")).startswith("Fallback"):  # search_stocks fallback
+        return False
+    return True
+
+def _cached(data_class: str):
+    """Serve a MarketDataAgent method through self.cache, keyed by its bound arguments."""
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        def cache_key(*args, **kwargs) -> tuple:
+            bound = signature.bind(None, *args, **kwargs)
+            bound.apply_defaults()
+            return (func.__name__,) + tuple(list(bound.arguments.items())[1:])
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            cache = getattr(self, "cache", None)
+            if cache is None:
+                return func(self, *args, **kwargs)
+            key = cache_key(*args, **kwargs)
+            return cache.get_or_load(data_class, key, lambda: func(self, *args, **kwargs), _is_cacheable_result)
+        # Lets batched paths read and fill the same entries, e.g. get_stock_price.cache_key("AAPL", period="1mo")
+        wrapper.cache_key = cache_key
+        return wrapper
+    return decorator
+
 class MarketDataAgent:
     """
     A market data agent that fetches stock prices, earnings, and other market data
     using Yahoo Finance and AlphaVantage APIs.
     """
     
-    def __init__(self, alpha_vantage_api_key: Optional[str] = None):
+    def __init__(self, alpha_vantage_api_key: Optional[str] = None,
+                 enable_cache: bool = True,
+                 cache_ttls: Optional[Dict[str, float]] = None,
+                 cache_max_entries: int = DEFAULT_CACHE_MAX_ENTRIES,
+                 history_store_path: Optional[str] = DEFAULT_HISTORY_STORE_PATH,
+                 history_refresh_interval: float = DEFAULT_HISTORY_REFRESH_INTERVAL,
+                 enable_symbol_index: bool = True):
         """
         Initialize the market data agent.
         
         Args:
             alpha_vantage_api_key: Optional API key for AlphaVantage
+            enable_cache: Serve repeated quote/info/earnings/search lookups from an in-process cache
+            cache_ttls: Per data class TTL overrides in seconds ("quote", "company_info", "earnings", "search")
+            cache_max_entries: Maximum cached entries before LRU eviction
+            history_store_path: Directory of the local OHLCV history store (None disables it)
+            history_refresh_interval: Minimum seconds between incremental refreshes of a symbol
+            enable_symbol_index: Answer search_stocks from the offline listing index before Yahoo
         """
         self.alpha_vantage_api_key = alpha_vantage_api_key
         self.alpha_vantage_base_url = "https://www.alphavantage.co/query"
+        self.cache = MarketDataCache(ttls=cache_ttls, max_entries=cache_max_entries) if enable_cache else None
+        self.history_store = None
+        if history_store_path:
+            try:
+                self.history_store = OHLCVHistoryStore(history_store_path)
+            except OSError as e:
+                print(f"[MarketDataAgent] History store unavailable at {history_store_path}: {e}. Fetching history from the network.")
+        self.history_refresh_interval = history_refresh_interval
+        self._history_refreshed_at: Dict[str, float] = {}
+        self.symbol_index = get_symbol_search_index() if enable_symbol_index else None
+
+    def get_cache_stats(self) -> Dict:
+        """Return cache hit/miss counters, or an empty dict when caching is disabled."""
+        return self.cache.stats() if self.cache else {}
+
+    def get_status(self) -> Dict:
+        """Return the current status of the MarketDataAgent."""
+        return {
+            "alpha_vantage_configured": bool(self.alpha_vantage_api_key),
+            "cache_enabled": self.cache is not None,
+            "cache": self.get_cache_stats(),
+            "history_store": self.history_store.root if self.history_store else None,
+            "history_symbols": len(self.history_store.symbols()) if self.history_store else 0,
+            "symbol_index_size": len(self.symbol_index) if self.symbol_index else 0,
+        }
     
     @retry(stop=stop_after_attempt(2), 
            wait=wait_exponential(multiplier=1, min=1, max=3), # Reduced wait times for faster response
@@ -69,6 +273,66 @@ class MarketDataAgent:
             pass # Allow returning empty hist, main function will check
         return hist
 
+    @retry(stop=stop_after_attempt(2),
+           wait=wait_exponential(multiplier=1, min=1, max=3),
+           retry=retry_if_exception_type(requests.exceptions.RequestException)
+          )
+    def _fetch_ticker_history_since(self, ticker_symbol: str, start: datetime):
+        """Helper to fetch daily bars from ``start`` (inclusive) onwards with retry."""
+        ticker = yf.Ticker(ticker_symbol)
+        return ticker.history(start=start.strftime("%Y-%m-%d"))
+
+    def refresh_history(self, symbol: str, period: str = DEFAULT_HISTORY_BOOTSTRAP_PERIOD) -> int:
+        """
+        Bring the local history for a symbol up to date.
+
+        The first call (or a request for more history than is stored) downloads the
+        full period; afterwards only bars from the last stored session onwards are
+        fetched and appended. Returns the number of bars downloaded.
+        """
+        if self.history_store is None:
+            return 0
+        meta = self.history_store.get_meta(symbol)
+        if not meta or meta.get("last_timestamp") is None or not period_covers(meta.get("covered_period"), period):
+            bootstrap_period = period if period_covers(period, DEFAULT_HISTORY_BOOTSTRAP_PERIOD) else DEFAULT_HISTORY_BOOTSTRAP_PERIOD
+            hist = self._fetch_ticker_history(symbol, bootstrap_period)
+            if not hist.empty:
+                self.history_store.write(symbol, hist, covered_period=bootstrap_period)
+            self._history_refreshed_at[symbol] = time.monotonic()
+            return len(hist)
+
+        if time.monotonic() - self._history_refreshed_at.get(symbol, 0) < self.history_refresh_interval:
+            return 0
+        new_bars = self._fetch_ticker_history_since(symbol, self.history_store.last_timestamp(symbol))
+        if not new_bars.empty:
+            self.history_store.append(symbol, new_bars)
+        self._history_refreshed_at[symbol] = time.monotonic()
+        return len(new_bars)
+
+    def get_history(self, symbol: str, period: str = "1mo", refresh: bool = True) -> pd.DataFrame:
+        """
+        Return daily OHLCV bars for ``period``, answered from the local history store.
+
+        With ``refresh=False`` no network call is made, which allows historical
+        analytics offline. Without a store this is a plain yfinance history call.
+        """
+        if self.history_store is None:
+            return self._fetch_ticker_history(symbol, period)
+        if refresh:
+            try:
+                self.refresh_history(symbol, period)
+            except (RetryError, Exception) as e:
+                # Serve whatever is stored locally; the next call retries the refresh
+                print(f"[MarketDataAgent] History refresh failed for {symbol}: {e}")
+        try:
+            hist = self.history_store.read(symbol, period)
+        except Exception as e:
+            print(f"[MarketDataAgent] History store read failed for {symbol}: {e}")
+            hist = pd.DataFrame()
+        if hist.empty and refresh:
+            return self._fetch_ticker_history(symbol, period)
+        return hist
+
     @retry(stop=stop_after_attempt(2),
            wait=wait_exponential(multiplier=1, min=1, max=3), # Reduced wait times
            retry=retry_if_exception_type(requests.exceptions.RequestException)
@@ -78,6 +342,30 @@ class MarketDataAgent:
         ticker = yf.Ticker(ticker_symbol)
         return ticker.earnings, ticker.quarterly_earnings, ticker.calendar
 
+    def _build_price_result(self, symbol: str, hist: pd.DataFrame, info: Dict) -> Dict:
+        """Shape OHLCV history plus (optional) ticker info into the get_stock_price result dict."""
+        current_price = hist['Close'].iloc[-1]
+        prev_close = hist['Close'].iloc[-2] if len(hist) > 1 else current_price
+        change = current_price - prev_close
+        change_percent = (change / prev_close) * 100 if prev_close != 0 else 0
+        
+        # Ensure we always return the required fields for health checks
+        return {
+            "symbol": symbol,
+            "current_price": round(float(current_price), 2),  # Ensure it's a float
+            "previous_close": round(float(prev_close), 2),
+            "change": round(float(change), 2),
+            "change_percent": round(float(change_percent), 2),
+            "volume": int(hist['Volume'].iloc[-1]) if 'Volume' in hist.columns and pd.notna(hist['Volume'].iloc[-1]) else 0,
+            "high_52w": round(float(info.get('fiftyTwoWeekHigh', current_price)), 2) if info and info.get('fiftyTwoWeekHigh') else round(float(current_price), 2),
+            "low_52w": round(float(info.get('fiftyTwoWeekLow', current_price)), 2) if info and info.get('fiftyTwoWeekLow') else round(float(current_price), 2),
+            "market_cap": info.get('marketCap', 'N/A') if info else 'N/A',
+            "pe_ratio": info.get('trailingPE', 'N/A') if info else 'N/A',
+            "company_name": info.get('longName', symbol) if info and info.get('longName') else symbol,
+            "historical_data": hist.reset_index().to_dict('records')[:10] # Limit to last 10 days for faster response
+        }
+
+    @_cached("quote")
     def get_stock_price(self, symbol: str, period: str = "1mo") -> Dict:
         try:
             # For health checks and fast responses, try multiple periods if one fails
@@ -86,7 +374,7 @@ class MarketDataAgent:
             hist = None
             for attempt_period in periods_to_try:
                 try:
-                    hist = self._fetch_ticker_history(symbol, attempt_period)
+                    hist = self.get_history(symbol, attempt_period)
                     if not hist.empty:
                         break
                     print(f"Empty history for {symbol} with period {attempt_period}, trying next...")
@@ -131,27 +419,7 @@ class MarketDataAgent:
                 
                 return {"error": f"No historical data found for symbol {symbol} after retries."}
             
-            current_price = hist['Close'].iloc[-1]
-            prev_close = hist['Close'].iloc[-2] if len(hist) > 1 else current_price
-            change = current_price - prev_close
-            change_percent = (change / prev_close) * 100 if prev_close != 0 else 0
-            
-            # Ensure we always return the required fields for health checks
-            result = {
-                "symbol": symbol,
-                "current_price": round(float(current_price), 2),  # Ensure it's a float
-                "previous_close": round(float(prev_close), 2),
-                "change": round(float(change), 2),
-                "change_percent": round(float(change_percent), 2),
-                "volume": int(hist['Volume'].iloc[-1]) if 'Volume' in hist.columns and pd.notna(hist['Volume'].iloc[-1]) else 0,
-                "high_52w": round(float(info.get('fiftyTwoWeekHigh', current_price)), 2) if info and info.get('fiftyTwoWeekHigh') else round(float(current_price), 2),
-                "low_52w": round(float(info.get('fiftyTwoWeekLow', current_price)), 2) if info and info.get('fiftyTwoWeekLow') else round(float(current_price), 2),
-                "market_cap": info.get('marketCap', 'N/A') if info else 'N/A',
-                "pe_ratio": info.get('trailingPE', 'N/A') if info else 'N/A',
-                "company_name": info.get('longName', symbol) if info and info.get('longName') else symbol,
-                "historical_data": hist.reset_index().to_dict('records')[:10] # Limit to last 10 days for faster response
-            }
-            return result
+            return self._build_price_result(symbol, hist, info)
         except RetryError as re:
             last_exception = re.last_attempt.exception()
             if _is_rate_limit_error(last_exception):
@@ -160,13 +428,153 @@ class MarketDataAgent:
         except Exception as e:
             return {"error": f"Error fetching data for {symbol} in get_stock_price: {str(e)}"}
     
-    def get_multiple_stocks(self, symbols: List[str]) -> Dict:
-        results = {}
+    @retry(stop=stop_after_attempt(2),
+           wait=wait_exponential(multiplier=1, min=1, max=3),
+           retry=retry_if_exception_type(requests.exceptions.RequestException)
+          )
+    def _fetch_bulk_history(self, symbols: List[str], period: Optional[str] = None,
+                            start: Optional[datetime] = None) -> Dict[str, pd.DataFrame]:
+        """Helper to fetch OHLCV history for many tickers in one batched download (``period`` or from ``start``)."""
+        span = {"start": start.strftime("%Y-%m-%d")} if start is not None else {"period": period}
+        # Keep exchange timezones so bars merge with Ticker.history data in the history store
+        data = yf.download(symbols, group_by="ticker", threads=True, progress=False, ignore_tz=False, **span)
+        histories = {}
+        if data is None or data.empty:
+            return histories
+        if isinstance(data.columns, pd.MultiIndex):
+            available = set(data.columns.get_level_values(0))
+            for symbol in symbols:
+                if symbol in available:
+                    histories[symbol] = data[symbol].dropna(how="all")
+        elif len(symbols) == 1:
+            # Single-ticker downloads come back with flat OHLCV columns
+            histories[symbols[0]] = data.dropna(how="all")
+        return histories
+
+    def _get_bulk_history(self, symbols: List[str], period: str) -> Dict[str, pd.DataFrame]:
+        """
+        OHLCV history for many tickers, kept in the local history store when there is one.
+
+        Symbols already stored for ``period`` get one batched download of the bars since
+        the oldest last stored session (skipped within ``history_refresh_interval``) and
+        are read back from the store; the rest are downloaded for ``period`` in one batch
+        and written to the store.
+        """
+        if self.history_store is None:
+            return self._fetch_bulk_history(symbols, period)
+
+        stored, missing = [], []
         for symbol in symbols:
-            results[symbol] = self.get_stock_price(symbol)
-            time.sleep(0.3) # Slightly increased delay
-        return results
+            try:
+                meta = self.history_store.get_meta(symbol)
+            except Exception as e:
+                print(f"[MarketDataAgent] History store lookup failed for {symbol}: {e}")
+                meta = None
+            if meta and meta.get("last_timestamp") is not None and period_covers(meta.get("covered_period"), period):
+                stored.append(symbol)
+            else:
+                missing.append(symbol)
+
+        now = time.monotonic()
+        stale = [s for s in stored if now - self._history_refreshed_at.get(s, 0) >= self.history_refresh_interval]
+        if stale:
+            try:
+                start = min(self.history_store.last_timestamp(symbol) for symbol in stale)
+                new_bars = self._fetch_bulk_history(stale, start=start)
+                for symbol in stale:
+                    if symbol in new_bars and not new_bars[symbol].empty:
+                        self.history_store.append(symbol, new_bars[symbol])
+                    self._history_refreshed_at[symbol] = time.monotonic()
+            except (RetryError, Exception) as e:
+                # Serve whatever is stored locally; the next call retries the refresh
+                print(f"[MarketDataAgent] Batched history refresh failed for {stale}: {e}")
+
+        histories = {}
+        for symbol in stored:
+            try:
+                hist = self.history_store.read(symbol, period)
+            except Exception as e:
+                print(f"[MarketDataAgent] History store read failed for {symbol}: {e}")
+                hist = pd.DataFrame()
+            if hist.empty:
+                missing.append(symbol)
+            else:
+                histories[symbol] = hist
+
+        if missing:
+            try:
+                downloaded = self._fetch_bulk_history(missing, period)
+            except (RetryError, Exception) as e:
+                print(f"Batched history download failed for {missing}: {e}")
+                downloaded = {}
+            for symbol, hist in downloaded.items():
+                if hist.empty:
+                    continue
+                try:
+                    self.history_store.write(symbol, hist, covered_period=period)
+                    self._history_refreshed_at[symbol] = time.monotonic()
+                except Exception as e:
+                    print(f"[MarketDataAgent] History store write failed for {symbol}: {e}")
+                histories[symbol] = hist
+        return histories
+
+    def _fetch_info_safe(self, symbol: str) -> Dict:
+        try:
+            return self._fetch_ticker_info(symbol) or {}
+        except (RetryError, Exception) as e:
+            print(f"Info fetch failed for {symbol}, continuing with price data only: {e}")
+            return {}
+
+    def get_multiple_stocks(self, symbols: List[str], period: str = "1mo", max_info_concurrency: int = 8) -> Dict:
+        """
+        Fetch quotes for many symbols at once.
+
+        OHLCV history comes from the local history store, kept current by batched
+        downloads (see ``_get_bulk_history``), or from one batched download without a
+        store; the per-symbol ``.info`` lookups then run concurrently, bounded by
+        ``max_info_concurrency``. Symbols missing from the batch fall back to
+        ``get_stock_price``. Quotes share the ``get_stock_price`` cache entries: fresh
+        ones are served from the cache, only the misses are downloaded, and each built
+        result is cached. Returns ``{symbol: get_stock_price-style dict}``.
+        """
+        symbols = list(dict.fromkeys(s for s in symbols if s))
+        if not symbols:
+            return {}
+
+        results: Dict[str, Dict] = {}
+        cache_keys = {symbol: MarketDataAgent.get_stock_price.cache_key(symbol, period=period) for symbol in symbols}
+        if self.cache is not None:
+            for symbol in symbols:
+                cached = self.cache.get("quote", cache_keys[symbol])
+                if cached is not None:
+                    results[symbol] = cached
+        misses = [symbol for symbol in symbols if symbol not in results]
+        if not misses:
+            return results
+
+        try:
+            histories = self._get_bulk_history(misses, period)
+        except (RetryError, Exception) as e:
+            print(f"Batched history download failed for {misses}: {e}")
+            histories = {}
+        histories = {symbol: hist for symbol, hist in histories.items() if not hist.empty}
+
+        infos: Dict[str, Dict] = {}
+        if histories:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_info_concurrency, len(histories)))) as pool:
+                infos = dict(zip(histories, pool.map(self._fetch_info_safe, histories)))
+
+        for symbol in misses:
+            if symbol in histories:
+                result = self._build_price_result(symbol, histories[symbol], infos.get(symbol, {}))
+                if self.cache is not None and _is_cacheable_result(result):
+                    self.cache.put("quote", cache_keys[symbol], result)
+                results[symbol] = result
+            else:
+                results[symbol] = self.get_stock_price(symbol, period=period)
+        return {symbol: results[symbol] for symbol in symbols}
     
+    @_cached("earnings")
     def get_earnings_data(self, symbol: str) -> Dict:
         try:
             # ticker = yf.Ticker(symbol)
@@ -189,6 +597,7 @@ class MarketDataAgent:
         except Exception as e:
             return {"error": f"Error fetching earnings data for {symbol}: {str(e)}"}
     
+    @_cached("company_info")
     def get_company_info(self, symbol: str) -> Dict:
         try:
             info = self._fetch_ticker_info(symbol)
@@ -211,7 +620,8 @@ class MarketDataAgent:
                     "peg_ratio": "N/A",
                     "price_to_book": "N/A",
                     "debt_to_equity": "N/A",
-                    "dividend_yield": "N/A"
+                    "dividend_yield": "N/A",
+                    "fallback": True
                 }
 
             # Ensure we always return company_name field for health checks
@@ -254,7 +664,8 @@ class MarketDataAgent:
                     "peg_ratio": "N/A",
                     "price_to_book": "N/A",
                     "debt_to_equity": "N/A",
-                    "dividend_yield": "N/A"
+                    "dividend_yield": "N/A",
+                    "fallback": True
                 }
             return {"error": f"Failed to fetch company info for {symbol} after multiple retries. Last error: {str(last_exception)}"}
         except Exception as e:
@@ -275,7 +686,8 @@ class MarketDataAgent:
                 "peg_ratio": "N/A",
                 "price_to_book": "N/A",
                 "debt_to_equity": "N/A",
-                "dividend_yield": "N/A"
+                "dividend_yield": "N/A",
+                "fallback": True
             }
     
     # AlphaVantage methods usually have their own rate limits, so tenacity might be useful here too
@@ -320,16 +732,33 @@ class MarketDataAgent:
         except Exception as e: # General catch-all
             return {"error": f"Error fetching AlphaVantage data for {symbol}, function {function}: {str(e)}"}
     
-    def search_stocks(self, query: str) -> Dict:
+    def search_stocks(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT, local_only: bool = False) -> Dict:
+        """
+        Search for stocks by symbol or company name.
+
+        Prefix and fuzzy matches come from the offline symbol index and are ranked by
+        ``score``. Only when nothing matches locally (and ``local_only`` is False) is the
+        query looked up on Yahoo as an exact ticker.
+        """
+        if self.symbol_index is not None:
+            results = self.symbol_index.search(query, limit=limit)
+            if results or local_only:
+                return {"results": results, "source": "local"}
+        return self._search_remote(query)
+
+    @_cached("search")
+    def _search_remote(self, query: str) -> Dict:
+        # Resolve company names ("apple", "bank of america") to their ticker before looking up
+        symbol = get_ticker_extractor().extract_one(query, default=query.upper())
         try:
             # For health checks, provide a simple response
-            info = self._fetch_ticker_info(query.upper())
+            info = self._fetch_ticker_info(symbol)
             
             if info and info.get('longName'): 
                 return {
                     "results": [{
-                        "symbol": info.get('symbol', query.upper()),
-                        "name": info.get('longName', query.upper()),
+                        "symbol": info.get('symbol', symbol),
+                        "name": info.get('longName', symbol),
                         "sector": info.get('sector', 'N/A'),
                         "industry": info.get('industry', 'N/A')
                     }]
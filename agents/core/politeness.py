@@ -0,0 +1,383 @@
+"""politeness.py
+Per-domain rate limiting and request scheduling for scraping.
+
+Every network fetch made by ScrapingAgent (blocking) and AsyncCrawler (async) first takes
+a token from its host's token bucket. The bucket allows ``SCRAPER_DOMAIN_BURST``
+back-to-back requests and refills at ``SCRAPER_DOMAIN_RATE`` per second. A
+``Crawl-delay`` or ``Request-rate`` in the host's robots.txt (fetched once and cached)
+slows the bucket further, and a 429 response pauses the host for its ``Retry-After``.
+
+Requests waiting for a token are queued per host by priority, so an interactive
+orchestrator scrape is served before a background batch crawl queued earlier for the
+same host. One dispatcher thread hands out tokens as they refill and wakes waiting
+threads and coroutines alike. The scheduler is process-wide (``get_politeness_scheduler``)
+so every agent instance and the batch API share the same per-host budget.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib import robotparser
+from urllib.parse import urlsplit
+
+import requests
+
+from .executors import run_io_bound
+
+DEFAULT_DOMAIN_RATE = float(os.getenv("SCRAPER_DOMAIN_RATE", "2"))
+DEFAULT_DOMAIN_BURST = int(os.getenv("SCRAPER_DOMAIN_BURST", "4"))
+DEFAULT_RESPECT_ROBOTS = os.getenv("SCRAPER_RESPECT_ROBOTS", "true").lower() == "true"
+DEFAULT_ROBOTS_TTL = float(os.getenv("SCRAPER_ROBOTS_TTL_SECONDS", str(24 * 3600)))
+ROBOTS_FAILURE_TTL = 600.0
+ROBOTS_TIMEOUT = 10.0
+# Ignore absurd robots.txt crawl delays instead of stalling a host for minutes per page
+MAX_CRAWL_DELAY = float(os.getenv("SCRAPER_MAX_CRAWL_DELAY", "30"))
+DEFAULT_429_BACKOFF = 30.0
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+PRIORITY_NAMES = {PRIORITY_INTERACTIVE: "interactive", PRIORITY_BATCH: "batch"}
+
+
+def host_of(url: str) -> str:
+    return urlsplit(url).netloc.lower()
+
+
+def retry_after_seconds(headers) -> Optional[float]:
+    """Numeric ``Retry-After`` of a 429 response (HTTP-date values fall back to the default pause)."""
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _priority_name(priority: int) -> str:
+    return PRIORITY_NAMES.get(priority, str(priority))
+
+
+class RobotsCache:
+    """robots.txt per host, fetched on first use and kept for ``ttl`` seconds."""
+
+    def __init__(self, user_agent: str = "*", ttl: float = DEFAULT_ROBOTS_TTL, timeout: float = ROBOTS_TIMEOUT):
+        self.user_agent = user_agent
+        self.ttl = ttl
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        # robots url -> (expires_at, parser or None)
+        self._entries: Dict[str, Tuple[float, Optional[robotparser.RobotFileParser]]] = {}
+        self._fetch_locks: Dict[str, threading.Lock] = {}
+        self.fetches = 0
+        self.failures = 0
+
+    @staticmethod
+    def robots_url(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme or 'https'}://{parts.netloc}/robots.txt"
+
+    def is_cached(self, url: str) -> bool:
+        entry = self._entries.get(self.robots_url(url))
+        return entry is not None and entry[0] > time.monotonic()
+
+    def _fetch(self, robots_url: str) -> Tuple[float, Optional[robotparser.RobotFileParser]]:
+        parser = robotparser.RobotFileParser(robots_url)
+        try:
+            response = requests.get(robots_url, timeout=self.timeout, headers={"User-Agent": self.user_agent})
+        except requests.exceptions.RequestException:
+            self.failures += 1
+            return time.monotonic() + ROBOTS_FAILURE_TTL, None
+        self.fetches += 1
+        if response.status_code >= 500:
+            return time.monotonic() + ROBOTS_FAILURE_TTL, None
+        if response.status_code >= 400:
+            parser.allow_all = True
+        else:
+            parser.parse(response.text.splitlines())
+        parser.modified()  # crawl_delay() / request_rate() answer None until a fetch time is set
+        return time.monotonic() + self.ttl, parser
+
+    def get(self, url: str) -> Optional[robotparser.RobotFileParser]:
+        """Parsed robots.txt for the URL's host (blocking on first lookup), None if unavailable."""
+        robots_url = self.robots_url(url)
+        entry = self._entries.get(robots_url)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(robots_url, threading.Lock())
+        with fetch_lock:  # one fetch per host even when many requests arrive at once
+            entry = self._entries.get(robots_url)
+            if entry is None or entry[0] <= time.monotonic():
+                entry = self._fetch(robots_url)
+                with self._lock:
+                    self._entries[robots_url] = entry
+        return entry[1]
+
+    def crawl_delay(self, url: str) -> Optional[float]:
+        """Seconds between requests asked for by robots.txt (Crawl-delay or Request-rate)."""
+        parser = self.get(url)
+        if parser is None:
+            return None
+        delay = parser.crawl_delay(self.user_agent)
+        if delay is None:
+            rate = parser.request_rate(self.user_agent)
+            delay = rate.seconds / rate.requests if rate and rate.requests else None
+        return min(float(delay), MAX_CRAWL_DELAY) if delay else None
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class _HostState:
+    __slots__ = ("rate", "burst", "tokens", "updated", "blocked_until", "crawl_delay", "waiters")
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.crawl_delay: Optional[float] = None
+        self.waiters: List[Tuple[int, int, "_Waiter"]] = []  # heap of (priority, seq, waiter)
+
+    def refill(self, now: float):
+        self.tokens = min(float(self.burst), self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def next_token_at(self, now: float) -> float:
+        if now < self.blocked_until:
+            return self.blocked_until
+        return now if self.tokens >= 1 else now + (1 - self.tokens) / self.rate
+
+
+class _Waiter:
+    __slots__ = ("priority", "enqueued", "wake", "granted", "cancelled", "waited")
+
+    def __init__(self, priority: int, wake: Callable[[], None]):
+        self.priority = priority
+        self.enqueued = time.monotonic()
+        self.wake = wake
+        self.granted = False
+        self.cancelled = False
+        self.waited = 0.0
+
+
+def _resolve(future: asyncio.Future):
+    if not future.done():
+        future.set_result(None)
+
+
+class PolitenessScheduler:
+    """Token bucket per host with a priority queue of waiters and robots.txt-aware rates."""
+
+    def __init__(self, rate: float = DEFAULT_DOMAIN_RATE, burst: int = DEFAULT_DOMAIN_BURST,
+                 respect_robots: bool = DEFAULT_RESPECT_ROBOTS, robots: Optional[RobotsCache] = None,
+                 host_limits: Optional[Dict[str, Tuple[float, int]]] = None):
+        self.rate = max(rate, 1e-3)
+        self.burst = max(1, burst)
+        self.respect_robots = respect_robots
+        self.robots = robots or RobotsCache()
+        self.host_limits = {host.lower(): limits for host, limits in (host_limits or {}).items()}
+        self._cond = threading.Condition()
+        self._hosts: Dict[str, _HostState] = {}
+        self._pending_hosts: set = set()
+        self._seq = itertools.count()
+        self._dispatcher: Optional[threading.Thread] = None
+        # per priority: [granted, total wait, max wait]
+        self._waits: Dict[int, List[float]] = {}
+        self._throttled = 0
+
+    # ------------------------------------------------------------------
+    # Host state
+    # ------------------------------------------------------------------
+    def _state_locked(self, host: str) -> _HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            rate, burst = self.host_limits.get(host, (self.rate, self.burst))
+            state = self._hosts[host] = _HostState(rate, burst)
+        return state
+
+    def _apply_robots(self, url: str):
+        """Slow the host's bucket down to its robots.txt crawl delay (blocking on first lookup)."""
+        if not self.respect_robots:
+            return
+        delay = self.robots.crawl_delay(url)
+        with self._cond:
+            state = self._state_locked(host_of(url))
+            if delay != state.crawl_delay:
+                base_rate, base_burst = self.host_limits.get(host_of(url), (self.rate, self.burst))
+                state.crawl_delay = delay
+                state.rate = min(base_rate, 1.0 / delay) if delay else base_rate
+                state.burst = 1 if delay else base_burst
+                state.tokens = min(state.tokens, float(state.burst))
+
+    def backoff(self, url: str, retry_after: Optional[float] = None):
+        """Pause a host after a 429 for ``retry_after`` seconds (default 30)."""
+        delay = min(retry_after if retry_after is not None else DEFAULT_429_BACKOFF, 10 * DEFAULT_429_BACKOFF)
+        with self._cond:
+            state = self._state_locked(host_of(url))
+            state.blocked_until = max(state.blocked_until, time.monotonic() + delay)
+            state.tokens = 0.0
+            self._throttled += 1
+
+    # ------------------------------------------------------------------
+    # Granting
+    # ------------------------------------------------------------------
+    def _record_grant_locked(self, waiter: _Waiter, now: float):
+        waiter.granted = True
+        waiter.waited = now - waiter.enqueued
+        stats = self._waits.setdefault(waiter.priority, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += waiter.waited
+        stats[2] = max(stats[2], waiter.waited)
+
+    def _grant_locked(self, state: _HostState, now: float) -> Optional[float]:
+        """Grant tokens to the queue head while they last; return when the next one can go."""
+        state.refill(now)
+        while state.waiters:
+            waiter = state.waiters[0][2]
+            if waiter.cancelled:
+                heapq.heappop(state.waiters)
+                continue
+            next_at = state.next_token_at(now)
+            if next_at > now:
+                return next_at
+            heapq.heappop(state.waiters)
+            state.tokens -= 1
+            self._record_grant_locked(waiter, now)
+            waiter.wake()
+        return None
+
+    def _enqueue(self, url: str, priority: int, wake: Callable[[], None]) -> Optional[_Waiter]:
+        """Take a token right away if the host is idle, else queue; None means granted now."""
+        waiter = _Waiter(priority, wake)
+        host = host_of(url)
+        with self._cond:
+            state = self._state_locked(host)
+            now = time.monotonic()
+            state.refill(now)
+            if not state.waiters and state.next_token_at(now) <= now:
+                state.tokens -= 1
+                self._record_grant_locked(waiter, now)
+                return None
+            heapq.heappush(state.waiters, (priority, next(self._seq), waiter))
+            self._pending_hosts.add(host)
+            self._ensure_dispatcher_locked()
+            self._cond.notify()
+        return waiter
+
+    def _ensure_dispatcher_locked(self):
+        if self._dispatcher is None or not self._dispatcher.is_alive():
+            self._dispatcher = threading.Thread(target=self._dispatch, name="scraper-politeness", daemon=True)
+            self._dispatcher.start()
+
+    def _dispatch(self):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                wake_at = None
+                for host in list(self._pending_hosts):
+                    next_at = self._grant_locked(self._hosts[host], now)
+                    if next_at is None:
+                        self._pending_hosts.discard(host)
+                    else:
+                        wake_at = next_at if wake_at is None else min(wake_at, next_at)
+                self._cond.wait(None if wake_at is None else max(0.0, wake_at - time.monotonic()))
+
+    def _cancel(self, url: str, waiter: _Waiter):
+        with self._cond:
+            if waiter.granted:
+                # Woken but no longer wanted: hand the token back
+                state = self._state_locked(host_of(url))
+                state.tokens = min(float(state.burst), state.tokens + 1)
+                self._cond.notify()
+            else:
+                waiter.cancelled = True
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def acquire(self, url: str, priority: int = PRIORITY_INTERACTIVE) -> float:
+        """Block until a request to ``url``'s host may go out; returns the seconds waited."""
+        self._apply_robots(url)
+        event = threading.Event()
+        waiter = self._enqueue(url, priority, event.set)
+        if waiter is None:
+            return 0.0
+        event.wait()
+        return waiter.waited
+
+    async def acquire_async(self, url: str, priority: int = PRIORITY_BATCH) -> float:
+        """Await a request slot for ``url``'s host without blocking the event loop."""
+        if self.respect_robots and not self.robots.is_cached(url):
+            await run_io_bound(self._apply_robots, url)
+        else:
+            self._apply_robots(url)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        waiter = self._enqueue(url, priority, lambda: loop.call_soon_threadsafe(_resolve, future))
+        if waiter is None:
+            return 0.0
+        try:
+            await future
+        except asyncio.CancelledError:
+            self._cancel(url, waiter)
+            raise
+        return waiter.waited
+
+    def metrics(self, max_hosts: int = 50) -> Dict[str, Any]:
+        with self._cond:
+            now = time.monotonic()
+            queued: Dict[str, int] = {}
+            hosts = {}
+            for host, state in self._hosts.items():
+                live = [w for _, _, w in state.waiters if not w.cancelled]
+                for waiter in live:
+                    name = _priority_name(waiter.priority)
+                    queued[name] = queued.get(name, 0) + 1
+                hosts[host] = {
+                    "rate": round(state.rate, 4),
+                    "burst": state.burst,
+                    "crawl_delay": state.crawl_delay,
+                    "queued": len(live),
+                    "paused_for": round(max(0.0, state.blocked_until - now), 3),
+                }
+            waits = {
+                _priority_name(priority): {
+                    "granted": int(granted),
+                    "avg_wait_ms": round(1000 * total / granted, 3) if granted else 0.0,
+                    "max_wait_ms": round(1000 * longest, 3),
+                }
+                for priority, (granted, total, longest) in sorted(self._waits.items())
+            }
+            busiest = dict(sorted(hosts.items(), key=lambda item: -item[1]["queued"])[:max_hosts])
+            return {
+                "default_rate": self.rate,
+                "default_burst": self.burst,
+                "respect_robots": self.respect_robots,
+                "queued": sum(queued.values()),
+                "queued_by_priority": queued,
+                "waits": waits,
+                "throttled_429": self._throttled,
+                "robots_cached": self.robots.size(),
+                "hosts_tracked": len(hosts),
+                "hosts": busiest,
+            }
+
+
+_scheduler: Optional[PolitenessScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_politeness_scheduler() -> PolitenessScheduler:
+    """Process-wide scheduler shared by every ScrapingAgent and crawl."""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = PolitenessScheduler()
+    return _scheduler
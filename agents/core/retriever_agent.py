@@ -1,10 +1,27 @@
 import os
 import pickle
+import threading
+import uuid
+import numpy as np
 from typing import List, Dict, Optional, Any
 from langchain_community.vectorstores import FAISS
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.docstore.document import Document
+from langchain_core.embeddings import Embeddings
+
+from .faiss_wal import FaissWriteAheadLog, atomic_write_bytes
+from .ann_index import (
+    INDEX_TYPES, DEFAULT_NPROBE, DEFAULT_EF_SEARCH,
+    build_index, choose_index_type, extract_vectors, index_type_of, search_parameters,
+)
+from .embedding_cache import (
+    CachedEmbeddings, EmbeddingCacheStore, DEFAULT_EMBEDDING_CACHE_FILENAME, DEFAULT_QUERY_LRU_SIZE,
+)
+from .near_duplicates import (
+    DEFAULT_MAX_HAMMING_DISTANCE, FINGERPRINT_METADATA_KEY, FINGERPRINTS_FILENAME, NearDuplicateIndex,
+    format_fingerprint,
+)
 
 # ---------------------------------------------------------------------------
 # Compatibility Patch: sentence-transformers <=4.1.0 expects `cached_download`
@@ -73,6 +90,26 @@ _CANDIDATE_EMBED_MODELS = [
 
 DEFAULT_FAISS_INDEX_PATH = "faiss_index_store" # Directory to save FAISS index and documents
 
+# "wal": append each batch to a write-ahead segment and compact in the background.
+# "snapshot": rewrite the whole index on every add (original behaviour).
+DEFAULT_PERSISTENCE_MODE = os.getenv("RETRIEVER_PERSISTENCE_MODE", "wal")
+DEFAULT_COMPACTION_THRESHOLD_BYTES = 64 * 1024 * 1024  # WAL bytes that trigger a background compaction
+
+# "memory": read the whole index into private memory (writable).
+# "mmap": map index.faiss read-only (faiss IO_FLAG_MMAP) so several processes share the page cache.
+DEFAULT_LOAD_MODE = os.getenv("RETRIEVER_LOAD_MODE", "memory")
+
+# "flat" (exact), "ivf_flat", "ivf_pq", "hnsw", or "auto" to pick by corpus size
+DEFAULT_INDEX_TYPE = os.getenv("RETRIEVER_INDEX_TYPE", "flat")
+DEFAULT_RETRAIN_GROWTH_FACTOR = 4.0  # retrain IVF indexes once the corpus grows this much since training
+
+# Persistent (model, text-hash) -> vector cache; defaults to <index_path>/embedding_cache.sqlite
+DEFAULT_EMBEDDING_CACHE_PATH = os.getenv("RETRIEVER_EMBEDDING_CACHE")
+DEFAULT_ENABLE_EMBEDDING_CACHE = os.getenv("RETRIEVER_EMBEDDING_CACHE_ENABLED", "true").lower() != "false"
+
+# SimHash every added text and skip those within a few bits of one already indexed
+DEFAULT_DETECT_NEAR_DUPLICATES = os.getenv("RETRIEVER_DEDUP_ENABLED", "true").lower() != "false"
+
 class RetrieverAgent:
     """
     An agent that stores and searches information using text embeddings and a FAISS vector store.
@@ -82,7 +119,20 @@ class RetrieverAgent:
                  model_name: str = DEFAULT_EMBEDDING_MODEL, 
                  index_path: str = DEFAULT_FAISS_INDEX_PATH,
                  chunk_size: int = 1000,
-                 chunk_overlap: int = 100):
+                 chunk_overlap: int = 100,
+                 persistence_mode: str = DEFAULT_PERSISTENCE_MODE,
+                 compaction_threshold_bytes: int = DEFAULT_COMPACTION_THRESHOLD_BYTES,
+                 load_mode: str = DEFAULT_LOAD_MODE,
+                 index_type: str = DEFAULT_INDEX_TYPE,
+                 ann_thresholds: Optional[Dict[str, int]] = None,
+                 nprobe: int = DEFAULT_NPROBE,
+                 ef_search: int = DEFAULT_EF_SEARCH,
+                 retrain_growth_factor: float = DEFAULT_RETRAIN_GROWTH_FACTOR,
+                 enable_embedding_cache: bool = DEFAULT_ENABLE_EMBEDDING_CACHE,
+                 embedding_cache_path: Optional[str] = DEFAULT_EMBEDDING_CACHE_PATH,
+                 query_cache_size: int = DEFAULT_QUERY_LRU_SIZE,
+                 detect_near_duplicates: bool = DEFAULT_DETECT_NEAR_DUPLICATES,
+                 near_duplicate_distance: int = DEFAULT_MAX_HAMMING_DISTANCE):
         """
         Initialize the Retriever Agent.
 
@@ -91,10 +141,46 @@ class RetrieverAgent:
             index_path: Path to the directory where the FAISS index and documents will be stored/loaded.
             chunk_size: Size of text chunks for splitting documents.
             chunk_overlap: Overlap between text chunks.
+            persistence_mode: "wal" (append-only segments + background compaction) or "snapshot".
+            compaction_threshold_bytes: WAL size after which a background compaction is started.
+            load_mode: "memory" (private, writable) or "mmap" (shared, read-only; add_texts is disabled).
+            index_type: "flat", "ivf_flat", "ivf_pq", "hnsw" or "auto" (chosen from ann_thresholds).
+            ann_thresholds: Corpus sizes at which "auto" switches to "ivf_flat" / "ivf_pq".
+            nprobe: Default number of IVF lists probed per query.
+            ef_search: Default HNSW candidate list size per query.
+            retrain_growth_factor: Retrain an IVF index when the corpus has grown by this factor since training.
+            enable_embedding_cache: Cache embeddings on disk keyed by (model, text hash).
+            embedding_cache_path: SQLite file for the cache (defaults to <index_path>/embedding_cache.sqlite).
+            query_cache_size: Number of query embeddings kept in the in-memory LRU.
+            detect_near_duplicates: Fingerprint added texts and skip near-duplicates of indexed ones.
+            near_duplicate_distance: Max SimHash Hamming distance (of 64 bits) counted as a near-duplicate.
         """
+        if persistence_mode not in ("wal", "snapshot"):
+            raise ValueError("persistence_mode must be 'wal' or 'snapshot'")
+        if load_mode not in ("memory", "mmap"):
+            raise ValueError("load_mode must be 'memory' or 'mmap'")
+        if index_type != "auto" and index_type not in INDEX_TYPES:
+            raise ValueError(f"index_type must be 'auto' or one of {INDEX_TYPES}")
+        self.load_mode = load_mode
+        self.read_only = load_mode == "mmap"
+        self.index_type = index_type
+        self.ann_thresholds = ann_thresholds
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.retrain_growth_factor = retrain_growth_factor
+        self._trained_size = 0
         self.index_path = index_path
+        self.persistence_mode = persistence_mode
+        self.compaction_threshold_bytes = compaction_threshold_bytes
+        self._store_lock = threading.RLock()
+        self._compaction_thread: Optional[threading.Thread] = None
+        self.wal: Optional[FaissWriteAheadLog] = None
         self.faiss_file = os.path.join(index_path, "index.faiss")
         self.documents_file = os.path.join(index_path, "documents.pkl") # To store original docs with IDs
+        self.detect_near_duplicates = detect_near_duplicates
+        self.near_duplicates = NearDuplicateIndex(near_duplicate_distance)
+        # (fingerprint, source) reserved by adds that have not reached the store yet; not snapshotted
+        self._pending_fingerprints: set = set()
 
         print(f"Initializing embeddings with model: {model_name}")
         self.embeddings = None
@@ -130,7 +216,7 @@ class RetrieverAgent:
 
             import numpy as _np, hashlib as _hashlib
 
-            class SimpleHashEmbeddings:
+            class SimpleHashEmbeddings(Embeddings):
                 """A minimal, deterministic embeddings fallback using hashing.
                 NOT suitable for production-quality semantic search, but avoids
                 hard runtime failures when no transformer models are available.
@@ -158,6 +244,14 @@ class RetrieverAgent:
                     return self._hash_to_vector(text)
 
             self.embeddings = SimpleHashEmbeddings()
+
+        if enable_embedding_cache:
+            cache_path = embedding_cache_path or os.path.join(index_path, DEFAULT_EMBEDDING_CACHE_FILENAME)
+            try:
+                self.embeddings = CachedEmbeddings(self.embeddings, EmbeddingCacheStore(cache_path), query_lru_size=query_cache_size)
+                print(f"[RetrieverAgent] Embedding cache enabled at {cache_path}")
+            except Exception as e:
+                print(f"[RetrieverAgent] Could not open embedding cache at {cache_path}: {e}. Continuing without it.")
         
         self.text_splitter = RecursiveCharacterTextSplitter(
             chunk_size=chunk_size,
@@ -174,41 +268,189 @@ class RetrieverAgent:
             os.makedirs(self.index_path)
 
     def _load_vector_store(self):
-        """Loads the FAISS index and documents from disk if they exist."""
+        """Loads the FAISS index and documents from disk if they exist, then replays the WAL."""
         self._create_dir_if_not_exists()
         try:
+            if self.persistence_mode == "wal":
+                self.wal = FaissWriteAheadLog(self.index_path)
+                snapshot_dir = self.wal.current_snapshot_dir()
+                if snapshot_dir:
+                    self.faiss_file = os.path.join(snapshot_dir, "index.faiss")
+                    self.documents_file = os.path.join(snapshot_dir, "documents.pkl")
             if os.path.exists(self.faiss_file) and os.path.exists(self.documents_file):
-                print(f"Loading FAISS index from {self.faiss_file}")
-                self.vector_store = FAISS.load_local(self.index_path, self.embeddings, allow_dangerous_deserialization=True)
+                snapshot_dir = os.path.dirname(self.faiss_file)
+                use_mmap = self.read_only
+                if use_mmap and self.wal and self.wal.pending_segments():
+                    # Un-compacted batches would have to be added on top of the mapped index
+                    print("[RetrieverAgent] Write-ahead log has pending batches; loading index into memory instead of mmap.")
+                    use_mmap = False
+                print(f"Loading FAISS index from {self.faiss_file}{' (mmap, read-only)' if use_mmap else ''}")
+                if use_mmap:
+                    self.vector_store = self._load_mmap_store(snapshot_dir)
+                else:
+                    self.vector_store = FAISS.load_local(snapshot_dir, self.embeddings, allow_dangerous_deserialization=True)
                 print(f"Loading documents from {self.documents_file}")
                 with open(self.documents_file, "rb") as f:
                     self.stored_documents = pickle.load(f)
                 print(f"Successfully loaded {len(self.stored_documents)} documents and FAISS index.")
+                self._load_fingerprints(snapshot_dir)
             else:
                 print("No existing FAISS index found. A new one will be created upon adding documents.")
                 # Initialize an empty store if no documents are to be added immediately
                 # self.vector_store = FAISS.from_texts(["_init_placeholder_"], self.embeddings) # Temp init
                 # self.vector_store.delete([self.vector_store.index_to_docstore_id[0]]) # Remove placeholder
+            if self.wal:
+                self._replay_wal()
+            if self.vector_store is not None:
+                self._trained_size = self.vector_store.index.ntotal
+                if not self.read_only:
+                    self._maybe_retrain_index()
         except Exception as e:
             print(f"Error loading FAISS index or documents: {e}. A new store might be created.")
             # Potentially corrupted files, allow to proceed with a new store
             self.vector_store = None 
             self.stored_documents = {}
-
+            self.near_duplicates = NearDuplicateIndex(self.near_duplicates.max_distance)
+
+    def _load_mmap_store(self, snapshot_dir: str) -> FAISS:
+        """Open index.faiss memory-mapped and read-only; only the docstore pickle is read into memory."""
+        import faiss
+        io_flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+        # IO_FLAG_MMAP covers IVF inverted lists; flat (IndexFlatCodes) storage needs IO_FLAG_MMAP_IFC (faiss >= 1.10)
+        io_flags |= getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+        index = faiss.read_index(os.path.join(snapshot_dir, "index.faiss"), io_flags)
+        with open(os.path.join(snapshot_dir, "index.pkl"), "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+        return FAISS(self.embeddings, index, docstore, index_to_docstore_id)
+
+    def reload_vector_store(self):
+        """Re-open the latest snapshot from disk, e.g. in read-only workers after the writer compacted."""
+        with self._store_lock:
+            if self.wal:
+                self.wal.close()
+                self.wal = None
+            self.faiss_file = os.path.join(self.index_path, "index.faiss")
+            self.documents_file = os.path.join(self.index_path, "documents.pkl")
+            self.vector_store = None
+            self.stored_documents = {}
+            self.near_duplicates = NearDuplicateIndex(self.near_duplicates.max_distance)
+            self._load_vector_store()
+
+    def _replay_wal(self):
+        """Re-apply batches written after the last snapshot. Already-present ids are skipped."""
+        replayed = 0
+        known_ids = set(self.vector_store.index_to_docstore_id.values()) if self.vector_store else set()
+        for batch in self.wal.replay():
+            keep = [i for i, doc_id in enumerate(batch["ids"]) if doc_id not in known_ids]
+            if not keep:
+                continue
+            self._add_embeddings_to_store(
+                [batch["texts"][i] for i in keep],
+                batch["embeddings"][keep],
+                [batch["metadatas"][i] for i in keep],
+                [batch["ids"][i] for i in keep],
+            )
+            known_ids.update(batch["ids"][i] for i in keep)
+            self.near_duplicates.add_many(self._fingerprint_entries(batch["metadatas"][i] for i in keep))
+            replayed += len(keep)
+        if replayed:
+            print(f"Replayed {replayed} document chunks from the write-ahead log.")
+
+    @staticmethod
+    def _fingerprint_entries(metadatas) -> List[tuple]:
+        """(fingerprint, source) of each original text; only its first chunk carries the fingerprint."""
+        return [(int(metadata[FINGERPRINT_METADATA_KEY], 16), metadata.get("source", ""))
+                for metadata in metadatas
+                if metadata.get(FINGERPRINT_METADATA_KEY) and metadata.get("chunk_index", 0) == 0]
+
+    def _load_fingerprints(self, snapshot_dir: str):
+        """Restore the fingerprints saved with the snapshot, or rebuild them from chunk metadata."""
+        path = os.path.join(snapshot_dir, FINGERPRINTS_FILENAME)
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                if self.near_duplicates.load_bytes(f.read()):
+                    return
+        docstore = self.vector_store.docstore
+        documents = (docstore.search(doc_id) for doc_id in self.vector_store.index_to_docstore_id.values())
+        entries = self._fingerprint_entries(doc.metadata for doc in documents if isinstance(doc, Document))
+        self.near_duplicates.add_many(entries)
+        if entries:
+            print(f"Rebuilt {len(entries)} near-duplicate fingerprints from document metadata.")
+
+    def _add_embeddings_to_store(self, texts: List[str], vectors, metadatas: List[dict], ids: List[str]):
+        text_embeddings = list(zip(texts, [list(map(float, v)) for v in vectors]))
+        if self.vector_store is None:
+            self.vector_store = FAISS.from_embeddings(text_embeddings, self.embeddings, metadatas=metadatas, ids=ids)
+        else:
+            self.vector_store.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
 
     def _save_vector_store(self):
-        """Saves the FAISS index and documents to disk."""
+        """Saves the FAISS index and documents to disk (full rewrite, temp file plus rename)."""
         self._create_dir_if_not_exists()
         if self.vector_store:
+            import faiss
+            with self._store_lock:
+                index_bytes = faiss.serialize_index(self.vector_store.index).tobytes()
+                docstore_bytes = pickle.dumps((self.vector_store.docstore, self.vector_store.index_to_docstore_id))
+                documents_bytes = pickle.dumps(self.stored_documents)
+                fingerprint_bytes = self.near_duplicates.to_bytes(exclude=self._pending_fingerprints)
             print(f"Saving FAISS index to {self.faiss_file}")
-            self.vector_store.save_local(self.index_path)
+            atomic_write_bytes(os.path.join(self.index_path, "index.pkl"), docstore_bytes)
+            atomic_write_bytes(os.path.join(self.index_path, FINGERPRINTS_FILENAME), fingerprint_bytes)
+            atomic_write_bytes(self.faiss_file, index_bytes)
             print(f"Saving documents to {self.documents_file}")
-            with open(self.documents_file, "wb") as f:
-                pickle.dump(self.stored_documents, f)
+            atomic_write_bytes(self.documents_file, documents_bytes)
             print("FAISS index and documents saved.")
         else:
             print("No vector store to save.")
 
+    def compact(self, wait: bool = True):
+        """
+        Fold the write-ahead log into a new snapshot.
+
+        The in-memory index is serialized under the store lock (a memory copy);
+        writing the snapshot to disk happens outside it so adds can continue.
+        """
+        if self.persistence_mode != "wal":
+            self._save_vector_store()
+            return
+        if self._compaction_thread and self._compaction_thread.is_alive():
+            if wait:
+                self._compaction_thread.join()
+            return
+
+        def _run():
+            import faiss
+            try:
+                with self._store_lock:
+                    if self.vector_store is None:
+                        return
+                    seq = self.wal.rotate()
+                    index_bytes = faiss.serialize_index(self.vector_store.index).tobytes()
+                    docstore_bytes = pickle.dumps((self.vector_store.docstore, self.vector_store.index_to_docstore_id))
+                    documents_bytes = pickle.dumps(self.stored_documents)
+                    fingerprint_bytes = self.near_duplicates.to_bytes(exclude=self._pending_fingerprints)
+                snapshot_dir = self.wal.write_snapshot(seq, index_bytes, docstore_bytes, documents_bytes,
+                                                       extra_files={FINGERPRINTS_FILENAME: fingerprint_bytes})
+                self.faiss_file = os.path.join(snapshot_dir, "index.faiss")
+                self.documents_file = os.path.join(snapshot_dir, "documents.pkl")
+                print(f"[RetrieverAgent] Compacted write-ahead log into {snapshot_dir}")
+            except Exception as e:
+                print(f"[RetrieverAgent] WAL compaction failed: {e}")
+
+        self._compaction_thread = threading.Thread(target=_run, name="retriever-compaction", daemon=True)
+        self._compaction_thread.start()
+        if wait:
+            self._compaction_thread.join()
+
+    def _persist_batch(self, ids: List[str], texts: List[str], metadatas: List[dict], vectors: np.ndarray):
+        if self.persistence_mode == "snapshot":
+            self._save_vector_store()
+            return
+        self.wal.append(ids, texts, metadatas, vectors)
+        if self.wal.bytes_since_snapshot >= self.compaction_threshold_bytes:
+            self.compact(wait=False)
+
     def add_texts(self, texts: List[str], metadatas: Optional[List[dict]] = None) -> List[str]:
         """
         Adds texts to the vector store. Texts are split into chunks.
@@ -220,11 +462,36 @@ class RetrieverAgent:
         Returns:
             A list of document IDs for the added texts.
         """
+        return self.add_texts_with_report(texts, metadatas)["ids"]
+
+    def add_texts_with_report(self, texts: List[str], metadatas: Optional[List[dict]] = None,
+                              skip_near_duplicates: Optional[bool] = None) -> Dict[str, Any]:
+        """
+        Like ``add_texts``, but near-duplicates are skipped before they are embedded.
+
+        Each text is SimHashed and checked against the fingerprints already indexed (and
+        the earlier texts of the same call). A text within ``near_duplicate_distance``
+        bits of one of them is not added.
+
+        Args:
+            texts: A list of text strings to add.
+            metadatas: Optional list of dictionaries, one metadata object per text.
+            skip_near_duplicates: Override the agent's ``detect_near_duplicates`` for this call.
+                True checks even when detection is off for the agent; False still
+                fingerprints the texts (if detection is on) but adds them regardless.
+
+        Returns:
+            {"ids": chunk ids added, "duplicates": [{"index", "source", "duplicate_of", "distance"}]}
+        """
+        report: Dict[str, Any] = {"ids": [], "duplicates": []}
         if not texts:
-            return []
+            return report
+        if self.read_only:
+            raise RuntimeError("RetrieverAgent was loaded with load_mode='mmap' and is read-only; add texts through a writable instance.")
+        skip = self.detect_near_duplicates if skip_near_duplicates is None else skip_near_duplicates
 
         documents_to_add = []
-        doc_ids = []
+        reserved = []  # fingerprints taken by this call, released again if the add never reaches the store
 
         for i, text_content in enumerate(texts):
             # Create LangChain Document objects
@@ -232,6 +499,24 @@ class RetrieverAgent:
             # Ensure basic source if not provided
             if 'source' not in metadata:
                  metadata['source'] = f"text_input_{len(self.stored_documents) + i}"
+
+            if skip or self.detect_near_duplicates:
+                fingerprint = self.near_duplicates.fingerprint(text_content)
+                if fingerprint is not None:
+                    with self._store_lock:
+                        if skip:
+                            match = self.near_duplicates.check_and_add(fingerprint, metadata['source'])
+                        else:
+                            match = None
+                            self.near_duplicates.add(fingerprint, metadata['source'])
+                        if match is None:
+                            self._pending_fingerprints.add((fingerprint, metadata['source']))
+                    if match is not None:
+                        report["duplicates"].append({"index": i, "source": metadata['source'],
+                                                     "duplicate_of": match[0], "distance": match[1]})
+                        continue
+                    reserved.append((fingerprint, metadata['source']))
+                    metadata = {**metadata, FINGERPRINT_METADATA_KEY: format_fingerprint(fingerprint)}
             
             # Split the document
             chunks = self.text_splitter.split_text(text_content)
@@ -244,40 +529,133 @@ class RetrieverAgent:
 
                 doc = Document(page_content=chunk, metadata=chunk_metadata)
                 documents_to_add.append(doc)
-        
+
+        if report["duplicates"]:
+            print(f"Skipping {len(report['duplicates'])} near-duplicate texts.")
+        try:
+            report["ids"] = self._add_documents(documents_to_add, reserved)
+        except BaseException:
+            with self._store_lock:
+                # Still pending means the chunks never reached the store (e.g. embedding failed);
+                # a later failure (persisting, retraining) leaves them indexed, so keep those.
+                for entry in reserved:
+                    if entry in self._pending_fingerprints:
+                        self.near_duplicates.remove(*entry)
+                        self._pending_fingerprints.discard(entry)
+            raise
+        if report["ids"]:
+            print(f"Successfully added {len(texts) - len(report['duplicates'])} original texts (split into {len(documents_to_add)} chunks).")
+        return report
+
+    def _add_documents(self, documents_to_add: List[Document], reserved: List[tuple]) -> List[str]:
         if not documents_to_add:
             print("No processable documents created from input texts.")
             return []
 
+        chunk_texts = [doc.page_content for doc in documents_to_add]
+        chunk_metadatas = [doc.metadata for doc in documents_to_add]
+        # Embed once; the same vectors go into the index and the write-ahead log
+        vectors = np.asarray(self.embeddings.embed_documents(chunk_texts), dtype=np.float32)
+        doc_ids = [str(uuid.uuid4()) for _ in documents_to_add]
+
+        with self._store_lock:
+            if self.vector_store is None:
+                print("Creating new FAISS vector store.")
+            else:
+                print(f"Adding {len(documents_to_add)} document chunks to existing FAISS vector store.")
+            self._add_embeddings_to_store(chunk_texts, vectors, chunk_metadatas, doc_ids)
+            # The chunks are indexed now; the fingerprints stay even if persisting fails below
+            self._pending_fingerprints.difference_update(reserved)
+            retrained = self._maybe_retrain_index()
+            self._persist_batch(doc_ids, chunk_texts, chunk_metadatas, vectors)
+            if retrained and self.persistence_mode == "wal":
+                # Snapshot the new index structure; replayed batches would otherwise land in the old type
+                self.compact(wait=False)
+        return doc_ids # these are the docstore IDs of the added document chunks
+
+    def find_near_duplicates(self, texts: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """For each text, the indexed source it nearly duplicates ({"duplicate_of", "distance"}) or None."""
+        results = []
+        for text in texts:
+            fingerprint = self.near_duplicates.fingerprint(text)
+            match = self.near_duplicates.find(fingerprint) if fingerprint is not None else None
+            results.append({"duplicate_of": match[0], "distance": match[1]} if match else None)
+        return results
+
+    def _target_index_type(self) -> str:
+        if self.index_type == "auto":
+            return choose_index_type(self.vector_store.index.ntotal, self.ann_thresholds)
+        return self.index_type
+
+    def _maybe_retrain_index(self) -> bool:
+        """Retrain when the desired index type changed or an IVF index outgrew its training set."""
         if self.vector_store is None:
-            print("Creating new FAISS vector store.")
-            self.vector_store = FAISS.from_documents(documents_to_add, self.embeddings)
-        else:
-            print(f"Adding {len(documents_to_add)} document chunks to existing FAISS vector store.")
-            # FAISS.add_documents returns list of new docstore_ids.
-            new_doc_ids = self.vector_store.add_documents(documents_to_add)
-            doc_ids.extend(new_doc_ids) # These are IDs for chunks
-
-        # Storing the original texts for context or lookup if needed (mainly for whole text, not chunks)
-        # The actual searchable units in FAISS are chunks.
-        # For simplicity, we're not separately storing original full texts here, relying on chunk metadata.
-        # If you needed to retrieve the *full original text* based on a chunk match,
-        # you would need a more elaborate document storage mechanism.
-        # For now, the source in metadata is the main link.
-
-        self._save_vector_store()
-        print(f"Successfully added {len(texts)} original texts (split into {len(documents_to_add)} chunks).")
-        # The returned IDs are from FAISS for the chunks. For user convenience, maybe return original text identifiers
-        # but FAISS operates on chunk IDs.
-        return doc_ids # these are FAISS internal IDs for the added document chunks
-
-    def search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+            return False
+        current = index_type_of(self.vector_store.index)
+        target = self._target_index_type()
+        n_vectors = self.vector_store.index.ntotal
+        outgrown = current in ("ivf_flat", "ivf_pq") and n_vectors >= self.retrain_growth_factor * max(1, self._trained_size)
+        if target == current and not outgrown:
+            return False
+        self.retrain_index(target)
+        return index_type_of(self.vector_store.index) != current or outgrown
+
+    def retrain_index(self, index_type: Optional[str] = None):
+        """
+        Rebuild the FAISS index as ``index_type`` from the vectors currently stored.
+
+        Vectors are re-added in their original order, so the docstore mapping is unchanged.
+        Retraining an ivf_pq index starts from its (lossy) reconstructed vectors.
+        """
+        with self._store_lock:
+            if self.vector_store is None:
+                return
+            index_type = index_type or self._target_index_type()
+            old_index = self.vector_store.index
+            print(f"[RetrieverAgent] Building {index_type} index over {old_index.ntotal} vectors (was {index_type_of(old_index)}).")
+            self.vector_store.index = build_index(index_type, extract_vectors(old_index), nprobe=self.nprobe, ef_search=self.ef_search)
+            self._trained_size = self.vector_store.index.ntotal
+
+    def get_index_info(self) -> Dict[str, Any]:
+        """Describe the live FAISS index (type, size, search defaults)."""
+        info = {
+            "configured_index_type": self.index_type,
+            "index_type": index_type_of(self.vector_store.index) if self.vector_store else None,
+            "vectors": self.get_document_count(),
+            "trained_size": self._trained_size,
+            "load_mode": self.load_mode,
+            "persistence_mode": self.persistence_mode,
+            "near_duplicates": {"enabled": self.detect_near_duplicates, **self.near_duplicates.metrics()},
+        }
+        if self.vector_store is not None and hasattr(self.vector_store.index, "nlist"):
+            info["nlist"] = self.vector_store.index.nlist
+            info["nprobe"] = self.vector_store.index.nprobe
+        if self.vector_store is not None and hasattr(self.vector_store.index, "hnsw"):
+            info["ef_search"] = self.vector_store.index.hnsw.efSearch
+        return info
+
+    def _search_with_params(self, query: str, k: int, params) -> List[tuple]:
+        """Search the raw index with per-query faiss SearchParameters and map hits back to documents."""
+        vector = np.asarray([self.embeddings.embed_query(query)], dtype=np.float32)
+        scores, indices = self.vector_store.index.search(vector, k, params=params)
+        results = []
+        for score, i in zip(scores[0], indices[0]):
+            if i == -1:
+                continue
+            doc = self.vector_store.docstore.search(self.vector_store.index_to_docstore_id[int(i)])
+            if isinstance(doc, Document):
+                results.append((doc, score))
+        return results
+
+    def search(self, query: str, k: int = 5, nprobe: Optional[int] = None, ef_search: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         Performs a similarity search in the vector store.
 
         Args:
             query: The text query to search for.
             k: The number of top similar documents to retrieve.
+            nprobe: Optional per-query number of IVF lists to probe (IVF indexes only).
+            ef_search: Optional per-query HNSW search depth (HNSW indexes only).
 
         Returns:
             A list of dictionaries, where each dictionary contains 
@@ -289,8 +667,12 @@ class RetrieverAgent:
         
         print(f"Searching for: '{query}' (top {k} results)")
         try:
-            # similarity_search_with_score returns (Document, score) tuples
-            results_with_scores = self.vector_store.similarity_search_with_score(query, k=k)
+            params = search_parameters(self.vector_store.index, nprobe=nprobe, ef_search=ef_search)
+            if params is not None:
+                results_with_scores = self._search_with_params(query, k, params)
+            else:
+                # similarity_search_with_score returns (Document, score) tuples
+                results_with_scores = self.vector_store.similarity_search_with_score(query, k=k)
             
             formatted_results = []
             for doc, score in results_with_scores:
@@ -304,6 +686,12 @@ class RetrieverAgent:
             print(f"Error during search: {e}")
             return []
 
+    def get_embedding_cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for the embedding cache (empty when disabled)."""
+        if isinstance(self.embeddings, CachedEmbeddings):
+            return self.embeddings.stats()
+        return {}
+
     def get_document_count(self) -> int:
         """Returns the total number of document chunks in the store."""
         if self.vector_store and self.vector_store.index:
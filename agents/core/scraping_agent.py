@@ -1,6 +1,12 @@
 import requests
 from bs4 import BeautifulSoup
-from typing import Optional, List, Dict, Any
+from typing import AsyncIterator, Iterable, Optional, List, Dict, Any
+
+from .async_crawler import AsyncCrawler
+from .html_parsers import HtmlParserBackend, get_parser_backend, headline_selector
+from .http_cache import DEFAULT_HTTP_CACHE_ENABLED, HttpPageCache
+from .politeness import (PRIORITY_BATCH, PRIORITY_INTERACTIVE, PolitenessScheduler, get_politeness_scheduler,
+                         retry_after_seconds)
 
 class ScrapingAgent:
     """
@@ -9,9 +15,19 @@ class ScrapingAgent:
     Can be extended with libraries like 'unstructured' for more advanced parsing.
     """
 
-    def __init__(self):
+    def __init__(self, http_cache: Optional[HttpPageCache] = None, use_http_cache: bool = DEFAULT_HTTP_CACHE_ENABLED,
+                 parser_backend: Optional[str] = None, scheduler: Optional[PolitenessScheduler] = None):
         """
         Initialize the scraping agent with a requests session.
+
+        Args:
+            http_cache: On-disk conditional-request cache for fetched pages (created at the
+                default path when omitted and use_http_cache is true).
+            use_http_cache: Set to False to always download full page bodies.
+            parser_backend: HTML parser used for extraction: 'selectolax', 'lxml', 'bs4' or
+                'auto' (default: SCRAPER_HTML_PARSER, else the fastest installed).
+            scheduler: Per-domain rate limiter every request waits on (default: the
+                process-wide scheduler shared with the batch crawl API).
         """
         self.session = requests.Session()
         self.session.headers.update({
@@ -22,25 +38,58 @@ class ScrapingAgent:
             "DNT": "1", # Do Not Track
             "Upgrade-Insecure-Requests": "1"
         })
+        self.parser: HtmlParserBackend = get_parser_backend(parser_backend)
+        self.http_cache = http_cache or (HttpPageCache() if use_http_cache else None)
+        self.scheduler = scheduler or get_politeness_scheduler()
+        # Async engine for bulk crawls; httpx negotiates its own Accept-Encoding
+        crawler_headers = {k: v for k, v in self.session.headers.items() if k.lower() != "accept-encoding"}
+        self.crawler = AsyncCrawler(headers=crawler_headers, sync_fetch=self.fetch_html_content,
+                                    http_cache=self.http_cache, scheduler=self.scheduler)
 
-    def fetch_html_content(self, url: str) -> Optional[str]:
+    def fetch_html_content(self, url: str, priority: int = PRIORITY_INTERACTIVE) -> Optional[str]:
         """
         Fetches the HTML content of a given URL.
 
+        With the HTTP cache enabled, a page still fresh under its Cache-Control max-age is
+        served from disk, and a stale one is revalidated with If-None-Match /
+        If-Modified-Since so an unchanged page costs a 304 instead of the full body.
+        Network requests wait for the host's turn in the politeness scheduler.
+
         Args:
             url: The URL to fetch.
+            priority: Scheduler priority; interactive requests go ahead of batch crawls.
 
         Returns:
             The HTML content as a string, or None if an error occurs.
         """
+        cached = self.http_cache.lookup(url) if self.http_cache else None
+        if cached is not None and cached.is_fresh():
+            return cached.body
         try:
-            response = self.session.get(url, timeout=15) # Increased timeout
+            conditional = cached.conditional_headers() if cached is not None else {}
+            response = self._polite_get(url, priority, conditional)
+            if response.status_code == 304 and cached is not None:
+                page = self.http_cache.revalidated(url, response.headers)
+                if page is not None:
+                    return page.body
+                # The entry was cleared or evicted after the lookup; fetch the full body
+                response = self._polite_get(url, priority, {})
             response.raise_for_status()  # Raise an exception for HTTP errors
+            if self.http_cache:
+                self.http_cache.store(url, response.headers, response.text)
             return response.text
         except requests.exceptions.RequestException as e:
             print(f"Error fetching URL {url}: {e}")
             return None
 
+    def _polite_get(self, url: str, priority: int, headers: Dict[str, str]) -> requests.Response:
+        """One GET after the host's politeness token; a 429 pushes the host's next slot back."""
+        self.scheduler.acquire(url, priority)
+        response = self.session.get(url, timeout=15, headers=headers) # Increased timeout
+        if response.status_code == 429:
+            self.scheduler.backoff(url, retry_after_seconds(response.headers))
+        return response
+
     def get_beautifulsoup_object(self, url: str) -> Optional[BeautifulSoup]:
         """
         Fetches HTML from a URL and returns a BeautifulSoup object.
@@ -68,17 +117,16 @@ class ScrapingAgent:
         Returns:
             A list of headline texts.
         """
-        soup = self.get_beautifulsoup_object(url)
-        headlines = []
-        if soup:
-            if headline_class:
-                elements = soup.find_all(headline_tag, class_=headline_class)
-            else:
-                elements = soup.find_all(headline_tag)
-            
-            for element in elements:
-                headlines.append(element.get_text(strip=True))
-        return headlines
+        html_content = self.fetch_html_content(url)
+        if html_content:
+            return self.parse_headlines(html_content, headline_tag, headline_class)
+        return []
+
+    def parse_headlines(self, html_content: str, headline_tag: str, headline_class: Optional[str] = None) -> List[str]:
+        """
+        Extracts headline texts from already-fetched HTML (see extract_headlines).
+        """
+        return self.parser.select_text(html_content, headline_selector(headline_tag, headline_class), keep_empty=True)
 
     def extract_generic_text(self, url: str) -> Optional[str]:
         """
@@ -91,12 +139,88 @@ class ScrapingAgent:
         Returns:
             A concatenated string of all paragraph texts, or None.
         """
-        soup = self.get_beautifulsoup_object(url)
-        if soup:
-            paragraphs = soup.find_all('p')
-            return "\n".join([p.get_text(strip=True) for p in paragraphs])
+        html_content = self.fetch_html_content(url)
+        if html_content:
+            return self.parse_generic_text(html_content)
         return None
 
+    def parse_generic_text(self, html_content: str) -> str:
+        """
+        Concatenates all paragraph text of already-fetched HTML (see extract_generic_text).
+        """
+        return "\n".join(self.parser.select_text(html_content, "p", keep_empty=True))
+
+    def extract_with_selectors(self, url: str, selectors: Dict[str, str]) -> Optional[Dict[str, List[str]]]:
+        """
+        Extracts named CSS selections from a given URL.
+
+        Args:
+            url: The URL to scrape.
+            selectors: Name -> CSS selector, e.g. {"price": "fin-streamer[data-field=regularMarketPrice]",
+                "links": "h3 a@href"}. A trailing '@attr' returns that attribute instead of the text.
+
+        Returns:
+            Name -> list of matched texts, or None if the page could not be fetched.
+        """
+        html_content = self.fetch_html_content(url)
+        if html_content:
+            return self.parse_with_selectors(html_content, selectors)
+        return None
+
+    def parse_with_selectors(self, html_content: str, selectors: Dict[str, str]) -> Dict[str, List[str]]:
+        """
+        Runs named CSS selectors over already-fetched HTML, parsing it only once.
+        """
+        return self.parser.select_all(html_content, selectors)
+
+    async def crawl_async(self, urls: Iterable[str], mode: str = "text", headline_tag: Optional[str] = None,
+                          headline_class: Optional[str] = None,
+                          selectors: Optional[Dict[str, str]] = None,
+                          priority: int = PRIORITY_BATCH) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Fetches many URLs concurrently and yields one result dict per URL as each completes.
+
+        Args:
+            urls: The URLs to crawl (duplicates are fetched once).
+            mode: 'html' (raw body), 'text' (paragraph text), 'headlines' (needs headline_tag)
+                or 'select' (needs selectors).
+            headline_tag: The HTML tag for headlines when mode is 'headlines'.
+            headline_class: Optional CSS class of the headline elements.
+            selectors: Name -> CSS selector when mode is 'select' (see extract_with_selectors).
+            priority: Politeness-scheduler priority (background batch by default).
+
+        Yields:
+            Dicts with url, status_code, elapsed, error and the extracted 'html', 'text',
+            'headlines' or 'selections'.
+        """
+        if mode == "headlines" and not headline_tag:
+            raise ValueError("headline_tag is required when mode is 'headlines'")
+        if mode == "select" and not selectors:
+            raise ValueError("selectors are required when mode is 'select'")
+        if mode == "text":
+            process = lambda html: {"text": self.parse_generic_text(html)}
+        elif mode == "headlines":
+            process = lambda html: {"headlines": self.parse_headlines(html, headline_tag, headline_class)}
+        elif mode == "select":
+            process = lambda html: {"selections": self.parse_with_selectors(html, selectors)}
+        elif mode == "html":
+            process = None
+        else:
+            raise ValueError(f"Unknown crawl mode '{mode}'; expected 'html', 'text', 'headlines' or 'select'")
+        async for result in self.crawler.crawl(urls, process=process, priority=priority):
+            yield result
+
+    def get_status(self) -> Dict[str, Any]:
+        """
+        Returns the parser backend and the crawler, HTTP cache and rate-limiter counters.
+        """
+        return {
+            "parser": self.parser.name,
+            "http_cache": self.http_cache.metrics() if self.http_cache else {"enabled": False},
+            "crawler": self.crawler.metrics(),
+            "politeness": self.scheduler.metrics(),
+        }
+
     def extract_with_unstructured(self, url: Optional[str] = None, html_content: Optional[str] = None) -> Optional[List[Dict[str, Any]]]:
         """
         Uses the 'unstructured' library to extract elements from a URL or direct HTML content.
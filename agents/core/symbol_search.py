@@ -0,0 +1,141 @@
+"""symbol_search.py
+Offline symbol search over the listing universe loaded by ``ticker_entities``.
+
+Used by ``MarketDataAgent.search_stocks`` so autocomplete-style lookups ("app",
+"micros", "nvdia", "bank of am") are answered from memory instead of a Yahoo call.
+Two structures are kept:
+
+- a sorted list of lowercase keys (symbols, names and every word start inside a name
+  or alias) searched with ``bisect`` for prefix matches
+- a trigram inverted index over symbols, names and aliases for typo-tolerant matching,
+  scored with the best Dice coefficient of the trigram sets of any one field
+
+Exact and prefix hits always rank above fuzzy ones; the trigram pass only runs when the
+prefix pass found fewer than ``limit`` results.
+"""
+from __future__ import annotations
+
+import bisect
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .ticker_entities import SymbolRecord, get_ticker_extractor, normalize_symbol
+
+DEFAULT_SEARCH_LIMIT = 10
+DEFAULT_MIN_FUZZY_SCORE = 0.45
+
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9&]+")
+
+
+def _normalize(text: str) -> str:
+    return _NON_ALNUM_RE.sub(" ", text.lower()).strip()
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SymbolSearchIndex:
+    """Prefix and trigram index over symbols, company names and aliases."""
+
+    def __init__(self, records: Iterable[SymbolRecord]):
+        self.records: List[SymbolRecord] = list(records)
+        self._by_symbol: Dict[str, int] = {}
+        # (key, record id, match kind) sorted by key for bisect prefix scans
+        prefix_keys: Dict[Tuple[str, int], str] = {}
+        # Every symbol, name and alias is a separate field: (record id, trigram count)
+        self._fields: List[Tuple[int, int]] = []
+        self._trigram_postings: Dict[str, List[int]] = {}
+
+        for rid, record in enumerate(self.records):
+            self._by_symbol[record.symbol] = rid
+            prefix_keys[(record.symbol.lower(), rid)] = "symbol"
+            names = [_normalize(record.name), *(_normalize(alias) for alias in record.aliases)]
+            for name in filter(None, names):
+                words = name.split()
+                for start in range(len(words)):
+                    key = " ".join(words[start:])
+                    prefix_keys.setdefault((key, rid), "name" if start == 0 else "word")
+
+            for text in dict.fromkeys(filter(None, [record.symbol.lower(), *names])):
+                grams = _trigrams(text)
+                for gram in grams:
+                    self._trigram_postings.setdefault(gram, []).append(len(self._fields))
+                self._fields.append((rid, len(grams)))
+
+        entries = sorted((key, rid, kind) for (key, rid), kind in prefix_keys.items())
+        self._keys = [key for key, _, _ in entries]
+        self._key_entries = [(rid, kind) for _, rid, kind in entries]
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def _prefix_matches(self, raw_query: str, query: str, limit: int) -> Dict[int, Tuple[float, str]]:
+        matches: Dict[int, Tuple[float, str]] = {}
+        symbol = normalize_symbol(raw_query)
+        if symbol in self._by_symbol:
+            matches[self._by_symbol[symbol]] = (1.0, "symbol")
+
+        # Scan at most a bounded window of keys sharing the prefix, then rank them
+        start = bisect.bisect_left(self._keys, query)
+        for i in range(start, min(start + 50 * limit, len(self._keys))):
+            key = self._keys[i]
+            if not key.startswith(query):
+                break
+            rid, kind = self._key_entries[i]
+            exact = key == query
+            # Shorter completions rank higher; symbols above full names above inner words
+            base = {"symbol": 0.9, "name": 0.85, "word": 0.75}[kind] + (0.05 if exact else 0.0)
+            score = base - 0.1 * (1 - len(query) / len(key))
+            if score > matches.get(rid, (0.0, ""))[0]:
+                matches[rid] = (round(score, 4), f"{kind}_prefix" if not exact else kind)
+        return matches
+
+    def _fuzzy_matches(self, query: str, min_score: float) -> Dict[int, Tuple[float, str]]:
+        grams = _trigrams(query)
+        shared: Dict[int, int] = {}
+        for gram in grams:
+            for field in self._trigram_postings.get(gram, ()):
+                shared[field] = shared.get(field, 0) + 1
+        matches: Dict[int, Tuple[float, str]] = {}
+        for field, count in shared.items():
+            rid, field_grams = self._fields[field]
+            # Dice coefficient, scaled below every prefix hit
+            score = round(0.7 * 2 * count / (len(grams) + field_grams), 4)
+            if score >= 0.7 * min_score and score > matches.get(rid, (0.0, ""))[0]:
+                matches[rid] = (score, "fuzzy")
+        return matches
+
+    def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT,
+               min_fuzzy_score: float = DEFAULT_MIN_FUZZY_SCORE) -> List[Dict]:
+        """Ranked matches for ``query`` as result dicts with ``score`` and ``match`` fields."""
+        normalized = _normalize(query)
+        if not normalized or limit <= 0:
+            return []
+        matches = self._prefix_matches(query, normalized, limit)
+        if len(matches) < limit:
+            for rid, hit in self._fuzzy_matches(normalized, min_fuzzy_score).items():
+                matches.setdefault(rid, hit)
+        ranked = sorted(matches.items(), key=lambda item: (-item[1][0], len(self.records[item[0]].symbol)))
+        results = []
+        for rid, (score, kind) in ranked[:limit]:
+            result = self.records[rid].to_dict()
+            result.update({"industry": "N/A", "score": score, "match": kind})
+            results.append(result)
+        return results
+
+
+_index: Optional[SymbolSearchIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_symbol_search_index() -> SymbolSearchIndex:
+    """Process-wide search index over the shared extractor's listing universe."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SymbolSearchIndex(get_ticker_extractor().records.values())
+    return _index
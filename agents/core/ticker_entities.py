@@ -0,0 +1,245 @@
+"""ticker_entities.py
+Shared ticker/company-name entity extractor.
+
+The symbol universe is loaded once from ``data/ticker_symbols.csv`` (symbol, name,
+exchange, sector and ``;``-separated name aliases) plus any listing files named in
+``TICKER_SYMBOLS_PATH`` (``os.pathsep``-separated). Those may be further files in the
+same CSV format or NASDAQ Trader symbol directory files (``nasdaqlisted.txt`` /
+``otherlisted.txt``), which together cover the full US listing of roughly 12k symbols.
+
+Two indexes are built from it:
+
+- a hash index of symbols, for tokens written as tickers (``AAPL``, ``$TSLA``, ``BRK.B``)
+- a token trie of company-name aliases, for names of one or more words ("bank of america")
+
+``extract`` tokenizes the text once and, at each token, takes the longest alias in the
+trie or a symbol hit, so the cost is linear in the length of the text regardless of how
+many symbols are loaded.
+"""
+from __future__ import annotations
+
+import csv
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_SYMBOLS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "ticker_symbols.csv")
+EXTRA_SYMBOLS_PATHS = [p for p in os.getenv("TICKER_SYMBOLS_PATH", "").split(os.pathsep) if p]
+
+# Uppercase words that look like tickers but are far more often plain English or finance
+# jargon. They still match when written as a cashtag ("$ON") or through a company alias.
+COMMON_UPPERCASE_WORDS = {
+    "A", "I", "AM", "AN", "ANY", "ARE", "AS", "AT", "BE", "BY", "CAN", "DO", "FOR", "FROM", "GO",
+    "HAS", "HOW", "IF", "IN", "IS", "IT", "ME", "MY", "NO", "NOT", "NOW", "OF", "OK", "ON", "ONE",
+    "OR", "OUR", "OUT", "SO", "THE", "THAT", "THIS", "TO", "UP", "US", "WE", "WHAT", "WHO", "WHY",
+    "WILL", "WITH", "ALL", "LOW", "KEY", "CAT", "SEE", "WELL", "RACE", "NET", "ARM",
+    "AI", "API", "ATH", "CEO", "CFO", "CPI", "EPS", "ESG", "ETF", "EU", "EUR", "EV", "FED", "GDP",
+    "IPO", "PE", "PM", "QOQ", "SEC", "TV", "UK", "USA", "USD", "YOY",
+}
+
+# Corporate suffixes stripped from listing names to derive an alias ("Apple Inc." -> "apple")
+_NAME_SUFFIXES = {
+    "inc", "incorporated", "corp", "corporation", "co", "company", "companies", "ltd", "limited",
+    "plc", "llc", "lp", "holdings", "holding", "group", "sa", "se", "nv", "ag", "the", "class", "common",
+    "stock", "shares", "ordinary", "american", "depositary", "ads", "adr", "a", "b", "c",
+}
+# Derived one-word aliases that are ordinary words and would fire on unrelated text
+_AMBIGUOUS_NAME_WORDS = {
+    "target", "block", "square", "progressive", "delta", "chase", "shell", "zoom", "match", "general",
+    "global", "first", "united", "american", "national", "international", "energy", "capital", "digital",
+    "public", "realty", "health", "financial", "bank", "trust", "the", "lucid", "vertex", "cadence", "unity",
+}
+
+_TOKEN_RE = re.compile(r"\$?[A-Za-z0-9][A-Za-z0-9&.'\-]*")
+_SYMBOL_RE = re.compile(r"^[A-Z]{1,5}(?:[.\-][A-Z])?$")
+
+
+def normalize_symbol(symbol: str) -> str:
+    """Yahoo-style symbol: uppercase with share classes written ``BRK-B``."""
+    return symbol.strip().lstrip("$").upper().replace(".", "-").replace("/", "-")
+
+
+def _normalize_token(token: str) -> str:
+    token = token.lower().rstrip(".-'")
+    if token.endswith("'s"):
+        token = token[:-2]
+    return token
+
+
+def _alias_tokens(alias: str) -> List[str]:
+    return [t for t in (_normalize_token(m.group()) for m in _TOKEN_RE.finditer(alias)) if t]
+
+
+def derive_alias(name: str) -> Optional[str]:
+    """Best-effort company alias from a listing name, or None when it would be too ambiguous."""
+    name = name.split(" - ")[0]
+    tokens = _alias_tokens(name.replace(",", " "))
+    while tokens and tokens[-1].replace(".", "") in _NAME_SUFFIXES:
+        tokens.pop()
+    while tokens and tokens[0] == "the":
+        tokens.pop(0)
+    if not tokens:
+        return None
+    if len(tokens) == 1 and (len(tokens[0]) < 4 or tokens[0] in _AMBIGUOUS_NAME_WORDS):
+        return None
+    return " ".join(tokens)
+
+
+class SymbolRecord:
+    """One listed security."""
+
+    __slots__ = ("symbol", "name", "exchange", "sector", "aliases")
+
+    def __init__(self, symbol: str, name: str, exchange: str = "", sector: str = "", aliases: Iterable[str] = ()):
+        self.symbol = symbol
+        self.name = name
+        self.exchange = exchange
+        self.sector = sector
+        self.aliases = list(aliases)
+
+    def to_dict(self) -> Dict[str, str]:
+        return {"symbol": self.symbol, "name": self.name, "exchange": self.exchange, "sector": self.sector}
+
+
+def _read_csv_listing(path: str) -> Iterable[SymbolRecord]:
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            symbol = (row.get("symbol") or "").strip()
+            if not symbol:
+                continue
+            aliases = [a.strip() for a in (row.get("aliases") or "").split(";") if a.strip()]
+            yield SymbolRecord(normalize_symbol(symbol), row.get("name", "").strip(),
+                               row.get("exchange", "").strip(), row.get("sector", "").strip(), aliases)
+
+
+def _read_nasdaq_trader_listing(path: str) -> Iterable[SymbolRecord]:
+    """NASDAQ Trader symbol directory files: pipe-delimited with a trailing "File Creation Time" row."""
+    exchanges = {"A": "NYSE American", "N": "NYSE", "P": "NYSE Arca", "Z": "Cboe BZX", "V": "IEX"}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f, delimiter="|"):
+            symbol = (row.get("Symbol") or row.get("ACT Symbol") or "").strip()
+            if not symbol or symbol.startswith("File Creation Time") or row.get("Test Issue") == "Y":
+                continue
+            name = (row.get("Security Name") or "").strip()
+            exchange = exchanges.get(row.get("Exchange", ""), "NASDAQ" if "Market Category" in row else "")
+            alias = derive_alias(name)
+            yield SymbolRecord(normalize_symbol(symbol), name, exchange, "ETF" if row.get("ETF") == "Y" else "",
+                               [alias] if alias else [])
+
+
+def load_symbol_records(paths: Iterable[str]) -> List[SymbolRecord]:
+    """Read every listing file; the first record seen for a symbol wins."""
+    records: Dict[str, SymbolRecord] = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            header = f.readline()
+        reader = _read_nasdaq_trader_listing if "|" in header else _read_csv_listing
+        for record in reader(path):
+            records.setdefault(record.symbol, record)
+    return list(records.values())
+
+
+class TickerEntityExtractor:
+    """Finds ticker symbols and company names in free text with one pass over its tokens."""
+
+    def __init__(self, records: Iterable[SymbolRecord]):
+        self.records: Dict[str, SymbolRecord] = {}
+        # Token trie of aliases; the "" key of a node holds the symbol of the alias ending there
+        self._alias_trie: Dict[str, dict] = {}
+        for record in records:
+            if record.symbol in self.records:
+                continue
+            self.records[record.symbol] = record
+            for alias in record.aliases:
+                self._add_alias(alias, record.symbol)
+
+    @classmethod
+    def from_files(cls, paths: Iterable[str]) -> "TickerEntityExtractor":
+        return cls(load_symbol_records(paths))
+
+    def _add_alias(self, alias: str, symbol: str):
+        tokens = _alias_tokens(alias)
+        if not tokens:
+            return
+        node = self._alias_trie
+        for token in tokens:
+            node = node.setdefault(token, {})
+        node.setdefault("", symbol)  # earlier records keep an alias they share with later ones
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def get(self, symbol: str) -> Optional[SymbolRecord]:
+        return self.records.get(normalize_symbol(symbol))
+
+    def _symbol_hit(self, raw: str, include_unknown: bool) -> Optional[str]:
+        cashtag = raw.startswith("$")
+        word = raw.lstrip("$").rstrip(".-'")
+        if word.endswith("'s"):
+            word = word[:-2]
+        if not cashtag and (not word.isupper() or len(word) < 2 or word in COMMON_UPPERCASE_WORDS):
+            return None
+        symbol = normalize_symbol(word)
+        if symbol in self.records:
+            return symbol
+        if include_unknown and _SYMBOL_RE.match(word.upper()) and (cashtag or len(word) <= 5):
+            return symbol
+        return None
+
+    def extract(self, text: str, include_unknown: bool = False) -> List[str]:
+        """
+        Return the ticker symbols mentioned in ``text`` in order of first mention.
+
+        Company aliases match case-insensitively, longest alias first ("bank of america"
+        over "america"). Symbols match when written in uppercase or as a cashtag; common
+        words such as "IT" or "ON" need the cashtag. With ``include_unknown`` uppercase
+        words that look like tickers but are not in the index are returned too, so symbols
+        missing from a small listing file still reach the market agent.
+        """
+        raw_tokens = [m.group() for m in _TOKEN_RE.finditer(text)]
+        tokens = [_normalize_token(t.lstrip("$")) for t in raw_tokens]
+        found: Dict[str, None] = {}
+        i, n = 0, len(tokens)
+        while i < n:
+            # Longest company alias starting at this token
+            node, j, match_symbol, match_end = self._alias_trie, i, None, i
+            while j < n and tokens[j] in node:
+                node = node[tokens[j]]
+                j += 1
+                if "" in node:
+                    match_symbol, match_end = node[""], j
+            symbol = self._symbol_hit(raw_tokens[i], include_unknown)
+            if symbol and match_end <= i + 1:
+                found.setdefault(symbol, None)
+                i += 1
+            elif match_symbol:
+                found.setdefault(match_symbol, None)
+                i = match_end
+            else:
+                i += 1
+        return list(found)
+
+    def extract_one(self, text: str, default: Optional[str] = None, include_unknown: bool = True) -> Optional[str]:
+        """First known ticker mentioned in ``text``, else the first unknown one, else ``default``."""
+        tickers = self.extract(text) or (self.extract(text, include_unknown=True) if include_unknown else [])
+        return tickers[0] if tickers else default
+
+
+_extractor: Optional[TickerEntityExtractor] = None
+_extractor_lock = threading.Lock()
+
+
+def get_ticker_extractor() -> TickerEntityExtractor:
+    """Process-wide extractor, built from the listing files on first use."""
+    global _extractor
+    if _extractor is None:
+        with _extractor_lock:
+            if _extractor is None:
+                _extractor = TickerEntityExtractor.from_files([DEFAULT_SYMBOLS_FILE, *EXTRA_SYMBOLS_PATHS])
+    return _extractor
+
+
+def extract_tickers(text: str, include_unknown: bool = False) -> List[str]:
+    """Tickers mentioned in ``text`` using the shared extractor."""
+    return get_ticker_extractor().extract(text, include_unknown=include_unknown)
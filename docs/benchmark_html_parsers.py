@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Parse and extract time per HTML parser backend on a corpus of finance pages.
+
+The default corpus is generated deterministically and mirrors the pages the
+orchestrator scrapes: a quote page (deep nested layout, scripts, a news stream), a
+markets news index, a wire article and a long 10-K filing rendered as HTML tables.
+To benchmark real pages instead, save them once and point ``--corpus`` at the
+directory (every ``*.html`` file is used with the generic selectors):
+
+    python docs/benchmark_html_parsers.py --save-corpus bench_pages \\
+        https://finance.yahoo.com/quote/AAPL https://www.reuters.com/markets/
+    python docs/benchmark_html_parsers.py --corpus bench_pages
+
+For each page and installed backend (selectolax, lxml, bs4) the median parse time and
+the median time to run the page's selectors are reported, along with the number of
+items each backend extracted so differences in results are visible. Run from the
+repository root.
+"""
+
+import argparse
+import glob
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agents.core.html_parsers import available_parser_backends, get_parser_backend
+
+GENERIC_SELECTORS = {"headlines": "h1, h2, h3", "paragraphs": "p", "links": "a@href"}
+
+WORDS = ("shares stocks rose fell percent quarter earnings revenue guidance investors analysts Fed rates "
+         "inflation yields bonds dollar oil chipmakers outlook forecast margin demand supply buyback dividend "
+         "index futures trading session Nasdaq S&P Dow Treasury consumer spending growth").split()
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _chrome(rng: random.Random, body: str, title: str) -> str:
+    """Site header, nav, footer and script blobs that real pages carry around the content."""
+    nav = "".join(f'<li class="nav-item"><a href="/section/{i}" class="nav-link">{rng.choice(WORDS).title()}</a></li>'
+                  for i in range(40))
+    scripts = "".join(f"<script>window.__DATA_{i}__ = {{\"k\": \"{'x' * 400}\"}};</script>" for i in range(25))
+    footer = "".join(f'<div class="footer-col"><a href="/legal/{i}">{_sentence(rng, 3)}</a></div>' for i in range(30))
+    return (f"<!DOCTYPE html><html lang=\"en\"><head><meta charset=\"utf-8\"><title>{title}</title>"
+            f"<link rel=\"stylesheet\" href=\"/static/app.css\">{scripts}</head><body>"
+            f"<header id=\"site-header\"><nav><ul class=\"nav\">{nav}</ul></nav></header>"
+            f"<main id=\"main\">{body}</main><footer>{footer}</footer></body></html>")
+
+
+def quote_page(rng: random.Random) -> str:
+    stats = "".join(f'<tr><td class="label">{rng.choice(WORDS).title()}</td>'
+                    f'<td class="value"><fin-streamer data-field="f{i}">{rng.uniform(1, 500):.2f}</fin-streamer></td></tr>'
+                    for i in range(40))
+    stream = "".join(f'<li class="stream-item"><div class="content"><h3 class="clamp"><a href="/news/{i}">'
+                     f'{_sentence(rng, 10)}</a></h3><p class="summary">{_sentence(rng, 30)}</p>'
+                     f'<div class="meta"><span>{rng.randint(1, 59)}m ago</span></div></div></li>' for i in range(60))
+    wrappers = "<div class=\"wrap\">" * 12
+    body = (f'{wrappers}<section class="quote-header"><h1>Apple Inc. (AAPL)</h1>'
+            f'<fin-streamer data-field="regularMarketPrice" class="price">{rng.uniform(150, 250):.2f}</fin-streamer>'
+            f'</section><table class="quote-stats">{stats}</table><ul class="news-stream">{stream}</ul>'
+            f'{"</div>" * 12}')
+    return _chrome(rng, body, "Apple Inc. (AAPL) Stock Price, News, Quote")
+
+
+def news_index(rng: random.Random) -> str:
+    cards = "".join(f'<article class="story-card"><a class="media" href="/markets/{i}"><img src="/img/{i}.jpg" alt=""></a>'
+                    f'<h3 class="story-title"><a href="/markets/{i}">{_sentence(rng, 12)}</a></h3>'
+                    f'<p class="story-summary">{_sentence(rng, 25)}</p><time>{rng.randint(1, 23)}h ago</time></article>'
+                    for i in range(150))
+    return _chrome(rng, f"<h1>Markets</h1><section class=\"story-list\">{cards}</section>", "Markets News")
+
+
+def wire_article(rng: random.Random) -> str:
+    paragraphs = "".join(f'<p data-testid="paragraph-{i}">{_sentence(rng, rng.randint(20, 60))}</p>' for i in range(45))
+    related = "".join(f'<li><a href="/related/{i}">{_sentence(rng, 9)}</a></li>' for i in range(20))
+    body = (f'<article><h1 data-testid="Heading">{_sentence(rng, 12)}</h1><div class="byline">By Staff</div>'
+            f'<div class="article-body">{paragraphs}</div></article><aside><h2>Related</h2><ul>{related}</ul></aside>')
+    return _chrome(rng, body, "Wire story")
+
+
+def filing_10k(rng: random.Random) -> str:
+    sections = []
+    for item in range(1, 16):
+        table = "".join("<tr>" + "".join(f"<td style=\"text-align:right\">{rng.randint(100, 99999):,}</td>" for _ in range(6))
+                        + "</tr>" for _ in range(30))
+        paragraphs = "".join(f"<p><span style=\"font-family:Times\">{_sentence(rng, 70)}</span></p>" for _ in range(40))
+        sections.append(f"<div><h2>Item {item}.</h2>{paragraphs}<table class=\"fin\">{table}</table></div>")
+    return f"<html><body>{''.join(sections)}</body></html>"
+
+
+GENERATED = {
+    "quote_page.html": (quote_page, {"price": "fin-streamer[data-field=regularMarketPrice]",
+                                     "headlines": "li.stream-item h3", "stats": "table.quote-stats td.value"}),
+    "news_index.html": (news_index, {"headlines": "h3.story-title", "links": "h3.story-title a@href"}),
+    "wire_article.html": (wire_article, {"title": "h1", "paragraphs": "div.article-body p"}),
+    "filing_10k.html": (filing_10k, {"items": "h2", "paragraphs": "p", "cells": "table.fin td"}),
+}
+
+
+def load_corpus(directory):
+    if directory:
+        return [(os.path.basename(path), open(path, encoding="utf-8", errors="replace").read(), GENERIC_SELECTORS)
+                for path in sorted(glob.glob(os.path.join(directory, "*.html")))]
+    rng = random.Random(11)
+    return [(name, build(rng), selectors) for name, (build, selectors) in GENERATED.items()]
+
+
+def save_corpus(directory, urls):
+    from agents.core.scraping_agent import ScrapingAgent
+    os.makedirs(directory, exist_ok=True)
+    agent = ScrapingAgent(use_http_cache=False)
+    for i, url in enumerate(urls):
+        html = agent.fetch_html_content(url)
+        if html:
+            path = os.path.join(directory, f"{i:03d}_{url.split('//')[-1].replace('/', '_')[:60]}.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(html)
+            print(f"saved {url} -> {path} ({len(html):,} chars)")
+
+
+def median_ms(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return 1000 * statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="Directory of saved *.html pages (default: generated corpus)")
+    parser.add_argument("--save-corpus", metavar="DIR", help="Fetch the given URLs into DIR and exit")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("urls", nargs="*")
+    args = parser.parse_args()
+
+    if args.save_corpus:
+        save_corpus(args.save_corpus, args.urls)
+        return
+
+    backends = available_parser_backends()
+    print(f"backends: {', '.join(backends)}")
+    totals = {name: 0.0 for name in backends}
+    for page, html, selectors in load_corpus(args.corpus):
+        print(f"\n{page} ({len(html):,} chars)")
+        for name in backends:
+            backend = get_parser_backend(name)
+            parse_ms = median_ms(lambda: backend.parse(html), args.repeat)
+            document = backend.parse(html)
+            extract_ms = median_ms(lambda: [backend.select(document, s) for s in selectors.values()], args.repeat)
+            counts = ", ".join(f"{key}={len(backend.select(document, s))}" for key, s in selectors.items())
+            totals[name] += parse_ms + extract_ms
+            print(f"  {name:>10}: parse {parse_ms:8.2f} ms  extract {extract_ms:8.2f} ms  ({counts})")
+
+    print("\ntotal parse+extract per corpus pass:")
+    for name in backends:
+        print(f"  {name:>10}: {totals[name]:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Throughput of the local DistilBART fallback under concurrent load, with and without the
+micro-batching queue in front of the pipeline.
+
+Fires ``--concurrency`` simultaneous ``summarize_async`` calls on the local backend and
+reports wall time and requests per second. Run from the repository root:
+
+    python docs/benchmark_local_batching.py --concurrency 32 --batch-size 8 --wait-ms 10
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agents.core.language_agent import LanguageAgent
+
+SAMPLE = (
+    "Apple reported quarterly revenue of $94.9 billion, up 6 percent year over year, as services revenue "
+    "reached an all-time high. iPhone sales grew in most regions while Greater China declined. The board "
+    "declared a cash dividend and authorised an additional $110 billion for share repurchases. Management "
+    "guided to low-to-mid single digit growth next quarter, citing foreign exchange headwinds."
+)
+
+
+async def run_load(agent: LanguageAgent, concurrency: int) -> float:
+    start = time.perf_counter()
+    await asyncio.gather(*(agent.summarize_async(f"{SAMPLE} (request {i})", max_words=60) for i in range(concurrency)))
+    return time.perf_counter() - start
+
+
+async def run(args):
+    for label, batching in (("batch size 1", False), (f"micro-batched ({args.batch_size})", True)):
+        agent = LanguageAgent(local_batching=batching, local_batch_size=args.batch_size,
+                              local_batch_wait_ms=args.wait_ms)
+        agent.client, agent.backend = None, "local"
+        agent.warm_up(background=False)
+        await run_load(agent, min(args.concurrency, 2))  # warm the pipeline
+        elapsed = await run_load(agent, args.concurrency)
+        print(f"{label:>22}: {elapsed:7.2f} s, {args.concurrency / elapsed:6.2f} req/s")
+        if batching:
+            print(f"{'':>22}  {agent.get_status()['local_batching']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--wait-ms", type=float, default=10.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
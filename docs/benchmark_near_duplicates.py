@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Fingerprinting and lookup cost of the retriever's near-duplicate index.
+
+Builds a ``NearDuplicateIndex`` of ``--size`` random fingerprints, then reports the
+time to SimHash an article-length text and the median lookup latency. It also checks
+how far typical republishing edits (dateline, agency tail, a few reworded phrases)
+move an article's fingerprint compared with an unrelated article, which is what the
+``RETRIEVER_DEDUP_MAX_DISTANCE`` threshold has to separate. Run from the repository
+root; only numpy is required.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agents.core.near_duplicates import NearDuplicateIndex, hamming_distance, simhash
+
+WORDS = ("shares stocks rose fell percent quarter earnings revenue guidance investors analysts Fed rates "
+         "inflation yields bonds dollar oil chipmakers outlook forecast margin demand supply buyback dividend "
+         "index futures trading session Nasdaq S&P Dow Treasury consumer spending growth").split()
+
+
+def article(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def republished(rng: random.Random, text: str) -> str:
+    """The same story as another outlet runs it."""
+    words = text.split()
+    for _ in range(3):
+        words[rng.randrange(len(words))] = rng.choice(WORDS)
+    return "NEW YORK (Reuters) - " + " ".join(words) + " Reporting by Staff; Editing by Desk."
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=200_000, help="Fingerprints in the index")
+    parser.add_argument("--words", type=int, default=500, help="Words per generated article")
+    parser.add_argument("--lookups", type=int, default=5_000)
+    parser.add_argument("--max-distance", type=int, default=None)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    index = NearDuplicateIndex() if args.max_distance is None else NearDuplicateIndex(args.max_distance)
+    start = time.perf_counter()
+    index.add_many((rng.getrandbits(64), f"doc-{i}") for i in range(args.size))
+    print(f"indexed {args.size:,} fingerprints in {time.perf_counter() - start:.2f} s "
+          f"(max_distance={index.max_distance})")
+
+    texts = [article(rng, args.words) for _ in range(200)]
+    start = time.perf_counter()
+    fingerprints = [simhash(text) for text in texts]
+    print(f"simhash: {1000 * (time.perf_counter() - start) / len(texts):.3f} ms per {args.words}-word article")
+
+    timings = []
+    for _ in range(args.lookups):
+        query = rng.getrandbits(64)
+        start = time.perf_counter()
+        index.find(query)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    print(f"lookup: median {1e6 * statistics.median(timings):.1f} us, "
+          f"p99 {1e6 * timings[int(0.99 * len(timings))]:.1f} us")
+
+    variants = [hamming_distance(fp, simhash(republished(rng, text))) for text, fp in zip(texts, fingerprints)]
+    unrelated = [hamming_distance(a, b) for a, b in zip(fingerprints, fingerprints[1:])]
+    flagged = sum(distance <= index.max_distance for distance in variants)
+    false_hits = sum(distance <= index.max_distance for distance in unrelated)
+    print(f"republished copies: median {statistics.median(variants)} bits, max {max(variants)}, "
+          f"flagged {flagged}/{len(variants)}")
+    print(f"unrelated articles: min {min(unrelated)} bits, flagged {false_hits}/{len(unrelated)}")
+
+
+if __name__ == "__main__":
+    main()
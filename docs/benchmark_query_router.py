@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the orchestrator's QueryRouter.
+
+Compares the compiled single-pass classifier against the previous implementation
+(one ``re.findall`` per pattern plus separate substring passes, reproduced below
+as ``LegacyQueryRouter``) on a corpus of sample queries, after checking that both
+route every query identically. Run from the repository root:
+
+    python docs/benchmark_query_router.py --repeat 200
+"""
+
+import argparse
+import contextlib
+import itertools
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from orchestrator.orchestrator_fastapi import QueryRouter
+
+TEMPLATES = [
+    "What's the current stock price of {name}?",
+    "Show me the latest news about {name} and its earnings",
+    "Compare {ticker} vs {other} performance over the last quarter",
+    "Explain what a P/E ratio is and how it applies to {name}",
+    "How does the tech sector in Asia look today?",
+    "Find stored research documents about {name} revenue growth",
+    "What is our risk exposure in Asia tech stocks today?",
+    "Give me an overview of {name}'s dividend yield and valuation",
+    "Any breaking headlines from Reuters or Bloomberg on {ticker}?",
+    "Analyze the portfolio allocation across healthcare and energy",
+    "Why did {name} shares drop after the 10-K filing?",
+    "Recommend a hedge strategy for a volatile market",
+    "Tell me about recent SEC filing updates for {ticker}",
+    "Summarize historical trading volume for {ticker} on NASDAQ",
+    "Is {name} a better investment than {other_name} right now?",
+    "Define market cap and explain the concept with an example",
+    "Retrieve saved insights on emerging market economic trends",
+    "hello",
+]
+COMPANIES = [("AAPL", "Apple"), ("MSFT", "Microsoft"), ("TSLA", "Tesla"), ("NVDA", "Nvidia"),
+             ("AMZN", "Amazon"), ("GOOGL", "Alphabet"), ("META", "Meta Platforms"), ("TSM", "TSMC")]
+
+
+class LegacyQueryRouter(QueryRouter):
+    """The pre-compilation classifier: one regex scan per pattern, then substring passes."""
+
+    def classify_query(self, query):
+        query_lower = query.lower()
+        agent_scores = {}
+        for agent_type, patterns in self.patterns.items():
+            score = 0
+            for pattern in patterns:
+                score += len(re.findall(pattern, query_lower))
+            if score > 0:
+                agent_scores[agent_type] = score
+
+        has_financial_terms = any(term in query_lower for term in self.FINANCIAL_TERMS)
+        if has_financial_terms and "market_data" not in agent_scores:
+            agent_scores["market_data"] = 1
+        if any(indicator in query_lower for indicator in self.COMPLEX_INDICATORS):
+            agent_scores["analysis"] = agent_scores.get("analysis", 0) + 2
+        if any(word in query_lower for word in self.INFO_SEEKING):
+            agent_scores["retrieval"] = agent_scores.get("retrieval", 0) + 1
+        if any(word in query_lower for word in self.CURRENT_INFO):
+            agent_scores["scraping"] = agent_scores.get("scraping", 0) + 1
+        if any(phrase in query_lower for phrase in self.EDUCATIONAL):
+            agent_scores["explanation"] = agent_scores.get("explanation", 0) + 1
+
+        sorted_agents = sorted(agent_scores.items(), key=lambda x: x[1], reverse=True)
+        threshold = max(1, max(agent_scores.values()) * 0.3) if agent_scores else 1
+        selected_agents = [agent for agent, score in sorted_agents if score >= threshold]
+        if len(selected_agents) < 2 and agent_scores:
+            remaining_agents = [agent for agent, score in sorted_agents if agent not in selected_agents]
+            selected_agents.extend(remaining_agents[:2 - len(selected_agents)])
+        if not selected_agents:
+            selected_agents = ["market_data", "explanation"] if has_financial_terms else ["explanation", "retrieval"]
+        selected_agents = selected_agents[:4]
+        print(f"DEBUG: Query '{query}' scored agents: {agent_scores}")
+        print(f"DEBUG: Selected agents: {selected_agents}")
+        return selected_agents
+
+
+def build_corpus():
+    corpus = []
+    for template, (ticker, name), (other, other_name) in itertools.product(TEMPLATES, COMPANIES, COMPANIES[::-1]):
+        if ticker != other:
+            corpus.append(template.format(ticker=ticker, name=name, other=other, other_name=other_name))
+    return list(dict.fromkeys(corpus))
+
+
+def queries_per_second(router, corpus, repeat):
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for query in corpus:
+                router.classify_query(query)
+        elapsed = time.perf_counter() - start
+    return repeat * len(corpus) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    legacy, compiled = LegacyQueryRouter(), QueryRouter()
+    corpus = build_corpus()
+
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        mismatches = [q for q in corpus if legacy.classify_query(q) != compiled.classify_query(q)]
+    print(f"{len(corpus)} sample queries, {len(mismatches)} routing differences")
+    for query in mismatches[:5]:
+        print(f"  differs: {query!r}")
+
+    legacy_qps = queries_per_second(legacy, corpus, args.repeat)
+    compiled_qps = queries_per_second(compiled, corpus, args.repeat)
+    print(f"{'legacy (re.findall per pattern)':>34}: {legacy_qps:>10,.0f} queries/s")
+    print(f"{'compiled (single pass)':>34}: {compiled_qps:>10,.0f} queries/s  ({compiled_qps / legacy_qps:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Recall/latency benchmark for the RetrieverAgent FAISS index types.
+
+Generates clustered synthetic 384-d vectors (roughly how sentence embeddings
+group by topic), computes exact top-k neighbours with a flat index, then sweeps
+nprobe (IVF) and efSearch (HNSW) and reports recall@k against the exact answer
+together with the mean per-query latency. Run from the repository root:
+
+    python docs/benchmark_retriever_ann.py --size 200000 --queries 500
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agents.core.ann_index import build_index, search_parameters
+
+DIM = 384
+
+
+def clustered_vectors(n: int, n_clusters: int, rng) -> np.ndarray:
+    centers = rng.standard_normal((n_clusters, DIM)).astype(np.float32)
+    labels = rng.integers(0, n_clusters, size=n)
+    return centers[labels] + 0.35 * rng.standard_normal((n, DIM)).astype(np.float32)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    hits = sum(len(set(f[f >= 0]) & set(t)) for f, t in zip(found, truth))
+    return hits / (len(truth) * k)
+
+
+def timed_search(index, queries: np.ndarray, k: int, params=None):
+    start = time.perf_counter()
+    if params is None:
+        _, found = index.search(queries, k)
+    else:
+        _, found = index.search(queries, k, params=params)
+    return found, 1000 * (time.perf_counter() - start) / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--types", nargs="+", default=["ivf_flat", "ivf_pq", "hnsw"])
+    args = parser.parse_args()
+
+    import faiss
+    faiss.omp_set_num_threads(1)  # per-query latency, not batch throughput
+
+    rng = np.random.default_rng(0)
+    vectors = clustered_vectors(args.size, max(16, args.size // 500), rng)
+    queries = vectors[rng.choice(args.size, args.queries, replace=False)] + 0.05 * rng.standard_normal((args.queries, DIM)).astype(np.float32)
+
+    flat = build_index("flat", vectors)
+    truth, flat_ms = timed_search(flat, queries, args.k)
+    print(f"\n{args.size} vectors, {args.queries} queries, recall@{args.k} vs exact search")
+    print(f"{'index':>9} {'param':>14} {'build s':>8} {'recall':>7} {'ms/query':>9}")
+    print(f"{'flat':>9} {'-':>14} {'-':>8} {1.0:>7.3f} {flat_ms:>9.3f}")
+
+    for index_type in args.types:
+        start = time.perf_counter()
+        index = build_index(index_type, vectors)
+        build_s = time.perf_counter() - start
+        if index_type == "hnsw":
+            sweep = [("efSearch", value, search_parameters(index, ef_search=value)) for value in (16, 32, 64, 128, 256)]
+        else:
+            sweep = [("nprobe", value, search_parameters(index, nprobe=value)) for value in (1, 4, 16, 64, 128)]
+        for name, value, params in sweep:
+            found, ms = timed_search(index, queries, args.k, params)
+            print(f"{index_type:>9} {f'{name}={value}':>14} {build_s:>8.1f} {recall_at_k(found, truth):>7.3f} {ms:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for RetrieverAgent index loading: load_mode="memory" vs load_mode="mmap".
+
+Builds synthetic FAISS stores of increasing size (random 384-d vectors, short
+placeholder chunks), then times re-opening each store in both modes and reports
+the resident memory added by the load. Run from the repository root:
+
+    python docs/benchmark_retriever_startup.py --sizes 10000 100000 500000
+"""
+
+import argparse
+import gc
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from langchain_community.vectorstores import FAISS
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain.docstore.document import Document
+from agents.core.retriever_agent import RetrieverAgent
+
+DIM = 384
+
+
+def rss_mb() -> float:
+    """Current resident set size in MB (Linux /proc; 0 elsewhere)."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def build_store(path: str, n: int, embeddings):
+    import faiss
+    rng = np.random.default_rng(0)
+    index = faiss.IndexFlatL2(DIM)
+    for start in range(0, n, 50_000):
+        index.add(rng.random((min(50_000, n - start), DIM), dtype=np.float32))
+    ids = [str(i) for i in range(n)]
+    docstore = InMemoryDocstore({doc_id: Document(page_content=f"chunk {doc_id}", metadata={"source": "bench"}) for doc_id in ids})
+    FAISS(embeddings, index, docstore, dict(enumerate(ids))).save_local(path)
+    with open(os.path.join(path, "documents.pkl"), "wb") as f:
+        pickle.dump({}, f)  # same as a fresh RetrieverAgent store
+
+
+def time_load(agent: RetrieverAgent, path: str, mode: str):
+    agent.index_path = path
+    agent.load_mode = mode
+    agent.read_only = mode == "mmap"
+    agent.vector_store = None
+    gc.collect()
+    rss_before = rss_mb()
+    start = time.perf_counter()
+    agent.reload_vector_store()
+    elapsed = time.perf_counter() - start
+    return elapsed, rss_mb() - rss_before, agent.get_document_count()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 500_000])
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="retriever_bench_")
+    try:
+        agent = RetrieverAgent(index_path=os.path.join(workdir, "empty"), persistence_mode="snapshot")
+        print(f"\n{'chunks':>10} {'index MB':>9} {'mode':>7} {'load s':>8} {'+RSS MB':>8}")
+        for n in args.sizes:
+            path = os.path.join(workdir, f"store_{n}")
+            build_store(path, n, agent.embeddings)
+            index_mb = os.path.getsize(os.path.join(path, "index.faiss")) / 2**20
+            for mode in ("mmap", "memory"):
+                elapsed, rss_delta, count = time_load(agent, path, mode)
+                assert count == n, f"expected {n} vectors, loaded {count}"
+                print(f"{n:>10} {index_mb:>9.1f} {mode:>7} {elapsed:>8.3f} {rss_delta:>8.1f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Latency benchmark for the offline symbol search behind MarketDataAgent.search_stocks.
+
+Builds the index from the bundled listing (plus any files in TICKER_SYMBOLS_PATH) and
+times autocomplete-style queries: exact symbols, name prefixes and misspellings. Run
+from the repository root:
+
+    python docs/benchmark_symbol_search.py --repeat 2000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from agents.core.symbol_search import SymbolSearchIndex
+from agents.core.ticker_entities import get_ticker_extractor
+
+QUERIES = ["AAPL", "app", "micro", "microsft", "nvdia", "bank of am", "goldman", "tesle",
+           "brk.b", "coca", "jp morgan", "semicon", "gogle", "berk", "a", "xyzq"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args()
+
+    records = list(get_ticker_extractor().records.values())
+    start = time.perf_counter()
+    index = SymbolSearchIndex(records)
+    print(f"indexed {len(index)} symbols in {1000 * (time.perf_counter() - start):.1f} ms")
+
+    for query in QUERIES:
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            results = index.search(query, limit=args.limit)
+            timings.append(time.perf_counter() - start)
+        top = ", ".join(f"{r['symbol']}({r['match']})" for r in results[:3]) or "-"
+        print(f"{query!r:>14}: median {1e6 * statistics.median(timings):7.1f} us  top: {top}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,18 @@
 from fastapi import FastAPI, HTTPException, Query, Path, Body
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, HttpUrl, Field
-from typing import List, Optional, Dict, Any
+from typing import List, Literal, Optional, Dict, Any
+import json
 import os
 
 from agents.core.scraping_agent import ScrapingAgent
+from agents.core.html_parsers import headline_selector
 from agents.core.market_agent import MarketDataAgent
 from agents.core.retriever_agent import RetrieverAgent, DEFAULT_FAISS_INDEX_PATH as DEFAULT_RETRIEVER_INDEX_PATH
 from agents.core.analysis_agent import AnalysisAgent
-from agents.core.language_agent import LanguageAgent
+from agents.core.language_agent import LanguageAgent, DEFAULT_MAP_CHUNK_CHARS
 from agents.core.voice_agent import VoiceAgent
+from agents.core.executors import run_io_bound, run_cpu_bound, get_executor_metrics
 
 # NLTK and SSL setup - run once at startup for any NLTK-dependent features
 try:
@@ -68,6 +72,20 @@ class ExtractHeadlinesRequest(BaseModel):
     tag: str = Query(..., description="HTML tag for headlines (e.g., h1, h2, a)")
     css_class: Optional[str] = Query(None, description="Optional CSS class of headline elements")
 
+MAX_BATCH_SCRAPE_URLS = 500
+
+class ExtractSelectorsRequest(BaseModel):
+    url: HttpUrl
+    selectors: Dict[str, str] = Field(..., description="Name -> CSS selector; a trailing '@attr' returns that attribute")
+
+class ScrapeBatchRequest(BaseModel):
+    urls: List[HttpUrl] = Field(..., description=f"URLs to crawl concurrently (at most {MAX_BATCH_SCRAPE_URLS})")
+    mode: Literal["html", "text", "headlines", "select"] = Field("text", description="What to return per page")
+    tag: Optional[str] = Field(None, description="HTML tag for headlines (required when mode is 'headlines')")
+    css_class: Optional[str] = Field(None, description="Optional CSS class of headline elements")
+    selectors: Optional[Dict[str, str]] = Field(None, description="Name -> CSS selector (required when mode is 'select')")
+    stream: bool = Field(True, description="Stream one NDJSON line per page as it completes instead of one JSON body")
+
 # --- Pydantic Models for Market Data Agent --- #
 class StockSymbolPath(BaseModel):
     symbol: str = Path(..., description="Stock symbol (e.g., AAPL, GOOGL)", min_length=1, max_length=10)
@@ -79,10 +97,16 @@ class StockPriceParams(BaseModel):
 class AddTextsRequest(BaseModel):
     texts: List[str] = Field(..., min_items=1, description="List of text strings to add.")
     metadatas: Optional[List[Dict[str, Any]]] = Field(None, description="Optional list of metadata dictionaries, one per text.")
+    skip_near_duplicates: Optional[bool] = Field(None, description="Skip texts that nearly duplicate indexed ones (default: the retriever's setting).")
+
+class NearDuplicatesRequest(BaseModel):
+    texts: List[str] = Field(..., min_items=1, description="Texts to check against the indexed documents.")
 
 class SearchQueryRequest(BaseModel):
     query: str = Field(..., description="The text query to search for.")
     k: int = Field(5, gt=0, le=50, description="Number of top similar documents to retrieve.")
+    nprobe: Optional[int] = Field(None, gt=0, description="IVF indexes: number of inverted lists to probe (higher = better recall, slower).")
+    ef_search: Optional[int] = Field(None, gt=0, description="HNSW indexes: candidate list size during search (higher = better recall, slower).")
 
 # --- Pydantic Models for Analysis Agent --- #
 class InvestmentParams(BaseModel):
@@ -128,6 +152,7 @@ class StockPriceCompareResponse(BaseModel):
 class SummarizeRequest(BaseModel):
     text: str = Field(..., description="Text to summarize.")
     max_words: Optional[int] = Field(150, ge=20, le=500, description="Approximate maximum word count for the summary.")
+    map_reduce: Optional[bool] = Field(None, description="Summarize chunk by chunk, then the chunk summaries. Default: only when the text is longer than one chunk.")
 
 class SummarizeResponse(BaseModel):
     summary: str
@@ -178,7 +203,7 @@ async def fetch_html_endpoint(request: ScrapeUrlRequest) -> Dict[str, Any]:
     """
     Fetches the raw HTML content from the provided URL.
     """
-    html_content = scraping_agent_instance.fetch_html_content(str(request.url))
+    html_content = await run_io_bound(scraping_agent_instance.fetch_html_content, str(request.url))
     if not html_content:
         raise HTTPException(status_code=404, detail=f"Failed to fetch HTML from {request.url}. Check URL or server logs.")
     return {"url": str(request.url), "html_sample": html_content[:1000] + "... (truncated)", "length": len(html_content)}
@@ -188,11 +213,16 @@ async def extract_headlines_endpoint(request: ExtractHeadlinesRequest) -> Dict[s
     """
     Extracts headlines from a URL based on HTML tag and optional CSS class.
     """
-    headlines = scraping_agent_instance.extract_headlines(
-        url=str(request.url), 
-        headline_tag=request.tag, 
-        headline_class=request.css_class
-    )
+    try:
+        headline_selector(request.tag, request.css_class)
+        headlines = await run_io_bound(
+            scraping_agent_instance.extract_headlines,
+            url=str(request.url), 
+            headline_tag=request.tag, 
+            headline_class=request.css_class
+        )
+    except Exception as e:  # invalid tag, or selector syntax rejected by the parser backend
+        raise HTTPException(status_code=400, detail=f"Selector error: {e}")
     if not headlines:
         # Differentiate between no headlines found and actual error if possible
         # For now, just returning empty or raising if fetch itself failed (handled by agent)
@@ -204,18 +234,33 @@ async def extract_text_endpoint(request: ScrapeUrlRequest) -> Dict[str, Any]:
     """
     Extracts all paragraph text from a given URL.
     """
-    text_content = scraping_agent_instance.extract_generic_text(str(request.url))
+    text_content = await run_io_bound(scraping_agent_instance.extract_generic_text, str(request.url))
     if not text_content:
         raise HTTPException(status_code=404, detail=f"Failed to extract text from {request.url}. Check URL or server logs.")
     return {"url": str(request.url), "text_sample": text_content[:1000] + "... (truncated)", "length": len(text_content)}
 
+@app.post("/scrape/select", summary="Extract CSS Selections from URL", tags=["Scraping Agent"])
+async def extract_selectors_endpoint(request: ExtractSelectorsRequest) -> Dict[str, Any]:
+    """
+    Extracts the text (or '@attr' attribute) of every element matching each named CSS selector.
+    """
+    if not request.selectors:
+        raise HTTPException(status_code=400, detail="At least one selector is required.")
+    try:
+        selections = await run_io_bound(scraping_agent_instance.extract_with_selectors, str(request.url), request.selectors)
+    except Exception as e:  # invalid selector syntax surfaces from the parser backend
+        raise HTTPException(status_code=400, detail=f"Selector error: {e}")
+    if selections is None:
+        raise HTTPException(status_code=404, detail=f"Failed to fetch HTML from {request.url}. Check URL or server logs.")
+    return {"url": str(request.url), "parser": scraping_agent_instance.parser.name, "selections": selections}
+
 @app.post("/scrape/unstructured", summary="Extract Elements with Unstructured.io", tags=["Scraping Agent"])
 async def extract_unstructured_endpoint(request: ScrapeUrlRequest) -> Dict[str, Any]:
     """
     Processes a URL using Unstructured.io to extract structured elements.
     Requires 'unstructured' library to be installed with appropriate extras.
     """
-    elements = scraping_agent_instance.extract_with_unstructured(url=str(request.url))
+    elements = await run_io_bound(scraping_agent_instance.extract_with_unstructured, url=str(request.url))
     if elements is None: # Could be due to fetch error or unstructured error
         # The agent prints specific errors to console, here we give a general one
         raise HTTPException(status_code=500, detail=f"Failed to process {str(request.url)} with Unstructured. Check server logs for details.")
@@ -225,6 +270,53 @@ async def extract_unstructured_endpoint(request: ScrapeUrlRequest) -> Dict[str,
 
     return {"url": str(request.url), "element_count": len(elements), "elements_sample": [el for el in elements[:3]]} # Sample of first 3 elements
 
+@app.post("/scrape/batch", summary="Crawl Many URLs Concurrently", tags=["Scraping Agent"])
+async def scrape_batch_endpoint(request: ScrapeBatchRequest):
+    """
+    Fetches all URLs concurrently (bounded globally and per host, over pooled keep-alive
+    connections) and extracts each page according to `mode`. With `stream` (the default)
+    the response is NDJSON with one result per line in completion order; otherwise all
+    results are returned together once the last page finishes.
+    """
+    if not request.urls:
+        raise HTTPException(status_code=400, detail="At least one URL is required.")
+    if len(request.urls) > MAX_BATCH_SCRAPE_URLS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SCRAPE_URLS} URLs per batch.")
+    if request.mode == "headlines" and not request.tag:
+        raise HTTPException(status_code=400, detail="'tag' is required when mode is 'headlines'.")
+    if request.mode == "headlines":
+        try:
+            headline_selector(request.tag, request.css_class)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Selector error: {e}")
+    if request.mode == "select" and not request.selectors:
+        raise HTTPException(status_code=400, detail="'selectors' are required when mode is 'select'.")
+
+    results = scraping_agent_instance.crawl_async(
+        [str(url) for url in request.urls], mode=request.mode,
+        headline_tag=request.tag, headline_class=request.css_class, selectors=request.selectors
+    )
+    if request.stream:
+        async def ndjson():
+            async for result in results:
+                yield json.dumps(result) + "\n"
+        return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+    collected = [result async for result in results]
+    failed = sum(1 for result in collected if result["error"])
+    return {"count": len(collected), "succeeded": len(collected) - failed, "failed": failed, "results": collected}
+
+@app.get("/scrape/stats", summary="Crawler Statistics", tags=["Scraping Agent"])
+async def get_scrape_stats_endpoint() -> Dict[str, Any]:
+    """Returns crawler, HTTP cache and per-domain rate limiter counters (queue depth, wait times)."""
+    return scraping_agent_instance.get_status()
+
+@app.delete("/scrape/cache", summary="Clear the HTTP page cache", tags=["Scraping Agent"])
+async def clear_scrape_cache_endpoint() -> Dict[str, Any]:
+    if scraping_agent_instance.http_cache:
+        await run_io_bound(scraping_agent_instance.http_cache.clear)
+    return {"cleared": bool(scraping_agent_instance.http_cache)}
+
 # --- Market Data Agent Endpoints --- #
 
 @app.get("/market/stock/{symbol}/price", summary="Get Stock Price (Yahoo Finance)", tags=["Market Data Agent"])
@@ -232,7 +324,7 @@ async def get_stock_price_endpoint(
     symbol: str = Path(..., description="Stock symbol (e.g., AAPL)", min_length=1, max_length=10),
     period: str = Query("1mo", description="Period for historical data ('1d', '5d', '1mo', ..., 'max')")
 ) -> Dict:
-    data = market_agent_instance.get_stock_price(symbol.upper(), period=period)
+    data = await run_io_bound(market_agent_instance.get_stock_price, symbol.upper(), period=period)
     if "error" in data:
         raise HTTPException(status_code=404, detail=data["error"])
     return data
@@ -241,7 +333,7 @@ async def get_stock_price_endpoint(
 async def get_earnings_data_endpoint(
     symbol: str = Path(..., description="Stock symbol (e.g., AAPL)", min_length=1, max_length=10)
 ) -> Dict:
-    data = market_agent_instance.get_earnings_data(symbol.upper())
+    data = await run_io_bound(market_agent_instance.get_earnings_data, symbol.upper())
     if "error" in data:
         raise HTTPException(status_code=404, detail=data["error"])
     return data
@@ -250,7 +342,7 @@ async def get_earnings_data_endpoint(
 async def get_company_info_endpoint(
     symbol: str = Path(..., description="Stock symbol (e.g., AAPL)", min_length=1, max_length=10)
 ) -> Dict:
-    data = market_agent_instance.get_company_info(symbol.upper())
+    data = await run_io_bound(market_agent_instance.get_company_info, symbol.upper())
     if "error" in data:
         raise HTTPException(status_code=404, detail=data["error"])
     return data
@@ -262,7 +354,7 @@ async def get_alpha_vantage_data_endpoint(
 ) -> Dict:
     if not market_agent_instance.alpha_vantage_api_key:
         raise HTTPException(status_code=501, detail="AlphaVantage API key not configured in the server.")
-    data = market_agent_instance.get_alpha_vantage_data(symbol.upper(), function=av_function)
+    data = await run_io_bound(market_agent_instance.get_alpha_vantage_data, symbol.upper(), function=av_function)
     if "error" in data:
         # AlphaVantage often returns errors within a 200 response, so check content
         if "Error Message" in data or "Information" in data: # Common AV error/info keys
@@ -272,15 +364,25 @@ async def get_alpha_vantage_data_endpoint(
         raise HTTPException(status_code=404, detail="No data received from AlphaVantage.")
     return data
     
-@app.get("/market/search/{query}", summary="Search for Stocks (Basic)", tags=["Market Data Agent"])
+@app.get("/market/search/{query}", summary="Search for Stocks", tags=["Market Data Agent"])
 async def search_stocks_endpoint(
-    query: str = Path(..., description="Company name or symbol to search for")
+    query: str = Path(..., description="Company name or symbol to search for (prefixes and typos allowed)"),
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of ranked results"),
+    local_only: bool = Query(False, description="Only search the offline symbol index, never call Yahoo")
 ) -> Dict:
-    data = market_agent_instance.search_stocks(query)
+    if local_only:
+        # The offline index answers in microseconds; no need to leave the event loop
+        return market_agent_instance.search_stocks(query, limit=limit, local_only=True)
+    data = await run_io_bound(market_agent_instance.search_stocks, query, limit=limit)
     if "error" in data:
         raise HTTPException(status_code=500, detail=data["error"])
     return data
 
+@app.get("/market/cache/stats", summary="Market Data Cache Statistics", tags=["Market Data Agent"])
+async def get_market_cache_stats_endpoint() -> Dict:
+    """Returns hit/miss/coalesced counters per data class and LRU eviction counts."""
+    return market_agent_instance.get_cache_stats()
+
 # --- Retriever Agent Endpoints --- #
 
 @app.post("/retriever/add", summary="Add texts to the vector store", tags=["Retriever Agent"])
@@ -294,10 +396,13 @@ async def add_texts_to_retriever(request: AddTextsRequest) -> Dict[str, Any]:
             raise HTTPException(status_code=400, 
                                 detail="Number of texts and metadatas must match if metadatas are provided.")
         
-        doc_ids = retriever_agent_instance.add_texts(texts=request.texts, metadatas=request.metadatas)
+        report = await run_cpu_bound(retriever_agent_instance.add_texts_with_report, texts=request.texts,
+                                     metadatas=request.metadatas, skip_near_duplicates=request.skip_near_duplicates)
+        added = len(request.texts) - len(report["duplicates"])
         return {
-            "message": f"Successfully added {len(request.texts)} texts (split into chunks).", 
-            "faiss_chunk_ids": doc_ids,
+            "message": f"Successfully added {added} texts (split into chunks).", 
+            "faiss_chunk_ids": report["ids"],
+            "skipped_near_duplicates": report["duplicates"],
             "total_document_chunks": retriever_agent_instance.get_document_count()
         }
     except Exception as e:
@@ -305,13 +410,26 @@ async def add_texts_to_retriever(request: AddTextsRequest) -> Dict[str, Any]:
         print(f"Error in /retriever/add: {e}")
         raise HTTPException(status_code=500, detail=f"An error occurred while adding texts: {str(e)}")
 
+@app.post("/retriever/duplicates", summary="Check texts for near-duplicates in the vector store", tags=["Retriever Agent"])
+async def find_near_duplicates_in_retriever(request: NearDuplicatesRequest) -> List[Optional[Dict[str, Any]]]:
+    """
+    For each text, the source of the indexed document it nearly duplicates (SimHash
+    distance within the retriever's threshold), or null. Nothing is added.
+    """
+    try:
+        return await run_cpu_bound(retriever_agent_instance.find_near_duplicates, request.texts)
+    except Exception as e:
+        print(f"Error in /retriever/duplicates: {e}")
+        raise HTTPException(status_code=500, detail=f"An error occurred while checking for duplicates: {str(e)}")
+
 @app.post("/retriever/search", summary="Search for similar texts in the vector store", tags=["Retriever Agent"])
 async def search_in_retriever(request: SearchQueryRequest) -> List[Dict[str, Any]]:
     """
     Performs a similarity search for the given query in the Retriever Agent's vector store.
     """
     try:
-        results = retriever_agent_instance.search(query=request.query, k=request.k)
+        results = await run_cpu_bound(retriever_agent_instance.search, query=request.query, k=request.k,
+                                      nprobe=request.nprobe, ef_search=request.ef_search)
         if results is None: # Should not happen if agent.search is robust, but as a safeguard
             raise HTTPException(status_code=500, detail="Search returned an unexpected None result.")
         return results
@@ -329,7 +447,9 @@ async def get_retriever_info() -> Dict[str, Any]:
             "index_path": retriever_agent_instance.index_path,
             "embedding_model": retriever_agent_instance.embeddings.model_name,
             "total_document_chunks": retriever_agent_instance.get_document_count(),
-            "known_sources": retriever_agent_instance.list_all_chunk_sources()
+            "known_sources": retriever_agent_instance.list_all_chunk_sources(),
+            "index": retriever_agent_instance.get_index_info(),
+            "embedding_cache": retriever_agent_instance.get_embedding_cache_stats()
         }
     except Exception as e:
         print(f"Error in /retriever/info: {e}")
@@ -395,14 +515,20 @@ async def compare_stock_prices_api(ticker: str = Query(..., example="AAPL", desc
 
 @app.post("/language/summarize", response_model=SummarizeResponse, summary="Summarize text", tags=["Language Agent"])
 async def summarize_text_api(request_body: SummarizeRequest):
-    summary = language_agent_instance.summarize(request_body.text, max_words=request_body.max_words)
+    map_reduce = request_body.map_reduce
+    if map_reduce is None:
+        map_reduce = len(request_body.text) > DEFAULT_MAP_CHUNK_CHARS.get(language_agent_instance.backend, DEFAULT_MAP_CHUNK_CHARS["local"])
+    if map_reduce:
+        summary = await language_agent_instance.summarize_long_async(request_body.text, max_words=request_body.max_words)
+    else:
+        summary = await language_agent_instance.summarize_async(request_body.text, max_words=request_body.max_words)
     if not summary:
         raise HTTPException(status_code=400, detail="Could not generate summary. Ensure text is non-empty.")
     return SummarizeResponse(summary=summary)
 
 @app.post("/language/explain", response_model=ExplainResponse, summary="Explain text", tags=["Language Agent"])
 async def explain_text_api(request_body: ExplainRequest):
-    explanation = language_agent_instance.explain(request_body.text, target_audience=request_body.audience)
+    explanation = await language_agent_instance.explain_async(request_body.text, target_audience=request_body.audience)
     if not explanation:
         raise HTTPException(status_code=400, detail="Could not generate explanation. Ensure text is non-empty.")
     return ExplainResponse(explanation=explanation)
@@ -417,7 +543,7 @@ async def speech_to_text_api(audio_bytes: bytes = Body(..., media_type="audio/wa
         tmp.write(audio_bytes)
         tmp_path = pathlib.Path(tmp.name)
     try:
-        text = voice_agent_instance.speech_to_text(tmp_path)
+        text = await run_cpu_bound(voice_agent_instance.speech_to_text, tmp_path)
         return STTResponse(text=text)
     finally:
         if tmp_path.exists():
@@ -434,7 +560,7 @@ async def text_to_speech_api(request: TTSRequest):
                 tts_voice=request.voice,
                 api_key=request.api_key
             )
-            wav_path = temp_agent.text_to_speech(request.text, output_path=request.filename)
+            wav_path = await run_cpu_bound(temp_agent.text_to_speech, request.text, output_path=request.filename)
             return TTSResponse(
                 wav_path=wav_path,
                 provider_used=temp_agent.tts_provider,
@@ -442,7 +568,7 @@ async def text_to_speech_api(request: TTSRequest):
             )
         else:
             # Use existing instance for backward compatibility
-            wav_path = voice_agent_instance.text_to_speech(request.text, output_path=request.filename)
+            wav_path = await run_cpu_bound(voice_agent_instance.text_to_speech, request.text, output_path=request.filename)
             return TTSResponse(
                         wav_path=wav_path,
                         provider_used=voice_agent_instance.tts_provider,
@@ -456,7 +582,7 @@ async def text_to_speech_api(request: TTSRequest):
 async def speak_text_api(request: SpeakRequest):
     """Convert text to speech in real-time using a specified TTS provider and voice."""
     try:
-        message, provider_used, voice_used, duration_seconds = voice_agent_instance.speak(request.text, request.provider, request.voice, request.api_key)
+        message, provider_used, voice_used, duration_seconds = await run_io_bound(voice_agent_instance.speak, request.text, request.provider, request.voice, request.api_key)
         return SpeakResponse(
             message=message,
             provider_used=provider_used,
@@ -477,6 +603,13 @@ async def get_providers_api():
         print(f"Error in /voice/providers: {e}")
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
 
+# --- System Endpoints --- #
+
+@app.get("/system/executors", summary="Thread pool saturation metrics", tags=["System"])
+async def get_executor_metrics_api() -> Dict[str, Any]:
+    """Returns active/queued/completed counts and queue wait times for the agent thread pools."""
+    return get_executor_metrics()
+
 if __name__ == "__main__":
     import uvicorn
     # It's recommended to run Uvicorn from the command line for more options:
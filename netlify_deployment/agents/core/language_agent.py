@@ -2,18 +2,21 @@
 Provides LanguageAgent capable of summarizing and explaining text.
 Primary path uses Mistral AI Nemo model. If no API key or internet, falls back to 
 a lightweight local transformers pipeline (DistilBART).
+
+The local pipeline is loaded on first use (or by ``warm_up()``), so processes that
+only ever talk to Mistral never pay for loading it.
 """
 from __future__ import annotations
 
 import os
+import threading
+import time
 from typing import Optional, List, Dict
 
 # Prevent transformers from attempting to import TensorFlow / Keras (avoids Keras 3 incompat error)
 os.environ.setdefault("TRANSFORMERS_NO_TF", "1")
 os.environ.setdefault("TRANSFORMERS_NO_JAX", "1")
 
-from transformers import pipeline, Pipeline
-
 # Try importing Mistral AI client
 try:
     from mistralai import Mistral
@@ -21,6 +24,15 @@ except ImportError:
     Mistral = None  # type: ignore
 
 
+# Local summarisation models, tried in order on first fallback
+DEFAULT_LOCAL_MODELS = ("sshleifer/distilbart-cnn-12-6", "t5-small")
+
+# Start loading the local model in a background thread at construction
+DEFAULT_WARM_UP_LOCAL_MODEL = os.getenv("LANGUAGE_AGENT_WARM_UP", "false").lower() == "true"
+# After a failed load (network while downloading weights, out of memory) try again this much later
+DEFAULT_LOCAL_MODEL_RETRY_SECONDS = float(os.getenv("LANGUAGE_AGENT_LOCAL_RETRY_SECONDS", "300"))
+
+
 def _has_mistral_key() -> bool:
     return bool(os.getenv("MISTRAL_API_KEY"))
 
@@ -28,36 +40,86 @@ def _has_mistral_key() -> bool:
 class LanguageAgent:
     """Agent to summarise and explain text blocks using Mistral AI or local model."""
 
-    def __init__(self, model_name: str = "open-mistral-nemo", api_key: str = None):
+    def __init__(self, model_name: str = "open-mistral-nemo", api_key: str = None,
+                 local_models: tuple = DEFAULT_LOCAL_MODELS, warm_up_local_model: bool = DEFAULT_WARM_UP_LOCAL_MODEL):
         self.model_name = model_name
         # Set the API key from parameter or environment variable
         self.api_key = api_key or os.getenv("MISTRAL_API_KEY") or "NxdIH9V8xm8eldEGZrKvC1M1ziS1jHal"
         # "NxdIH9V8xm8eldEGZrKvC1M1ziS1jHal"
+
+        # Local fallback model, loaded on first use (see local_model / warm_up)
+        self.local_models = tuple(local_models)
+        self._local_model = None
+        self._local_model_name: Optional[str] = None
+        self._local_model_lock = threading.Lock()
+        self._warm_up_thread: Optional[threading.Thread] = None
+        self.local_model_status = "not_loaded"  # not_loaded | loading | loaded | failed
+        self.local_model_error: Optional[str] = None
+        self._local_model_failed_at = 0.0
+
         self.client, self.backend = self._init_client()
-        
-        # Initialize local fallback model
-        self.local_model = None
+        if warm_up_local_model:
+            self.warm_up()
 
     # ------------------------------------------------------------------
     # Initialisation helpers
     # ------------------------------------------------------------------
-    def _init_client(self):
-        """Attempt to initialise Mistral AI client; fall back to local pipeline."""
-        # Always initialize local model for fallback
-        print("[LanguageAgent] Initializing local fallback model...")
-        try:
-            self.local_model = pipeline("summarization", model="sshleifer/distilbart-cnn-12-6", framework="pt")
-            print("[LanguageAgent] Local DistilBART model loaded successfully.")
-        except Exception as e:
-            # Attempt small t5 model if distilbart fails
-            print(f"[LanguageAgent] DistilBART load failed ({e}). Trying t5-small summarizer.")
+    @property
+    def local_model(self):
+        """The local summarisation pipeline, loaded on first access (None if unavailable)."""
+        if self._local_model is None and not self._local_model_failed():
+            self._load_local_model()
+        return self._local_model
+
+    def _local_model_failed(self) -> bool:
+        """True while a failed load is within its retry backoff."""
+        return (self.local_model_status == "failed"
+                and time.monotonic() - self._local_model_failed_at < DEFAULT_LOCAL_MODEL_RETRY_SECONDS)
+
+    def _mark_local_model_failed(self, error: str):
+        self.local_model_status, self.local_model_error = "failed", error
+        self._local_model_failed_at = time.monotonic()
+
+    def _load_local_model(self, retry_failed: bool = False):
+        with self._local_model_lock:
+            if self._local_model is not None or (self._local_model_failed() and not retry_failed):
+                return self._local_model
+            self.local_model_status = "loading"
+            print("[LanguageAgent] Loading local fallback model...")
             try:
-                self.local_model = pipeline("summarization", model="t5-small", framework="pt")
-                print("[LanguageAgent] Local T5-small model loaded successfully.")
-            except Exception as e2:
-                print(f"[LanguageAgent] T5-small also failed ({e2}). No local fallback available.")
-                self.local_model = None
-        
+                from transformers import pipeline
+            except Exception as e:
+                print(f"[LanguageAgent] transformers unavailable ({e}). No local fallback available.")
+                self._mark_local_model_failed(str(e))
+                return None
+            errors = []
+            for candidate in self.local_models:
+                try:
+                    self._local_model = pipeline("summarization", model=candidate, framework="pt")
+                    self._local_model_name = candidate
+                    self.local_model_status, self.local_model_error = "loaded", None
+                    print(f"[LanguageAgent] Local model '{candidate}' loaded successfully.")
+                    return self._local_model
+                except Exception as e:
+                    print(f"[LanguageAgent] Local model '{candidate}' failed to load ({e}).")
+                    errors.append(f"{candidate}: {e}")
+            print("[LanguageAgent] No local fallback available.")
+            self._mark_local_model_failed("; ".join(errors))
+            return None
+
+    def warm_up(self, background: bool = True) -> Optional[threading.Thread]:
+        """Load the local model ahead of the first fallback, by default in a daemon thread; retries a failed load."""
+        if not background:
+            self._load_local_model(retry_failed=True)
+            return None
+        if self._warm_up_thread is None or not self._warm_up_thread.is_alive():
+            self._warm_up_thread = threading.Thread(target=self._load_local_model, kwargs={"retry_failed": True},
+                                                    name="language-agent-warm-up", daemon=True)
+            self._warm_up_thread.start()
+        return self._warm_up_thread
+
+    def _init_client(self):
+        """Attempt to initialise Mistral AI client; otherwise use the local pipeline (loaded lazily)."""
         if Mistral and self.api_key:
             try:
                 client = Mistral(api_key=self.api_key)
@@ -67,17 +129,9 @@ class LanguageAgent:
             except Exception as e:
                 print(f"[LanguageAgent] Failed to initialise Mistral AI client: {e}. Falling back to local summariser.")
 
-        # Local fallback – transformers summarisation pipeline
+        # Local fallback – transformers summarisation pipeline, loaded on first request
         print("[LanguageAgent] Using local transformers summarisation pipeline as fallback.")
-        if self.local_model is None:
-            # If we couldn't initialize any local model above, try one more time
-            try:
-                self.local_model = pipeline("summarization", model="t5-small", framework="pt")
-            except Exception as e:
-                print(f"[LanguageAgent] Final attempt to load local model failed: {e}")
-                self.local_model = None
-        
-        return self.local_model, "local"
+        return None, "local"
 
     def _call_mistral(self, prompt: str, max_tokens: int = 512) -> str:
         """Make a call to Mistral AI API."""
@@ -126,9 +180,11 @@ CONCISE SUMMARY:"""
                 else:
                     return "Unable to summarize due to API limitations and missing local model."
         else:
+            if not self.local_model:
+                return "Unable to summarize: no Mistral client and no local model available."
             # transformers pipeline expects max_length tokens, approximate tokens ~ words*1.3
             max_length = int(max_words * 1.3)
-            summary = self.client(text, max_length=max_length, min_length=20, do_sample=False)
+            summary = self.local_model(text, max_length=max_length, min_length=20, do_sample=False)
             return summary[0]["summary_text"].strip()
 
     def explain(self, text: str, target_audience: str = "non-expert") -> str:
@@ -158,21 +214,25 @@ EXPLANATION:"""
                 else:
                     return f"Explanation for {target_audience}: Unable to process due to API limitations and missing local model."
         else:
+            if not self.local_model:
+                return f"Explanation for {target_audience}: Unable to process without Mistral client or local model."
             # crude fallback: summarizer followed by simple prefix
-            summary = self.client(text, max_length=200, min_length=30, do_sample=False)
+            summary = self.local_model(text, max_length=200, min_length=30, do_sample=False)
             return f"Explanation for {target_audience}: {summary[0]['summary_text'].strip()}"
 
     def get_status(self) -> Dict[str, str]:
         """Return the current status of the LanguageAgent."""
+        # Reads the private attribute so asking for status never triggers a model load
         status = {
             "backend": self.backend,
             "model_name": self.model_name if self.backend == "mistral" else "N/A (local)",
-            "local_model_initialized": "Yes" if self.local_model else "No"
+            "local_model_initialized": "Yes" if self._local_model else "No",
+            "local_model_status": self.local_model_status,
         }
-        if self.backend == "local" and self.local_model and hasattr(self.local_model, 'model') and hasattr(self.local_model.model, 'name_or_path'):
-            status["local_model_name"] = self.local_model.model.name_or_path
-        elif self.backend == "local" and self.local_model:
-             status["local_model_name"] = "Unknown (pipeline active)"
+        if self._local_model_name:
+            status["local_model_name"] = self._local_model_name
+        if self.local_model_error:
+            status["local_model_error"] = self.local_model_error
         return status
 
 
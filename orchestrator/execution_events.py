@@ -0,0 +1,126 @@
+"""execution_events.py
+Push channel for orchestrator execution status.
+
+``update_execution_status`` / ``update_agent_status`` publish small delta events
+here, and ``GET /execution/stream/{session_id}`` forwards them to subscribers as
+server-sent events, so clients no longer poll the full ``ExecutionProgress``.
+
+A subscriber may connect before the session exists (the client picks the
+session id and opens the stream before posting the query); events published
+for that id are delivered from then on.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+TERMINAL_EVENT = "end"
+
+# Seconds between keep-alive comments, and how long a stream may stay silent before it is closed
+DEFAULT_KEEPALIVE_SECONDS = 15.0
+DEFAULT_STREAM_IDLE_TIMEOUT = 300.0
+
+
+def _json_default(obj: Any) -> Any:
+    return obj.isoformat() if hasattr(obj, "isoformat") else str(obj)
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    """Encode one server-sent event frame."""
+    return f"event: {event}\ndata: {json.dumps(data, default=_json_default)}\n\n"
+
+
+class ExecutionEventBroker:
+    """Fan-out of per-session status deltas to asyncio queues (thread-safe publish)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._published = 0
+        self._delivered = 0
+
+    def subscribe(self, session_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers.setdefault(session_id, []).append((asyncio.get_running_loop(), queue))
+        return queue
+
+    def unsubscribe(self, session_id: str, queue: asyncio.Queue):
+        with self._lock:
+            subscribers = [s for s in self._subscribers.get(session_id, []) if s[1] is not queue]
+            if subscribers:
+                self._subscribers[session_id] = subscribers
+            else:
+                self._subscribers.pop(session_id, None)
+
+    def publish(self, session_id: str, event: str, data: Dict[str, Any]):
+        """Queue ``(event, data)`` for every subscriber of ``session_id``; a no-op when nobody listens."""
+        with self._lock:
+            subscribers = list(self._subscribers.get(session_id, ()))
+            self._published += 1
+            self._delivered += len(subscribers)
+        for loop, queue in subscribers:
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is loop:
+                queue.put_nowait((event, data))
+            elif not loop.is_closed():
+                loop.call_soon_threadsafe(queue.put_nowait, (event, data))
+
+    def subscriber_count(self, session_id: Optional[str] = None) -> int:
+        with self._lock:
+            if session_id is not None:
+                return len(self._subscribers.get(session_id, ()))
+            return sum(len(s) for s in self._subscribers.values())
+
+    def metrics(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "active_streams": sum(len(s) for s in self._subscribers.values()),
+                "sessions_watched": len(self._subscribers),
+                "events_published": self._published,
+                "events_delivered": self._delivered,
+            }
+
+    async def stream(self, session_id: str, get_snapshot: Optional[Callable[[], Optional[Dict[str, Any]]]] = None,
+                     keepalive: float = DEFAULT_KEEPALIVE_SECONDS,
+                     idle_timeout: float = DEFAULT_STREAM_IDLE_TIMEOUT) -> AsyncIterator[str]:
+        """
+        Yield SSE frames for ``session_id`` until a terminal event or ``idle_timeout``.
+
+        ``get_snapshot()`` (current state, or None if the session does not exist yet) is
+        called right after subscribing and sent first, so no delta published in between
+        is lost.
+        """
+        queue = self.subscribe(session_id)
+        try:
+            snapshot = get_snapshot() if get_snapshot else None
+            if snapshot is not None:
+                yield format_sse("snapshot", snapshot)
+                if snapshot.get("overall_status") == "failed" or snapshot.get("progress_percentage", 0) >= 100:
+                    yield format_sse(TERMINAL_EVENT, {"session_id": session_id, "overall_status": snapshot.get("overall_status")})
+                    return
+            idle = 0.0
+            while True:
+                try:
+                    event, data = await asyncio.wait_for(queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    idle += keepalive
+                    if idle >= idle_timeout:
+                        yield format_sse(TERMINAL_EVENT, {"session_id": session_id, "overall_status": "timeout"})
+                        return
+                    yield ": keep-alive\n\n"
+                    continue
+                idle = 0.0
+                yield format_sse(event, data)
+                if event == TERMINAL_EVENT:
+                    return
+        finally:
+            self.unsubscribe(session_id, queue)
+
+
+execution_events = ExecutionEventBroker()
@@ -0,0 +1,187 @@
+"""execution_store.py
+Bounded, expiring store for per-session ``ExecutionProgress`` objects.
+
+Replaces the orchestrator's unbounded module-level dict. Sessions expire
+``ttl_seconds`` after their last update, the oldest sessions are evicted once
+``max_entries`` is reached, and when a session finishes its agent results
+(scraped page text, historical price series, ...) are shrunk to a preview so a
+finished session only keeps a small footprint until it expires.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+DEFAULT_EXECUTION_STATUS_TTL = float(os.environ.get("EXECUTION_STATUS_TTL_SECONDS", "900"))
+DEFAULT_EXECUTION_STATUS_MAX_ENTRIES = int(os.environ.get("EXECUTION_STATUS_MAX_ENTRIES", "1000"))
+DEFAULT_RESULT_MAX_CHARS = int(os.environ.get("EXECUTION_RESULT_MAX_CHARS", "2000"))
+DEFAULT_RESULT_MAX_ITEMS = 20
+_MAX_DEPTH = 6
+
+
+def _truncate(value: Any, max_chars: int, max_items: int, depth: int) -> Tuple[Any, bool]:
+    if isinstance(value, str):
+        if len(value) <= max_chars:
+            return value, False
+        return value[:max_chars] + f"... [truncated {len(value) - max_chars} chars]", True
+    if depth >= _MAX_DEPTH and isinstance(value, (dict, list, tuple)):
+        return f"[{type(value).__name__} truncated]", True
+    if isinstance(value, dict):
+        items = list(value.items())
+        shrunk, truncated = {}, len(items) > max_items
+        for k, v in items[:max_items]:
+            shrunk[k], cut = _truncate(v, max_chars, max_items, depth + 1)
+            truncated = truncated or cut
+        if len(items) > max_items:
+            shrunk["_truncated_keys"] = len(items) - max_items
+        return shrunk, truncated
+    if isinstance(value, (list, tuple)):
+        if len(value) <= max_items:
+            kept, omitted = list(value), 0
+        else:
+            half = max_items // 2
+            kept, omitted = list(value[:half]) + list(value[-half:]), len(value) - 2 * half
+        shrunk, truncated = [], omitted > 0
+        for v in kept:
+            item, cut = _truncate(v, max_chars, max_items, depth + 1)
+            shrunk.append(item)
+            truncated = truncated or cut
+        if omitted:
+            shrunk.insert(len(shrunk) // 2, f"... [{omitted} items truncated]")
+        return shrunk, truncated
+    return value, False
+
+
+def truncate_result(value: Any, max_chars: int = DEFAULT_RESULT_MAX_CHARS,
+                    max_items: int = DEFAULT_RESULT_MAX_ITEMS) -> Tuple[Any, bool]:
+    """Shrink a JSON-like value: long strings are cut, long lists keep their head and tail.
+
+    Returns ``(shrunk_value, was_truncated)``.
+    """
+    return _truncate(value, max_chars, max_items, 0)
+
+
+class ExecutionStatusStore:
+    """Dict-like session store with TTL expiry, an entry cap and result truncation on completion."""
+
+    def __init__(self, ttl_seconds: float = DEFAULT_EXECUTION_STATUS_TTL,
+                 max_entries: int = DEFAULT_EXECUTION_STATUS_MAX_ENTRIES,
+                 result_max_chars: int = DEFAULT_RESULT_MAX_CHARS):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.result_max_chars = result_max_chars
+        self._lock = threading.RLock()
+        # session_id -> (progress, last_updated); ordered oldest update first
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._evicted_expired = 0
+        self._evicted_capacity = 0
+        self._deleted = 0
+        self._finalized = 0
+        self._truncated_results = 0
+
+    # ------------------------------------------------------------------
+    # Mapping interface (what the orchestrator used on the plain dict)
+    # ------------------------------------------------------------------
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def __getitem__(self, session_id: str):
+        progress = self.get(session_id)
+        if progress is None:
+            raise KeyError(session_id)
+        return progress
+
+    def __setitem__(self, session_id: str, progress):
+        with self._lock:
+            self._entries[session_id] = (progress, time.monotonic())
+            self._entries.move_to_end(session_id)
+            self._evict_locked()
+
+    def __delitem__(self, session_id: str):
+        with self._lock:
+            del self._entries[session_id]
+            self._deleted += 1
+
+    def pop(self, session_id: str, default=None):
+        with self._lock:
+            entry = self._entries.pop(session_id, None)
+            if entry is None:
+                return default
+            self._deleted += 1
+            return entry[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire_locked()
+            return len(self._entries)
+
+    def get(self, session_id: str, default=None):
+        with self._lock:
+            self._expire_locked()
+            entry = self._entries.get(session_id)
+            return entry[0] if entry else default
+
+    def touch(self, session_id: str):
+        """Mark a session as updated now (resets its TTL)."""
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if entry:
+                self._entries[session_id] = (entry[0], time.monotonic())
+                self._entries.move_to_end(session_id)
+
+    # ------------------------------------------------------------------
+    # Eviction and truncation
+    # ------------------------------------------------------------------
+    def _expire_locked(self):
+        if self.ttl_seconds <= 0:
+            return
+        cutoff = time.monotonic() - self.ttl_seconds
+        while self._entries:
+            session_id, (_, updated) = next(iter(self._entries.items()))
+            if updated > cutoff:
+                break
+            self._entries.popitem(last=False)
+            self._evicted_expired += 1
+
+    def _evict_locked(self):
+        self._expire_locked()
+        while self.max_entries > 0 and len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evicted_capacity += 1
+
+    def finalize(self, session_id: str):
+        """Replace each agent's result with a truncated copy once the session is finished.
+
+        Copies are stored instead of mutating in place because the same status objects
+        are returned to the client in the query response.
+        """
+        with self._lock:
+            entry = self._entries.get(session_id)
+            if not entry:
+                return
+            progress = entry[0]
+            for i, agent_status in enumerate(progress.agents_status):
+                if agent_status.result is None:
+                    continue
+                shrunk, truncated = truncate_result(agent_status.result, max_chars=self.result_max_chars)
+                if truncated:
+                    progress.agents_status[i] = agent_status.copy(update={"result": shrunk})
+                    self._truncated_results += 1
+            self._finalized += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            self._expire_locked()
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "evicted_expired": self._evicted_expired,
+                "evicted_capacity": self._evicted_capacity,
+                "deleted": self._deleted,
+                "finalized_sessions": self._finalized,
+                "truncated_results": self._truncated_results,
+            }
@@ -1,7 +1,9 @@
 from fastapi import FastAPI, File, UploadFile, HTTPException, Body, Form
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Awaitable, Callable
 import base64, tempfile, pathlib, re, json
+import asyncio
 import os
 import numpy as np
 import uuid
@@ -14,6 +16,11 @@ from agents.core.analysis_agent import AnalysisAgent
 from agents.core.language_agent import LanguageAgent
 from agents.core.market_agent import MarketDataAgent
 from agents.core.scraping_agent import ScrapingAgent
+from agents.core.executors import run_io_bound, run_cpu_bound, get_executor_metrics
+from agents.core.ticker_entities import get_ticker_extractor
+from orchestrator.execution_events import execution_events, TERMINAL_EVENT, format_sse
+from orchestrator.execution_store import ExecutionStatusStore
+from orchestrator.response_cache import QueryResponseCache, RESPONSE_CACHE_ENABLED
 
 app = FastAPI(
     title="Intelligent Financial Assistant Orchestrator",
@@ -24,8 +31,14 @@ app = FastAPI(
 # Add environment variable for Mistral API key at the top
 os.environ.setdefault("MISTRAL_API_KEY", "NxdIH9V8xm8eldEGZrKvC1M1ziS1jHal")
 
-# Global status tracking for real-time updates
-execution_status_store = {}
+# Global status tracking for real-time updates (TTL + max-entries bounded, see execution_store.py)
+execution_status_store = ExecutionStatusStore()
+
+# Final answers of recent queries, expiring with the freshness of the agents behind them
+response_cache = QueryResponseCache()
+
+# Upper bound (seconds) for a single agent executor before it is reported as failed
+DEFAULT_AGENT_TIMEOUT = float(os.environ.get("AGENT_TIMEOUT_SECONDS", "30"))
 
 # Store initialized agents globally to be accessed by Streamlit after initialization
 _initialized_agents = {}
@@ -49,6 +62,10 @@ class IntelligentQueryRequest(BaseModel):
     query: str = Field(..., description="Natural language query about financial data, market analysis, or general information")
     voice_mode: bool = Field(False, description="Return TTS audio in addition to text")
     include_debug_info: bool = Field(False, description="Include debug information about agent routing")
+    concurrent_execution: bool = Field(True, description="Run the selected agents concurrently instead of one after another")
+    agent_timeout: float = Field(DEFAULT_AGENT_TIMEOUT, gt=0, le=300, description="Per-agent timeout in seconds")
+    session_id: Optional[str] = Field(None, description="Optional client-chosen session id, so /execution/stream/{session_id} can be opened before the query is sent")
+    use_cache: bool = Field(True, description="Answer repeated questions from the response cache")
 
 class AgentExecutionStatus(BaseModel):
     agent_name: str
@@ -74,10 +91,42 @@ class IntelligentResponse(BaseModel):
     wav_audio_base64: Optional[str] = None
     confidence: float = Field(description="Confidence in query understanding (0-1)")
     session_id: str
+    cache_hit: bool = Field(False, description="True when the answer was served from the response cache")
 
 # -------------------------------  QUERY ROUTER  -------------------------------
+def _trie_regex(words: List[str]) -> str:
+    """Regex matching any of ``words``; where words share a prefix the longest one wins.
+
+    Every node that ends a word makes its continuation optional, so e.g. "market" and
+    "market cap" become ``market(?: cap)?`` and one match reveals both words.
+    """
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = True
+
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return f"(?:{body})?" if "" in node else body
+
+    return build(trie)
+
 class QueryRouter:
-    def __init__(self):
+    # Substring checks that boost (or force) agents on top of the pattern scores
+    FINANCIAL_TERMS = ["stock", "price", "market", "financial", "company", "investment", "portfolio"]
+    COMPLEX_INDICATORS = ["analyze", "compare", "performance", "trend", "recommend", "vs", "versus", "better", "best"]
+    INFO_SEEKING = ["what", "how", "why", "tell", "explain", "show", "find", "search"]
+    CURRENT_INFO = ["latest", "current", "today", "recent", "news", "update"]
+    EDUCATIONAL = ["explain", "what is", "how does", "definition", "meaning"]
+
+    def __init__(self, ticker_extractor=None):
+        # Optional TickerEntityExtractor; a query naming a known company or symbol is a market query
+        self.ticker_extractor = ticker_extractor
         self.patterns = {
             "market_data": [
                 r"stock", r"price", r"share", r"ticker", r"market", r"trading", r"volume", r"quote",
@@ -116,48 +165,87 @@ class QueryRouter:
             ]
         }
     
+        self._compile()
+
+    def _compile(self):
+        """Fold every pattern and routing term into one trie regex scanned once per query.
+
+        Patterns are matched against the lowercased query, so the few containing
+        uppercase letters ("AAPL", "P/E", "US", ...) can never match and are left out.
+        The regex sits inside a lookahead, so a match is attempted at every position and
+        overlapping terms ("research" / "search") are all seen. The match at a position is
+        the longest term starting there; ``_hits_by_match`` maps it to every term that is
+        a prefix of it.
+        """
+        self._flag_terms = {
+            "financial": self.FINANCIAL_TERMS,
+            "complex": self.COMPLEX_INDICATORS,
+            "info_seeking": self.INFO_SEEKING,
+            "current_info": self.CURRENT_INFO,
+            "educational": self.EDUCATIONAL,
+        }
+        # term -> ([agent types scored once per occurrence], {routing flags})
+        self._term_actions: Dict[str, tuple] = {}
+        for agent_type, patterns in self.patterns.items():
+            for pattern in patterns:
+                if pattern == pattern.lower():
+                    self._term_actions.setdefault(pattern, ([], set()))[0].append(agent_type)
+        for flag, terms in self._flag_terms.items():
+            for term in terms:
+                self._term_actions.setdefault(term, ([], set()))[1].add(flag)
+
+        terms = sorted(self._term_actions)
+        self._hits_by_match = {term: [t for t in terms if term.startswith(t)] for term in terms}
+        self._matcher = re.compile(f"(?=({_trie_regex(terms)}))")
+
+    def _score(self, query_lower: str):
+        """One scan over the query: per-agent pattern counts plus which routing flags fired."""
+        agent_scores: Dict[str, int] = {}
+        flags = set()
+        last_end: Dict[str, int] = {}
+        for match in self._matcher.finditer(query_lower):
+            start = match.start()
+            for term in self._hits_by_match[match.group(1)]:
+                # Count non-overlapping occurrences of the same term (re.findall semantics)
+                if start < last_end.get(term, 0):
+                    continue
+                last_end[term] = start + len(term)
+                agent_types, term_flags = self._term_actions[term]
+                for agent_type in agent_types:
+                    agent_scores[agent_type] = agent_scores.get(agent_type, 0) + 1
+                flags |= term_flags
+        # Same key order as the per-pattern loop, so score ties sort the same way
+        agent_scores = {agent_type: agent_scores[agent_type] for agent_type in self.patterns if agent_type in agent_scores}
+        return agent_scores, flags
+
     def classify_query(self, query: str) -> List[str]:
         """Classify query into agent categories with intelligent multi-agent routing."""
         query_lower = query.lower()
-        matched_agents = []
-        agent_scores = {}
         
-        # Score each agent based on pattern matches
-        for agent_type, patterns in self.patterns.items():
-            score = 0
-            for pattern in patterns:
-                matches = len(re.findall(pattern, query_lower))
-                score += matches
-            
-            if score > 0:
-                agent_scores[agent_type] = score
+        # Score each agent based on pattern matches (single pass over the query)
+        agent_scores, flags = self._score(query_lower)
         
         # Enhanced routing logic for comprehensive analysis
-        financial_terms = ["stock", "price", "market", "financial", "company", "investment", "portfolio"]
-        has_financial_terms = any(term in query_lower for term in financial_terms)
+        has_financial_terms = "financial" in flags or bool(self.ticker_extractor and self.ticker_extractor.extract(query))
         
         # Always include market_data for financial queries
         if has_financial_terms and "market_data" not in agent_scores:
             agent_scores["market_data"] = 1
         
         # Always include analysis for complex queries
-        complex_indicators = ["analyze", "compare", "performance", "trend", "recommend", "vs", "versus", "better", "best"]
-        if any(indicator in query_lower for indicator in complex_indicators):
+        if "complex" in flags:
             agent_scores["analysis"] = agent_scores.get("analysis", 0) + 2
         
         # Include retrieval for information seeking queries
-        info_seeking = ["what", "how", "why", "tell", "explain", "show", "find", "search"]
-        if any(word in query_lower for word in info_seeking):
+        if "info_seeking" in flags:
             agent_scores["retrieval"] = agent_scores.get("retrieval", 0) + 1
         
         # Include scraping for current/latest information
-        current_info = ["latest", "current", "today", "recent", "news", "update"]
-        if any(word in query_lower for word in current_info):
+        if "current_info" in flags:
             agent_scores["scraping"] = agent_scores.get("scraping", 0) + 1
         
         # Always include explanation for educational queries
-        educational = ["explain", "what is", "how does", "definition", "meaning"]
-        if any(phrase in query_lower for phrase in educational):
+        if "educational" in flags:
             agent_scores["explanation"] = agent_scores.get("explanation", 0) + 1
         
         # Sort agents by score and select top agents
@@ -188,8 +276,9 @@ class QueryRouter:
         
         return selected_agents
 
-# Initialize router
-query_router = QueryRouter()
+# Initialize router and the shared ticker/company extractor (symbol index loaded once)
+ticker_extractor = get_ticker_extractor()
+query_router = QueryRouter(ticker_extractor)
 
 # -------------------------------  AGENT EXECUTORS  -------------------------------
 async def execute_market_agent(query: str, interpretation: str, session_id: str) -> AgentExecutionStatus:
@@ -205,35 +294,8 @@ async def execute_market_agent(query: str, interpretation: str, session_id: str)
     update_agent_status(session_id, status)
     
     try:
-        # Extract ticker symbol if present - improved regex
-        ticker_mapping = {
-            "apple": "AAPL", "aapl": "AAPL",
-            "tesla": "TSLA", "tsla": "TSLA", 
-            "microsoft": "MSFT", "msft": "MSFT",
-            "google": "GOOGL", "googl": "GOOGL", "alphabet": "GOOGL",
-            "amazon": "AMZN", "amzn": "AMZN",
-            "meta": "META", "facebook": "META",
-            "nvidia": "NVDA", "nvda": "NVDA"
-        }
-        
-        # Extract all potential tickers
-        found_tickers = []
-        query_lower = query.lower()
-        
-        # Check for company names and common tickers
-        for name, ticker_symbol in ticker_mapping.items():
-            if name in query_lower:
-                found_tickers.append(ticker_symbol)
-        
-        # Also look for uppercase ticker patterns, excluding common words
-        ticker_patterns = re.findall(r'\b([A-Z]{2,5})\b', query.upper())
-        excluded_words = {"WHAT", "THE", "AND", "FOR", "WITH", "FROM", "THAT", "THIS", "HOW", "ARE", "CAN", "WILL"}
-        for pattern in ticker_patterns:
-            if pattern not in excluded_words and pattern not in found_tickers:
-                found_tickers.append(pattern)
-        
-        # Use first valid ticker or default to AAPL
-        ticker = found_tickers[0] if found_tickers else "AAPL"
+        # Extract the ticker from company names / symbols; default to AAPL
+        ticker = ticker_extractor.extract_one(query, default="AAPL")
         
         # Update status with specific action
         status.description = f"Analyzing query for {ticker}..."
@@ -243,22 +305,22 @@ async def execute_market_agent(query: str, interpretation: str, session_id: str)
         if any(word in query.lower() for word in ["price", "stock", "share"]):
             status.description = f"Fetching stock price for {ticker}..."
             update_agent_status(session_id, status)
-            result = market_agent.get_stock_price(ticker)
+            result = await run_io_bound(market_agent.get_stock_price, ticker)
             status.description = f"Retrieved stock price data for {ticker}"
         elif any(word in query.lower() for word in ["earnings", "financial"]):
             status.description = f"Fetching earnings data for {ticker}..."
             update_agent_status(session_id, status)
-            result = market_agent.get_earnings_data(ticker)
+            result = await run_io_bound(market_agent.get_earnings_data, ticker)
             status.description = f"Retrieved earnings data for {ticker}"
         elif any(word in query.lower() for word in ["company", "info", "information"]):
             status.description = f"Fetching company information for {ticker}..."
             update_agent_status(session_id, status)
-            result = market_agent.get_company_info(ticker)
+            result = await run_io_bound(market_agent.get_company_info, ticker)
             status.description = f"Retrieved company information for {ticker}"
         else:
             status.description = f"Fetching default stock data for {ticker}..."
             update_agent_status(session_id, status)
-            result = market_agent.get_stock_price(ticker)
+            result = await run_io_bound(market_agent.get_stock_price, ticker)
             status.description = f"Retrieved default stock data for {ticker}"
         
         status.status = "completed"
@@ -316,35 +378,8 @@ async def execute_analysis_agent(query: str, interpretation: str, session_id: st
             status.description = "Comparing stock prices..."
             update_agent_status(session_id, status)
             
-            # Enhanced ticker extraction - look for common ticker symbols and company names
-            ticker_mapping = {
-                "apple": "AAPL", "aapl": "AAPL",
-                "tesla": "TSLA", "tsla": "TSLA", 
-                "microsoft": "MSFT", "msft": "MSFT",
-                "google": "GOOGL", "googl": "GOOGL", "alphabet": "GOOGL",
-                "amazon": "AMZN", "amzn": "AMZN",
-                "meta": "META", "facebook": "META",
-                "nvidia": "NVDA", "nvda": "NVDA"
-            }
-            
-            # Extract all potential tickers
-            found_tickers = []
-            query_lower = query.lower()
-            
-            # Check for company names and common tickers
-            for name, ticker in ticker_mapping.items():
-                if name in query_lower:
-                    found_tickers.append(ticker)
-            
-            # Also look for uppercase ticker patterns, excluding common words
-            ticker_patterns = re.findall(r'\b([A-Z]{2,5})\b', query.upper())
-            excluded_words = {"WHAT", "THE", "AND", "FOR", "WITH", "FROM", "THAT", "THIS", "HOW", "ARE", "CAN", "WILL"}
-            for pattern in ticker_patterns:
-                if pattern not in excluded_words and pattern not in found_tickers:
-                    found_tickers.append(pattern)
-            
-            # Use first valid ticker or default to AAPL
-            ticker = found_tickers[0] if found_tickers else "AAPL"
+            # Extract the ticker from company names / symbols; default to AAPL
+            ticker = ticker_extractor.extract_one(query, default="AAPL")
             
             result = analysis_agent.compare_stock_prices(ticker)
             result = convert_numpy_types(result)
@@ -407,12 +442,12 @@ async def execute_scraping_agent(query: str, interpretation: str, session_id: st
         if any(word in query.lower() for word in ["headlines", "news"]):
             status.description = f"Extracting headlines from {url}..."
             update_agent_status(session_id, status)
-            result = {"headlines": scraping_agent.extract_headlines(url, "h3")}
+            result = {"headlines": await run_io_bound(scraping_agent.extract_headlines, url, "h3")}
             status.description = f"Extracted headlines from {url}"
         else:
             status.description = f"Extracting content from {url}..."
             update_agent_status(session_id, status)
-            result = {"text": scraping_agent.extract_generic_text(url)}
+            result = {"text": await run_io_bound(scraping_agent.extract_generic_text, url)}
             status.description = f"Extracted text content from {url}"
         
         status.status = "completed"
@@ -445,7 +480,7 @@ async def execute_retrieval_agent(query: str, interpretation: str, session_id: s
         update_agent_status(session_id, status)
         
         # Search for relevant documents
-        results = retriever_agent.search(query, k=3)
+        results = await run_cpu_bound(retriever_agent.search, query, k=3)
         
         status.status = "completed"
         status.result = {"search_results": results}
@@ -484,7 +519,8 @@ async def execute_explanation_agent(query: str, interpretation: str, session_id:
         Interpretation:"""
         
         try:
-            query_interpretation = language_agent.explain(interpretation_prompt, target_audience="system")
+            language_agent = (_initialized_agents or initialize_agents())["language_agent"]
+            query_interpretation = await language_agent.explain_async(interpretation_prompt, target_audience="system")
         except Exception as e:
             print(f"DEBUG: Language agent failed: {e}")
             query_interpretation = f"Query interpretation failed: {e}"
@@ -503,9 +539,36 @@ async def execute_explanation_agent(query: str, interpretation: str, session_id:
         return status
 
 # -------------------------------  MAIN ORCHESTRATOR  -------------------------------
-async def process_intelligent_query(query: str, voice_mode: bool = False, include_debug: bool = False) -> IntelligentResponse:
-    """Process intelligent query by routing to appropriate agents."""
-    session_id = create_execution_session(query)
+async def process_intelligent_query(query: str, voice_mode: bool = False, include_debug: bool = False,
+                                    concurrent: bool = True, agent_timeout: float = DEFAULT_AGENT_TIMEOUT,
+                                    session_id: Optional[str] = None, use_cache: bool = True,
+                                    token_callback: Optional[Callable[[str], Awaitable[None]]] = None) -> IntelligentResponse:
+    """Process intelligent query by routing to appropriate agents.
+
+    When ``concurrent`` is True the selected agents run at the same time and each one
+    is bounded by ``agent_timeout`` seconds; agents that fail or time out are reported
+    as failed while the remaining results are still synthesized.
+
+    With ``use_cache`` a repeated (normalized) query is answered from ``response_cache``
+    without interpretation, agents or synthesis; fully successful answers are stored.
+
+    ``token_callback`` is awaited with each piece of the final answer as it becomes
+    available: synthesis tokens as Mistral streams them, otherwise the whole text once.
+    """
+    session_id = create_execution_session(query, session_id)
+
+    use_cache = use_cache and RESPONSE_CACHE_ENABLED
+    cache_key = response_cache.make_key(query, voice_mode)
+    if use_cache:
+        cached = response_cache.get(cache_key)
+        if cached is not None:
+            cached_response, age = cached
+            for agent_status in cached_response.agents_used:
+                update_agent_status(session_id, agent_status)
+            update_execution_status(session_id, f"Response Ready (cached {age:.0f}s ago)", "completed", 100.0)
+            if token_callback:
+                await token_callback(cached_response.response_text)
+            return cached_response.copy(update={"session_id": session_id, "cache_hit": True})
     
     # Ensure agents are initialized
     agents = _initialized_agents if _initialized_agents else initialize_agents()
@@ -531,10 +594,12 @@ async def process_intelligent_query(query: str, voice_mode: bool = False, includ
         interpretation_response = await language_agent_instance.generate_response_async(interpretation_prompt, max_tokens=100)
         query_interpretation = interpretation_response.strip()
         confidence = 0.9 # Default confidence, can be refined
+        interpretation_failed = False
     except Exception as e:
         print(f"Error generating query interpretation: {e}")
         query_interpretation = f"Interpreted query: {query}" # Fallback
         confidence = 0.6
+        interpretation_failed = True
     
     update_execution_status(session_id, "Query Interpretation", "routing", 10.0)
     
@@ -545,9 +610,6 @@ async def process_intelligent_query(query: str, voice_mode: bool = False, includ
     
     update_execution_status(session_id, f"Identified Agents: {', '.join(selected_agent_types)}", "routing", 20.0)
 
-    all_agent_results = []
-    final_response_parts = []
-    
     agent_execution_map = {
         "market_data": (execute_market_agent, market_agent_instance),
         "analysis": (execute_analysis_agent, analysis_agent_instance),
@@ -555,49 +617,78 @@ async def process_intelligent_query(query: str, voice_mode: bool = False, includ
         "retrieval": (execute_retrieval_agent, retriever_agent_instance),
         "explanation": (execute_explanation_agent, language_agent_instance) # Explanation uses language agent
     }
-    
-    for agent_type in selected_agent_types:
+
+    async def run_agent(agent_type: str):
+        """Run a single agent executor and return (status, textual part for synthesis)."""
+        agent_status = AgentExecutionStatus(
+            agent_name=agent_type.title() + " Agent",
+            status="executing",
+            description="Processing query",
+            start_time=datetime.now()
+        )
         try:
             execute_func, agent_instance = agent_execution_map[agent_type]
-            agent_status = AgentExecutionStatus(
-                agent_name=agent_type.title() + " Agent",
-                status="executing",
-                description="Processing query",
-                start_time=datetime.now()
-            )
             update_agent_status(session_id, agent_status)
 
-            result = await execute_func(query_interpretation, query_interpretation, session_id)
+            result = await asyncio.wait_for(
+                execute_func(query_interpretation, query_interpretation, session_id),
+                timeout=agent_timeout
+            )
+            agent_status.end_time = datetime.now()
+            if result.status != "completed":
+                # Executors catch their own errors and report them as a failed status
+                agent_status.status = result.status
+                agent_status.error = result.error
+                agent_status.description = f"Agent {agent_type} failed."
+                update_agent_status(session_id, agent_status)
+                return agent_status, f"Error with {agent_type}: {result.error}"
             agent_result_content = result.result
             agent_status.description = f"Agent {agent_type} completed processing."
             agent_status.status = "completed"
             agent_status.result = agent_result_content
-            agent_status.end_time = datetime.now()
             update_agent_status(session_id, agent_status)
 
-            all_agent_results.append(agent_status)
             # Accumulate textual results for final synthesis
             if isinstance(agent_result_content, dict) and "summary" in agent_result_content:
-                 final_response_parts.append(str(agent_result_content["summary"]))
+                response_part = str(agent_result_content["summary"])
             elif isinstance(agent_result_content, dict) and "content" in agent_result_content:
-                 final_response_parts.append(str(agent_result_content["content"]))
+                response_part = str(agent_result_content["content"])
             elif isinstance(agent_result_content, str):
-                final_response_parts.append(agent_result_content)
+                response_part = agent_result_content
             else: # Fallback for other types of results
-                final_response_parts.append(json.dumps(convert_numpy_types(agent_result_content), indent=2))
+                response_part = json.dumps(convert_numpy_types(agent_result_content), indent=2)
+            return agent_status, response_part
 
+        except asyncio.TimeoutError:
+            print(f"Agent {agent_type} timed out after {agent_timeout}s")
+            agent_status.status = "failed"
+            agent_status.error = f"Timed out after {agent_timeout} seconds"
+            agent_status.end_time = datetime.now()
+            update_agent_status(session_id, agent_status)
+            return agent_status, f"Error with {agent_type}: timed out after {agent_timeout} seconds"
         except Exception as e:
             print(f"Error executing agent {agent_type}: {e}")
             agent_status.status = "failed"
             agent_status.error = str(e)
             agent_status.end_time = datetime.now()
             update_agent_status(session_id, agent_status)
-            all_agent_results.append(agent_status)
-            final_response_parts.append(f"Error with {agent_type}: {e}")
+            return agent_status, f"Error with {agent_type}: {e}"
+
+    if concurrent:
+        # Independent executors run side by side; gather keeps the routing order,
+        # and each run_agent call already turns failures/timeouts into partial results.
+        agent_outcomes = await asyncio.gather(*(run_agent(agent_type) for agent_type in selected_agent_types))
+    else:
+        agent_outcomes = [await run_agent(agent_type) for agent_type in selected_agent_types]
+
+    all_agent_results = [agent_status for agent_status, _ in agent_outcomes]
+    final_response_parts = [response_part for _, response_part in agent_outcomes]
 
     update_execution_status(session_id, "Synthesizing Response", "executing", 80.0)
+    synthesis_failed = False
     
     # Synthesize final response
+    streamed = False
     if not final_response_parts:
         final_summary = "I could not find specific information for your query. Please try rephrasing or be more specific."
     elif len(final_response_parts) == 1:
@@ -613,18 +704,31 @@ async def process_intelligent_query(query: str, voice_mode: bool = False, includ
             + "\\n\\nSynthesized Response:"
         )
         try:
-            final_summary = await language_agent_instance.generate_response_async(synthesis_prompt, max_tokens=1024)
+            if token_callback:
+                # Forward tokens as they arrive instead of waiting for the whole completion
+                chunks = []
+                async for token in language_agent_instance.stream_response_async(synthesis_prompt, max_tokens=1024):
+                    chunks.append(token)
+                    streamed = True
+                    await token_callback(token)
+                final_summary = "".join(chunks)
+            else:
+                final_summary = await language_agent_instance.generate_response_async(synthesis_prompt, max_tokens=1024)
         except Exception as e:
             print(f"Error during final synthesis: {e}")
+            synthesis_failed = True
             final_summary = "I gathered some information, but had trouble putting it all together. Here are the raw findings:\\n" + "\\n".join(final_response_parts)
 
+    if token_callback and not streamed:
+        await token_callback(final_summary)
+
     update_execution_status(session_id, "Finalizing", "completed", 90.0)
 
     wav_audio_base64 = None
     if voice_mode:
         try:
             # Use the main voice agent for TTS
-            temp_audio_path = voice_agent_instance.text_to_speech(final_summary, output_filename="orchestrator_tts_output.wav")
+            temp_audio_path = await run_cpu_bound(voice_agent_instance.text_to_speech, final_summary, output_filename="orchestrator_tts_output.wav")
             if temp_audio_path and os.path.exists(temp_audio_path):
                 with open(temp_audio_path, "rb") as wav_file:
                     wav_audio_base64 = base64.b64encode(wav_file.read()).decode()
@@ -642,6 +746,18 @@ async def process_intelligent_query(query: str, voice_mode: bool = False, includ
             confidence=confidence,
             session_id=session_id
         )
+    if use_cache:
+        # Partial answers (failed/timed-out agents, agents returning {"error": ...},
+        # fallback interpretation, raw-findings fallback) are not reused
+        agent_failed = any(
+            agent_status.status != "completed"
+            or (isinstance(agent_status.result, dict) and "error" in agent_status.result)
+            for agent_status in all_agent_results
+        )
+        if synthesis_failed or interpretation_failed or agent_failed:
+            response_cache.skip()
+        else:
+            response_cache.put(cache_key, final_response, selected_agent_types)
     update_execution_status(session_id, "Response Ready", "completed", 100.0)
     return final_response
 
@@ -649,7 +765,6 @@ def process_intelligent_query_sync(query: str, voice_mode: bool = False, include
     """Synchronous wrapper for process_intelligent_query.
     This is what Streamlit will call if it cannot easily manage async calls.
     """
-    import asyncio
     try:
         # Check if there's an existing event loop
         loop = asyncio.get_event_loop()
@@ -672,51 +787,171 @@ async def intelligent_query_endpoint(request: IntelligentQueryRequest):
     Process natural language queries intelligently by routing to appropriate agents
     and providing natural language responses.
     """
-    return await process_intelligent_query(
-        request.query, 
-        request.voice_mode, 
-        request.include_debug_info
+    session_id = request.session_id or str(uuid.uuid4())
+    try:
+        return await process_intelligent_query(
+            request.query, 
+            request.voice_mode, 
+            request.include_debug_info,
+            concurrent=request.concurrent_execution,
+            agent_timeout=request.agent_timeout,
+            session_id=session_id,
+            use_cache=request.use_cache
+        )
+    except Exception as e:
+        # Close any open status streams for this session before surfacing the error
+        update_execution_status(session_id, f"Error: {e}", "failed", 100.0)
+        raise
+
+@app.post("/intelligent/query/stream", summary="Intelligent Query Processing (streamed answer)")
+async def intelligent_query_stream_endpoint(request: IntelligentQueryRequest):
+    """
+    Same pipeline as ``/intelligent/query``, answered as server-sent events: ``session``
+    (the session id, for ``/execution/stream``), ``token`` events carrying the answer text
+    as synthesis produces it, then ``response`` with the full ``IntelligentResponse`` (its
+    ``response_text`` is authoritative, e.g. if synthesis failed midway) or ``error``.
+    With the local language backend the answer arrives as a single ``token`` event.
+    """
+    session_id = request.session_id or str(uuid.uuid4())
+
+    async def event_source():
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def on_token(text: str):
+            queue.put_nowait(("token", {"text": text}))
+
+        task = asyncio.create_task(process_intelligent_query(
+            request.query,
+            request.voice_mode,
+            request.include_debug_info,
+            concurrent=request.concurrent_execution,
+            agent_timeout=request.agent_timeout,
+            session_id=session_id,
+            use_cache=request.use_cache,
+            token_callback=on_token
+        ))
+        task.add_done_callback(lambda _: queue.put_nowait(("done", None)))
+        try:
+            yield format_sse("session", {"session_id": session_id})
+            while True:
+                event, data = await queue.get()
+                if event == "done":
+                    break
+                yield format_sse(event, data)
+            try:
+                response = task.result()
+            except Exception as e:
+                update_execution_status(session_id, f"Error: {e}", "failed", 100.0)
+                yield format_sse("error", {"session_id": session_id, "detail": str(e)})
+            else:
+                yield format_sse("response", convert_numpy_types(response.dict()))
+        finally:
+            # Client went away before the answer was complete
+            if not task.done():
+                task.cancel()
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 @app.post("/intelligent/voice", response_model=IntelligentResponse, summary="Voice Query Processing")
 async def intelligent_voice_endpoint(
     audio: UploadFile = File(...), 
     voice_mode: bool = Form(True),
-    include_debug: bool = Form(False)
+    include_debug: bool = Form(False),
+    session_id: Optional[str] = Form(None)
 ):
     """
     Process voice queries intelligently by converting speech to text,
     routing to appropriate agents, and providing natural language responses.
     """
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-        tmp.write(await audio.read())
-        tmp_path = pathlib.Path(tmp.name)
-    
+    session_id = session_id or str(uuid.uuid4())
     try:
-        user_text = voice_agent.speech_to_text(tmp_path)
-    finally:
-        if tmp_path.exists():
-            tmp_path.unlink()
-    
-    return await process_intelligent_query(user_text.strip(), voice_mode, include_debug)
+        with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
+            tmp.write(await audio.read())
+            tmp_path = pathlib.Path(tmp.name)
+        
+        try:
+            user_text = await run_cpu_bound(voice_agent.speech_to_text, tmp_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+        
+        return await process_intelligent_query(user_text.strip(), voice_mode, include_debug, session_id=session_id)
+    except Exception as e:
+        # Close any status stream already opened for this session (e.g. transcription failed)
+        update_execution_status(session_id, f"Error: {e}", "failed", 100.0)
+        raise
 
 @app.get("/execution/status/{session_id}", response_model=ExecutionProgress, summary="Get Real-time Execution Status")
 async def get_execution_status(session_id: str):
     """Get the real-time execution status for a specific session."""
-    if session_id not in execution_status_store:
+    progress = execution_status_store.get(session_id)
+    if progress is None:
         raise HTTPException(status_code=404, detail="Session not found")
     
-    return execution_status_store[session_id]
+    return progress
+
+@app.get("/execution/stream/{session_id}", summary="Stream Execution Status Deltas (Server-Sent Events)")
+async def stream_execution_status(session_id: str):
+    """
+    Server-sent events for one session: a ``snapshot`` of the current state (if the
+    session already exists), then ``execution`` and ``agent`` deltas as they happen,
+    then ``end``. The stream may be opened before the query is posted when the client
+    supplies its own ``session_id``. Agent results are not included; they arrive in
+    the query response.
+    """
+    def get_snapshot():
+        progress = execution_status_store.get(session_id)
+        if progress is None:
+            return None
+        snapshot = _execution_delta(progress)
+        snapshot["query"] = progress.query
+        snapshot["agents_status"] = [_agent_delta(agent) for agent in progress.agents_status]
+        return snapshot
+
+    return StreamingResponse(
+        execution_events.stream(session_id, get_snapshot=get_snapshot),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.get("/execution/store", summary="Get Execution Status Store Metrics")
+async def get_execution_store_metrics():
+    """Session count, TTL/capacity evictions and result truncations for the status store."""
+    return execution_status_store.metrics()
+
+@app.get("/intelligent/cache", summary="Get Response Cache Metrics")
+async def get_response_cache_metrics():
+    """Entries, hit rate, expiries/evictions and per-agent TTLs of the query response cache."""
+    return response_cache.metrics()
+
+@app.delete("/intelligent/cache", summary="Clear Response Cache")
+async def clear_response_cache():
+    """Drop every cached answer, e.g. after re-indexing documents."""
+    response_cache.clear()
+    return {"message": "Response cache cleared"}
+
+@app.get("/execution/streams", summary="Get Status Stream Metrics")
+async def get_execution_stream_metrics():
+    """Open SSE subscriptions and published/delivered event counts."""
+    return execution_events.metrics()
 
 @app.delete("/execution/status/{session_id}", summary="Clean up Execution Session")
 async def cleanup_execution_status(session_id: str):
     """Clean up execution session data."""
-    if session_id in execution_status_store:
-        del execution_status_store[session_id]
+    if execution_status_store.pop(session_id) is not None:
         return {"message": "Session cleaned up successfully"}
     else:
         raise HTTPException(status_code=404, detail="Session not found")
 
+@app.get("/execution/executors", summary="Get Thread Pool Saturation Metrics")
+async def get_executor_metrics_endpoint():
+    """Active/queued/completed counts and queue wait times for the agent thread pools."""
+    return get_executor_metrics()
+
 @app.get("/agents/status", summary="Get Agent Status")
 async def get_agent_status_endpoint(): # Renamed to avoid conflict with the direct-callable function
     """
@@ -786,9 +1021,23 @@ def convert_numpy_types(obj):
     return obj
 
 # -------------------------------  STATUS TRACKING  -------------------------------
-def create_execution_session(query: str) -> str:
+def _execution_delta(progress: ExecutionProgress) -> Dict[str, Any]:
+    return {
+        "session_id": progress.session_id,
+        "current_step": progress.current_step,
+        "overall_status": progress.overall_status,
+        "progress_percentage": progress.progress_percentage,
+    }
+
+def _agent_delta(agent_status: AgentExecutionStatus) -> Dict[str, Any]:
+    """Agent status without its (potentially large) result payload."""
+    delta = agent_status.dict(exclude={"result"})
+    delta["has_result"] = agent_status.result is not None
+    return delta
+
+def create_execution_session(query: str, session_id: Optional[str] = None) -> str:
     """Create a new execution session and return session ID."""
-    session_id = str(uuid.uuid4())
+    session_id = session_id or str(uuid.uuid4())
     execution_status_store[session_id] = ExecutionProgress(
         session_id=session_id,
         query=query,
@@ -797,20 +1046,34 @@ def create_execution_session(query: str) -> str:
         overall_status="initializing",
         progress_percentage=0.0
     )
+    execution_events.publish(session_id, "execution", {**_execution_delta(execution_status_store[session_id]), "query": query})
     return session_id
 
 def update_execution_status(session_id: str, step: str, overall_status: str, progress: float):
-    """Update the overall execution status."""
-    if session_id in execution_status_store:
-        execution_status_store[session_id].current_step = step
-        execution_status_store[session_id].overall_status = overall_status
-        execution_status_store[session_id].progress_percentage = progress
+    """Update the overall execution status and push the change to stream subscribers."""
+    finished = overall_status == "failed" or progress >= 100.0
+    progress_entry = execution_status_store.get(session_id)
+    if progress_entry is not None:
+        progress_entry.current_step = step
+        progress_entry.overall_status = overall_status
+        progress_entry.progress_percentage = progress
+        execution_status_store.touch(session_id)
+        if finished:
+            # Full results were already returned to the caller; keep only a preview
+            execution_status_store.finalize(session_id)
+    delta = {"session_id": session_id, "current_step": step, "overall_status": overall_status, "progress_percentage": progress}
+    execution_events.publish(session_id, "execution", delta)
+    if finished:
+        execution_events.publish(session_id, TERMINAL_EVENT, {"session_id": session_id, "overall_status": overall_status})
 
 def update_agent_status(session_id: str, agent_status: AgentExecutionStatus):
-    """Update or add agent status."""
-    if session_id in execution_status_store:
+    """Update or add agent status and push the change to stream subscribers."""
+    progress_entry = execution_status_store.get(session_id)
+    if progress_entry is not None:
+        execution_events.publish(session_id, "agent", {"session_id": session_id, "agent": _agent_delta(agent_status)})
+        execution_status_store.touch(session_id)
         # Find and update existing agent status or add new one
-        agents = execution_status_store[session_id].agents_status
+        agents = progress_entry.agents_status
         for i, existing_agent in enumerate(agents):
             if existing_agent.agent_name == agent_status.agent_name:
                 agents[i] = agent_status
@@ -14,6 +14,7 @@ import base64
 import time
 import json
 import threading
+import queue
 from datetime import datetime, timedelta
 import plotly.express as px
 import plotly.graph_objects as go
@@ -581,16 +582,76 @@ def create_typing_indicator():
     </div>
     """
 
+def listen_execution_stream(session_id: str, events: "queue.Queue", stream_state: Dict[str, Any], stop_event: threading.Event):
+    """Read the orchestrator's server-sent status events for a session into ``events``."""
+    try:
+        with requests.get(f"{ORCHESTRATOR_URL}/execution/stream/{session_id}", stream=True, timeout=(5, 130)) as response:
+            response.raise_for_status()
+            stream_state["connected"] = True
+            event_name, data_lines = None, []
+            for line in response.iter_lines(decode_unicode=True):
+                if stop_event.is_set():
+                    break
+                if line is None:
+                    continue
+                if line == "":
+                    # Blank line terminates one SSE frame
+                    if event_name and data_lines:
+                        events.put((event_name, json.loads("\n".join(data_lines))))
+                        if event_name == "end":
+                            break
+                    event_name, data_lines = None, []
+                elif line.startswith("event:"):
+                    event_name = line[len("event:"):].strip()
+                elif line.startswith("data:"):
+                    data_lines.append(line[len("data:"):].strip())
+    except Exception as e:
+        stream_state["error"] = e
+    finally:
+        stream_state["closed"] = True
+
+def apply_execution_events(status_data: Dict[str, Any], events: "queue.Queue") -> bool:
+    """Fold queued status deltas into ``status_data``; returns True if anything changed."""
+    changed = False
+    while True:
+        try:
+            event_name, data = events.get_nowait()
+        except queue.Empty:
+            return changed
+        changed = True
+        if event_name == "snapshot":
+            status_data.update(data)
+        elif event_name == "execution":
+            status_data.update({k: v for k, v in data.items() if k != "session_id"})
+        elif event_name == "agent":
+            agent = data["agent"]
+            agents = status_data.setdefault("agents_status", [])
+            for i, existing in enumerate(agents):
+                if existing.get("agent_name") == agent.get("agent_name"):
+                    agents[i] = agent
+                    break
+            else:
+                agents.append(agent)
+        elif event_name == "end":
+            status_data["stream_ended"] = True
+
 def display_enhanced_real_time_status(session_id):
-    """Enhanced real-time execution status with beautiful visualizations."""
+    """Fetch the full execution status once and render it (polling fallback)."""
     if not session_id:
         return
     
     try:
         response = requests.get(f"{ORCHESTRATOR_URL}/execution/status/{session_id}", timeout=10)
         if response.status_code == 200:
-            data = response.json()
-            
+            return render_execution_status(response.json())
+    except Exception as e:
+        st.error(f"Error fetching status: {e}")
+        return "error"
+
+def render_execution_status(data: Dict[str, Any]):
+    """Enhanced real-time execution status with beautiful visualizations."""
+    try:
+        if data:
             # Overall progress with enhanced styling
             progress = data.get('progress_percentage', 0.0)
             current_step = data.get('current_step', 'Unknown')
@@ -680,7 +741,7 @@ def display_enhanced_real_time_status(session_id):
             return overall_status
             
     except Exception as e:
-        st.error(f"Error fetching status: {e}")
+        st.error(f"Error rendering status: {e}")
         return "error"
 
 def display_enhanced_conversation():
@@ -925,6 +986,11 @@ def send_intelligent_request(query: str = None, audio_file = None, voice_output_
 
     # Show enhanced status container
     status_container = st.empty()
+
+    # Pick the session id up front so the status stream can be opened before the query is sent
+    session_id = str(uuid.uuid4())
+    payload["session_id"] = session_id
+    st.session_state.current_session_id = session_id
     
     try:
         # Start the request in a separate thread
@@ -941,37 +1007,52 @@ def send_intelligent_request(query: str = None, audio_file = None, voice_output_
             except Exception as e:
                 response_container["error"] = e
 
-        # Start request thread
+        # Subscribe to pushed status deltas, then start the request
+        status_events = queue.Queue()
+        stream_state = {"connected": False, "error": None, "closed": False}
+        stop_stream = threading.Event()
+        stream_thread = threading.Thread(target=listen_execution_stream, args=(session_id, status_events, stream_state, stop_stream), daemon=True)
+        stream_thread.start()
+        connect_deadline = time.time() + 2.0
+        while not stream_state["connected"] and not stream_state["closed"] and time.time() < connect_deadline:
+            time.sleep(0.05)
+
         request_thread = threading.Thread(target=make_request)
         request_thread.start()
         
-        # Poll for status updates
-        session_id = None
-        overall_status = "initializing"
-        agent_flow_data = []
+        status_data = {
+            "session_id": session_id,
+            "current_step": "Initializing",
+            "overall_status": "initializing",
+            "progress_percentage": 0.0,
+            "agents_status": []
+        }
+        last_poll = 0.0
+        drained = False
         
-        while request_thread.is_alive() or overall_status not in ["completed", "failed", "error"]:
-            if not session_id and response_container.get("response"):
-                session_id = response_container["response"].get("session_id")
-                st.session_state.current_session_id = session_id
-            
-            if session_id:
-                with status_container.container():
-                    overall_status = display_enhanced_real_time_status(session_id)
-                    
-                    # Collect agent flow data
-                    try:
-                        flow_response = requests.get(f"{ORCHESTRATOR_URL}/execution/status/{session_id}", timeout=10)
-                        if flow_response.status_code == 200:
-                            flow_data = flow_response.json()
-                            agent_flow_data = flow_data.get('agents_status', [])
-                    except:
-                        pass
-            
-            time.sleep(0.5)
-            
-            if not request_thread.is_alive():
-                break
+        while request_thread.is_alive():
+            # Stream while it is open and either connected or still inside its connect window
+            streaming = not stream_state["closed"] and (stream_state["connected"] or time.time() < connect_deadline)
+            if streaming:
+                # Re-render only when the orchestrator pushed something new
+                if apply_execution_events(status_data, status_events):
+                    with status_container.container():
+                        render_execution_status(status_data)
+            else:
+                if not drained:
+                    # Keep whatever the stream delivered before it dropped
+                    drained = True
+                    apply_execution_events(status_data, status_events)
+                if time.time() - last_poll >= 0.5:
+                    # Stream unavailable or dropped mid-request (proxy, read timeout, restart): poll instead
+                    last_poll = time.time()
+                    with status_container.container():
+                        display_enhanced_real_time_status(session_id)
+            time.sleep(0.1)
+
+        stop_stream.set()
+        apply_execution_events(status_data, status_events)
+        agent_flow_data = status_data.get("agents_status", [])
         
         # Clear status and typing indicator
         status_container.empty()
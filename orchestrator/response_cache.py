@@ -0,0 +1,131 @@
+"""response_cache.py
+LRU response cache for ``process_intelligent_query``.
+
+A full pipeline run costs several LLM calls (interpretation, explanation, synthesis)
+plus every agent it routes to, so identical or near-identical questions are answered
+from here instead. Entries are keyed by the normalized query (case, punctuation,
+whitespace and leading filler words do not matter) and live for the shortest TTL of
+the agents that produced them: answers built from live market data expire after
+seconds, explanations and retrieved documents after hours.
+"""
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+# Seconds an answer stays fresh, per agent type that contributed to it
+DEFAULT_AGENT_TTLS = {
+    "market_data": float(os.environ.get("RESPONSE_CACHE_MARKET_TTL_SECONDS", "30")),
+    "scraping": 300.0,
+    "analysis": 600.0,
+    "retrieval": 3600.0,
+    "explanation": float(os.environ.get("RESPONSE_CACHE_EXPLANATION_TTL_SECONDS", str(6 * 3600))),
+}
+DEFAULT_RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", "512"))
+RESPONSE_CACHE_ENABLED = os.environ.get("RESPONSE_CACHE_ENABLED", "1") not in ("0", "false", "False")
+
+_FILLER_PREFIXES = ("please ", "hey ", "hi ", "can you ", "could you ", "tell me ")
+_PUNCT_RE = re.compile(r"[^\w\s$&.'/-]+")
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Canonical form used as the cache key: "What's AAPL's price??" == "what's aapl's price"."""
+    text = _SPACE_RE.sub(" ", _PUNCT_RE.sub(" ", query.lower())).strip(" .")
+    stripped = True
+    while stripped:
+        stripped = False
+        for prefix in _FILLER_PREFIXES:
+            if text.startswith(prefix):
+                text, stripped = text[len(prefix):], True
+    return text
+
+
+class QueryResponseCache:
+    """Thread-safe TTL + LRU cache of final ``IntelligentResponse`` objects."""
+
+    def __init__(self, agent_ttls: Optional[Dict[str, float]] = None,
+                 max_entries: int = DEFAULT_RESPONSE_CACHE_MAX_ENTRIES,
+                 default_ttl: float = 300.0):
+        self.agent_ttls = {**DEFAULT_AGENT_TTLS, **(agent_ttls or {})}
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._lock = threading.Lock()
+        # key -> (expires_at, stored_at, response); ordered least recently used first
+        self._entries: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._stored = 0
+        self._skipped = 0
+        self._expired = 0
+        self._evictions = 0
+
+    @staticmethod
+    def make_key(query: str, voice_mode: bool = False) -> tuple:
+        return (normalize_query(query), bool(voice_mode))
+
+    def ttl_for(self, agent_types: Iterable[str]) -> float:
+        """Shortest TTL among the agents that answered; unknown agents use ``default_ttl``."""
+        ttls = [self.agent_ttls.get(agent_type, self.default_ttl) for agent_type in agent_types]
+        return min(ttls) if ttls else self.default_ttl
+
+    def get(self, key: tuple) -> Optional[Tuple[Any, float]]:
+        """Return ``(response, age_seconds)`` for a fresh entry, else None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            now = time.monotonic()
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                self._expired += 1
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[2], now - entry[1]
+
+    def put(self, key: tuple, response: Any, agent_types: Iterable[str]):
+        ttl = self.ttl_for(agent_types)
+        if ttl <= 0 or self.max_entries <= 0:
+            with self._lock:
+                self._skipped += 1
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._entries[key] = (now + ttl, now, response)
+            self._entries.move_to_end(key)
+            self._stored += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def skip(self):
+        """Count a response that was deliberately not cached (failed agents, fallback text)."""
+        with self._lock:
+            self._skipped += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "enabled": RESPONSE_CACHE_ENABLED,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "stored": self._stored,
+                "not_cached": self._skipped,
+                "expired": self._expired,
+                "evictions": self._evictions,
+                "agent_ttls": dict(self.agent_ttls),
+            }
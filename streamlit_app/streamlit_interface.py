@@ -115,17 +115,28 @@ class MarketDataStreamlit:
     def multiple_stocks_page(self):
         st.header("Multiple Stocks Comparison")
         
-        symbols_input = st.text_input(
-            "Enter Stock Symbols (comma-separated)",
-            value="AAPL,GOOGL,MSFT,TSLA",
-            help="e.g., AAPL,GOOGL,MSFT"
-        )
+        col1, col2 = st.columns([2, 1])
+        
+        with col1:
+            symbols_input = st.text_input(
+                "Enter Stock Symbols (comma-separated)",
+                value="AAPL,GOOGL,MSFT,TSLA",
+                help="e.g., AAPL,GOOGL,MSFT"
+            )
+        
+        with col2:
+            period = st.selectbox(
+                "Time Period",
+                ["5d", "1mo", "3mo", "6mo", "1y"],
+                index=1,
+                key="multiple_stocks_period"
+            )
         
         if st.button("Get Multiple Stocks Data", type="primary"):
-            symbols = [s.strip().upper() for s in symbols_input.split(",")]
+            symbols = [s.strip().upper() for s in symbols_input.split(",") if s.strip()]
             
-            with st.spinner("Fetching data for multiple stocks..."):
-                data = self.agent.get_multiple_stocks(symbols)
+            with st.spinner(f"Fetching data for {len(symbols)} stocks in one batch..."):
+                data = self.agent.get_multiple_stocks(symbols, period=period)
             
             # Create comparison table
             comparison_data = []